@@ -2,7 +2,19 @@
 
 import abc
 import asyncio
+import collections
+import contextlib
+import dataclasses
+import heapq
+import itertools
 import logging
+import multiprocessing
+import multiprocessing.process
+import multiprocessing.synchronize
+import signal
+import statistics
+import threading
+import time
 import typing
 
 logger = logging.getLogger(__name__)
@@ -11,9 +23,91 @@ logger = logging.getLogger(__name__)
 JobStatus = typing.Literal["waiting", "running", "finished", "canceled", "errored"]
 
 
+@dataclasses.dataclass(frozen=True)
+class DurationStats:
+    """所要時間の統計情報（秒）。パーセンタイルは直近のサンプルから算出する。"""
+
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+@dataclasses.dataclass(frozen=True)
+class JobRunnerStats:
+    """JobRunnerの統計情報。
+
+    wait_timeが大きく、runningが常にmax_job_concurrencyに張り付いている場合は
+    同時実行数がボトルネックとなっている。
+
+    Attributes:
+        running: 実行中のジョブ数
+        pending: 種別の上限により実行を待機しているジョブ数
+        finished: 正常終了したジョブ数
+        errored: エラー終了したジョブ数
+        canceled: キャンセルされたジョブ数（タイムアウトを含む）
+        timed_out: タイムアウトしたジョブ数
+        throughput: run()開始以降の1秒あたりの終了ジョブ数
+        wait_time: ジョブ取得から実行開始までの時間
+        run_time: Job.run()の実行時間
+    """
+
+    running: int
+    pending: int
+    finished: int
+    errored: int
+    canceled: int
+    timed_out: int
+    throughput: float
+    wait_time: DurationStats
+    run_time: DurationStats
+
+
+class _DurationSamples:
+    """所要時間のサンプルを直近max_samples件だけ保持して集計するクラス。"""
+
+    def __init__(self, max_samples: int) -> None:
+        self.samples: collections.deque[float] = collections.deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def summary(self) -> DurationStats:
+        if len(self.samples) < 2:
+            p50 = p95 = p99 = self.samples[0] if len(self.samples) == 1 else 0.0
+        else:
+            q = statistics.quantiles(self.samples, n=100, method="inclusive")
+            p50, p95, p99 = q[49], q[94], q[98]
+        return DurationStats(
+            count=self.count,
+            mean=self.total / self.count if self.count > 0 else 0.0,
+            p50=p50,
+            p95=p95,
+            p99=p99,
+            max=self.max,
+        )
+
+
 class Job(metaclass=abc.ABCMeta):
     """非同期ジョブ。"""
 
+    category: str = "default"
+    """ジョブの種別。JobRunnerの種別ごとの同時実行数上限・重みの単位となる。"""
+
+    priority: int = 0
+    """優先度。同じ種別のジョブの中では値が大きいものから実行する。"""
+
+    timeout: float | None = None
+    """実行時間の上限（秒）。NoneならJobRunnerのjob_timeoutに従う。"""
+
     def __init__(self) -> None:
         self.status: JobStatus = "waiting"
 
@@ -38,40 +132,237 @@ class Job(metaclass=abc.ABCMeta):
         del self  # noqa
 
 
-class JobRunner(metaclass=abc.ABCMeta):
+# poll()とpoll_many()のいずれかを実装すればよいため抽象メソッドは持たず、実装の有無は__init__()で確認する。
+# サブクラスでの抽象メソッド定義を妨げないようABCMetaは維持する
+class JobRunner(metaclass=abc.ABCMeta):  # noqa: B024
     """非同期ジョブを最大 max_job_concurrency 並列で実行するクラス。
 
+    ジョブの取得は poll() または poll_many() をオーバーライドして実装する。
+    poll_many() には空いている実行枠の数が渡されるため、
+    一度のクエリで複数のジョブを取得できる場合は poll_many() を実装すると効率がよい。
+
+    ジョブは Job.category ごとに category_limits で同時実行数の上限を設定できる。
+    上限に達した種別のジョブは実行枠が空くまでランナー内で待機させ、
+    その間も他の種別のジョブは実行する。
+    実行枠を取り合う場合は「実行中のジョブ数 / category_weights の重み」が
+    最も小さい種別から、種別内では Job.priority の大きい順に実行する。
+
+    上限に達した種別のジョブは実行枠を使わないため、実行枠が空いていればポーリングを続ける。
+    ただし取得したジョブは上限に達した種別のものも含めて max_pending に数え、
+    ランナー内に抱え込むジョブ数が max_pending + 空き枠数 に達するとポーリングを止める。
+    上限に達した種別のジョブが先に溜まっている場合に後ろの他の種別のジョブを取得できるよう、
+    poll() / poll_many() の実装では saturated_categories() の種別を取得元で除外するとよい。
+
+    Job.run() が job_timeout（Job.timeout が指定されていればそちら）秒を超えた場合は
+    キャンセルして on_canceled() を呼ぶ。
+    実行時間などの統計情報は stats() で取得できる。
+
+    ジョブを取得できなかった場合は待機してから再度ポーリングする。
+    待機時間は poll_interval から始まり、ジョブが無い状態が続くと
+    backoff_factor 倍ずつ max_poll_interval まで延びる。
+    ジョブを追加した側が notify() を呼ぶと待機を打ち切って即座にポーリングする。
+
     Args:
         max_job_concurrency: ジョブの最大同時実行数
-        poll_interval: ジョブ取得のポーリング間隔（秒）
+        poll_interval: ジョブ取得のポーリング間隔（秒）。バックオフ時は最小値
+        max_poll_interval: バックオフ時のポーリング間隔の最大値（秒）。Noneの場合はバックオフしない
+        backoff_factor: ジョブが無かった場合にポーリング間隔を延ばす倍率
+        category_limits: 種別ごとの同時実行数の上限。指定の無い種別は max_job_concurrency のみで制限する
+        category_weights: 種別ごとの重み。指定の無い種別は1.0
+        max_pending: ランナー内で実行を待機させるジョブ数の上限（種別の上限により待機しているジョブを含む）。
+            Noneの場合は max_job_concurrency
+        job_timeout: ジョブの実行時間の上限（秒）。Noneの場合は制限しない
+        max_stats_samples: 統計情報のパーセンタイル算出に使う直近のサンプル数
     """
 
-    def __init__(self, max_job_concurrency: int = 8, poll_interval: float = 1.0) -> None:
+    def __init__(
+        self,
+        max_job_concurrency: int = 8,
+        poll_interval: float = 1.0,
+        max_poll_interval: float | None = None,
+        backoff_factor: float = 2.0,
+        category_limits: dict[str, int] | None = None,
+        category_weights: dict[str, float] | None = None,
+        max_pending: int | None = None,
+        job_timeout: float | None = None,
+        max_stats_samples: int = 1000,
+    ) -> None:
+        if type(self).poll is JobRunner.poll and type(self).poll_many is JobRunner.poll_many:
+            raise TypeError(f"{self.__class__.__qualname__}はpoll()またはpoll_many()を実装する必要があります。")
         self.poll_interval = poll_interval
+        self.max_poll_interval = poll_interval if max_poll_interval is None else max(max_poll_interval, poll_interval)
+        self.backoff_factor = backoff_factor
+        self.current_poll_interval = poll_interval
         self.max_job_concurrency = max_job_concurrency
         self.running = True
         self.semaphore = asyncio.Semaphore(max_job_concurrency)
         self.tasks: set[asyncio.Task] = set()  # 実行中ジョブのタスクを管理
+        self.wakeup = asyncio.Event()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.category_limits = category_limits or {}
+        self.category_weights = category_weights or {}
+        self.max_pending = max_job_concurrency if max_pending is None else max_pending
+        self.pending: dict[str, list[tuple[int, int, float, Job]]] = collections.defaultdict(list)
+        """種別ごとの実行待ちジョブ。(-priority, 取得順, 取得時刻, ジョブ)のヒープ。"""
+        self.num_pending = 0
+        self.category_running: collections.Counter[str] = collections.Counter()
+        """種別ごとの実行中のジョブ数。"""
+        self._seq = itertools.count()
+        self.job_timeout = job_timeout
+        self.started_at: float | None = None
+        self.finished_count = 0
+        self.errored_count = 0
+        self.canceled_count = 0
+        self.timed_out_count = 0
+        self.wait_times = _DurationSamples(max_stats_samples)
+        self.run_times = _DurationSamples(max_stats_samples)
 
     async def run(self) -> None:
         """poll()でジョブを取得し、並列実行上限内でジョブを実行する。"""
-        while self.running:
-            # セマフォを取得して実行可能なジョブがあるか確認
-            await self.semaphore.acquire()
-            # 再度self.runningをチェック (graceful_shutdown()対策)
-            if not self.running:
-                self.semaphore.release()
+        self.loop = asyncio.get_running_loop()
+        self.started_at = time.perf_counter()
+        try:
+            while self.running:
+                # セマフォを取得して実行可能なジョブがあるか確認
+                await self.semaphore.acquire()
+                # 再度self.runningをチェック (graceful_shutdown()対策)
+                if not self.running:
+                    self.semaphore.release()
+                    break
+                # 他に空いている実行枠もまとめて確保する
+                slots = 1
+                while not self.semaphore.locked():
+                    await self.semaphore.acquire()
+                    slots += 1
+                # ポーリング中のnotify()を取りこぼさないよう、ポーリング前にクリアする
+                self.wakeup.clear()
+                # 待機中のジョブを優先して実行する
+                slots -= self._dispatch(slots)
+                if slots <= 0:
+                    continue
+                # 取得したジョブのうち種別の上限で実行できない分は実行待ちになるため、
+                # 実行待ちのジョブ数が max_pending を超えた分だけ取得数を減らし、ランナー内に抱え込む
+                # ジョブ数を max_pending + 空き枠数 までに抑える（上限に達するとポーリングを止める）
+                num_polled = 0
+                n = min(slots, self.max_pending + slots - self.num_pending)
+                if n > 0:
+                    jobs = await self._poll_many(n)
+                    num_polled = len(jobs)
+                    # poll_many()がn件を超えて返した場合も含め、実行できない分は実行待ちにする
+                    for job in jobs:
+                        self._push_pending(job)
+                    slots -= self._dispatch(slots)
+                # 使わなかった実行枠を解放
+                for _ in range(slots):
+                    self.semaphore.release()
+                if num_polled > 0:
+                    self.current_poll_interval = self.poll_interval
+                if slots > 0 and (n <= 0 or num_polled < n):
+                    # ジョブが無いか、種別の上限で実行できない場合は待機する。
+                    # 要求した件数を取得できた場合はまだジョブが残っている可能性が高いため、待機せずに再度ポーリングする
+                    await self._wait()
+        finally:
+            await self._cancel_pending()
+
+    def category_capacity(self, category: str) -> int | None:
+        """種別の残りの実行枠数を返す。
+
+        poll() / poll_many() の実装で、上限に達した種別のジョブを取得しないために使う。
+
+        Args:
+            category: ジョブの種別
+
+        Returns:
+            上限までの残りの実行枠数（待機中のジョブを含む）。上限が無い場合はNone。
+        """
+        limit = self.category_limits.get(category)
+        if limit is None:
+            return None
+        return max(limit - self.category_running[category] - len(self.pending[category]), 0)
+
+    def saturated_categories(self) -> set[str]:
+        """上限に達している（待機中のジョブを含む）種別を返す。
+
+        poll() / poll_many() の実装で、取得しても実行できない種別のジョブを除外するために使う。
+
+        Returns:
+            category_capacity() が0の種別の集合。
+        """
+        return {category for category in self.category_limits if self.category_capacity(category) == 0}
+
+    def _is_saturated(self, category: str) -> bool:
+        """種別が上限まで実行中か否かを返す。"""
+        return self.category_running[category] >= self.category_limits.get(category, self.max_job_concurrency)
+
+    def _push_pending(self, job: Job) -> None:
+        """ジョブを実行待ちに追加する。"""
+        heapq.heappush(self.pending[job.category], (-job.priority, next(self._seq), time.perf_counter(), job))
+        self.num_pending += 1
+
+    def _dispatch(self, slots: int) -> int:
+        """実行待ちのジョブを最大 slots 件実行し、実行した件数を返す。"""
+        started = 0
+        while started < slots:
+            candidates = [
+                category for category, heap in self.pending.items() if len(heap) > 0 and not self._is_saturated(category)
+            ]
+            if len(candidates) == 0:
                 break
-            job = await self._poll()
-            if job is None:
-                # ジョブがなければセマフォを解放して一定時間待機
-                self.semaphore.release()
-                await asyncio.sleep(self.poll_interval)
-            else:
-                # ジョブがあれば実行
-                task = asyncio.create_task(self._run_job(job))
-                task.add_done_callback(self.tasks.discard)
-                self.tasks.add(task)
+            # 重み付き公平スケジューリング: 重みあたりの実行中ジョブ数が最小の種別から選ぶ。
+            # 同率の場合は先頭ジョブの優先度・取得順で選ぶ。
+            category = min(
+                candidates,
+                key=lambda c: (self.category_running[c] / self.category_weights.get(c, 1.0), self.pending[c][0][:2]),
+            )
+            _, _, enqueued_at, job = heapq.heappop(self.pending[category])
+            self.num_pending -= 1
+            self.category_running[category] += 1
+            task = asyncio.create_task(self._run_job(job, enqueued_at))
+            task.add_done_callback(self.tasks.discard)
+            self.tasks.add(task)
+            started += 1
+        return started
+
+    async def _cancel_pending(self) -> None:
+        """停止時に実行待ちのまま残ったジョブをキャンセル扱いにする。"""
+        for heap in self.pending.values():
+            for _, _, _, job in heap:
+                self.canceled_count += 1
+                await self._on_canceled(job)
+                try:
+                    await asyncio.shield(job.on_finally())
+                except Exception:
+                    logger.warning("ジョブ終了処理エラー", exc_info=True)
+            heap.clear()
+        self.num_pending = 0
+
+    async def _wait(self) -> None:
+        """notify()されるかポーリング間隔が経過するまで待機する。"""
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout=self.current_poll_interval)
+        except TimeoutError:
+            # ジョブが無い状態が続いているので次回の待機時間を延ばす
+            self.current_poll_interval = min(self.current_poll_interval * self.backoff_factor, self.max_poll_interval)
+        else:
+            self.current_poll_interval = self.poll_interval
+
+    def notify(self) -> None:
+        """ジョブの追加を通知し、待機中であれば即座にポーリングさせる。
+
+        run()を実行しているイベントループ以外のスレッドからも呼び出せる。
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            # run()の開始前は待機していないため何もしなくてよい
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            self.wakeup.set()
+        else:
+            loop.call_soon_threadsafe(self.wakeup.set)
 
     async def _poll(self) -> Job | None:
         try:
@@ -80,32 +371,85 @@ class JobRunner(metaclass=abc.ABCMeta):
             logger.warning("ジョブ取得エラー", exc_info=True)
             return None
 
-    async def _run_job(self, job: Job) -> None:
+    async def _poll_many(self, n: int) -> list[Job]:
+        try:
+            jobs = await self.poll_many(n)
+        except Exception:
+            logger.warning("ジョブ取得エラー", exc_info=True)
+            return []
+        if len(jobs) > n:
+            # 実装の誤りだが、取得済みのジョブを取りこぼさないよう超過分は実行待ちとして扱う
+            logger.error(f"poll_many({n})が{len(jobs)}件のジョブを返しました。")
+        return jobs
+
+    async def _run_job(self, job: Job, enqueued_at: float) -> None:
+        start = time.perf_counter()
+        self.wait_times.add(start - enqueued_at)
+        timeout = self.job_timeout if job.timeout is None else job.timeout
+        timeout_cm = asyncio.timeout(timeout)
         try:
-            await job.run()
+            try:
+                async with timeout_cm:
+                    await job.run()
+            finally:
+                self.run_times.add(time.perf_counter() - start)
             await asyncio.shield(job.on_finished())
+            self.finished_count += 1
         except asyncio.CancelledError:
-            try:
-                await asyncio.shield(job.on_canceled())
-            except Exception:
-                logger.warning("ジョブキャンセル処理エラー", exc_info=True)
+            self.canceled_count += 1
+            await self._on_canceled(job)
             raise  # 例外を再送出してキャンセル状態を伝搬
-        except Exception:
-            logger.warning("ジョブ実行エラー", exc_info=True)
-            try:
-                await asyncio.shield(job.on_errored())
-            except Exception:
-                logger.warning("ジョブエラー処理エラー", exc_info=True)
+        except Exception as e:
+            if isinstance(e, TimeoutError) and timeout_cm.expired():
+                # タイムアウトはキャンセル扱いとする（実行枠を解放して処理を継続）
+                logger.warning(f"ジョブタイムアウト: {job!r} ({timeout} s)")
+                self.timed_out_count += 1
+                self.canceled_count += 1
+                await self._on_canceled(job)
+            else:
+                logger.warning("ジョブ実行エラー", exc_info=True)
+                self.errored_count += 1
+                try:
+                    await asyncio.shield(job.on_errored())
+                except Exception:
+                    logger.warning("ジョブエラー処理エラー", exc_info=True)
         finally:
             try:
                 await asyncio.shield(job.on_finally())
             except Exception:
                 logger.warning("ジョブ終了処理エラー", exc_info=True)
             self.semaphore.release()
+            self.category_running[job.category] -= 1
+            if len(self.pending[job.category]) > 0:
+                # 種別の上限で待機しているジョブを実行させる
+                self.wakeup.set()
+
+    async def _on_canceled(self, job: Job) -> None:
+        try:
+            await asyncio.shield(job.on_canceled())
+        except Exception:
+            logger.warning("ジョブキャンセル処理エラー", exc_info=True)
+
+    def stats(self) -> JobRunnerStats:
+        """統計情報を返す。"""
+        elapsed = 0.0 if self.started_at is None else time.perf_counter() - self.started_at
+        num_done = self.finished_count + self.errored_count + self.canceled_count
+        return JobRunnerStats(
+            running=len(self.tasks),
+            pending=self.num_pending,
+            finished=self.finished_count,
+            errored=self.errored_count,
+            canceled=self.canceled_count,
+            timed_out=self.timed_out_count,
+            throughput=num_done / elapsed if elapsed > 0 else 0.0,
+            wait_time=self.wait_times.summary(),
+            run_time=self.run_times.summary(),
+        )
 
     def shutdown(self) -> None:
         """停止処理。"""
         self.running = False
+        self.notify()
         # 現在実行中のタスクにキャンセルを通知
         for task in list(self.tasks):
             task.cancel()
@@ -113,10 +457,189 @@ class JobRunner(metaclass=abc.ABCMeta):
     async def graceful_shutdown(self) -> None:
         """新規ジョブ取得を停止し、実行中のジョブ完了を待ってから戻る。"""
         self.running = False
+        self.notify()
         await asyncio.sleep(0)
         if len(self.tasks) > 0:
             await asyncio.gather(*list(self.tasks), return_exceptions=True)
 
-    @abc.abstractmethod
     async def poll(self) -> Job | None:
-        """次のジョブを返す。ジョブがなければ None を返す。"""
+        """次のジョブを返す。ジョブがなければ None を返す。
+
+        poll_many() をオーバーライドしない場合は実装が必要。
+        """
+        return None
+
+    async def poll_many(self, n: int) -> list[Job]:
+        """最大 n 件のジョブを返す。ジョブがなければ空のリストを返す。
+
+        デフォルトではジョブが無くなるまで最大 n 回 poll() を呼び出す。
+        一度のクエリで複数のジョブを取得できる場合はオーバーライドする。
+
+        Args:
+            n: 取得するジョブの最大数。上限に達した種別のジョブも件数に数える
+
+        Returns:
+            取得したジョブのリスト（最大 n 件）
+        """
+        jobs: list[Job] = []
+        while len(jobs) < n:
+            job = await self._poll()
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+
+class JobRunnerSupervisor:
+    """JobRunnerを複数のワーカープロセスで実行するクラス。
+
+    JobRunnerは1つのイベントループで動作するため、CPU負荷の高いジョブは1コアで頭打ちになる。
+    このクラスは num_workers 個のプロセスを起動し、各プロセスで runner_factory() が返す
+    JobRunnerを実行する。異常終了したワーカーは restart_delay 秒後に再起動する。
+    ワーカープロセスはSIGTERMを受け取るとgraceful_shutdown()して正常終了し、再起動はされない
+    （systemdの停止などでプロセスグループ全体にSIGTERMが送られた場合も実行中のジョブの完了を待つ）。
+    全ワーカーが正常終了した場合はrun()から戻る。
+
+    各ワーカーは独立して poll() / poll_many() を呼び出すため、その実装は複数プロセスから
+    同時に呼ばれても同じジョブを二重に取得しないようにする必要がある
+    （例: `SELECT ... FOR UPDATE SKIP LOCKED` や条件付きUPDATEによる取得）。
+
+    runner_factory はワーカープロセスへ渡すためpickle可能である必要がある
+    （モジュールのトップレベル関数や functools.partial など）。
+
+    使用例::
+
+        ```python
+        def make_runner() -> MyJobRunner:
+            return MyJobRunner(max_job_concurrency=8)
+
+        if __name__ == "__main__":
+            pytilpack.asyncio.JobRunnerSupervisor(make_runner, num_workers=4).run()
+        ```
+
+    Args:
+        runner_factory: ワーカープロセス内でJobRunnerを生成する関数
+        num_workers: ワーカープロセス数。Noneの場合はCPUコア数
+        restart_delay: 異常終了したワーカーを再起動するまでの待機時間（秒）
+        shutdown_timeout: graceful_shutdown()後にワーカーの終了を待つ最大時間（秒）。
+            超過したワーカーは強制終了する。Noneの場合は無制限に待つ
+        mp_context: multiprocessingのコンテキスト名（"fork"、"spawn"、"forkserver"）。Noneの場合はデフォルト
+        monitor_interval: ワーカーの死活監視間隔（秒）
+        handle_signals: run()をメインスレッドで呼んだ場合に、SIGTERM/SIGINTでgraceful_shutdown()するか否か
+    """
+
+    def __init__(
+        self,
+        runner_factory: typing.Callable[[], JobRunner],
+        num_workers: int | None = None,
+        restart_delay: float = 1.0,
+        shutdown_timeout: float | None = None,
+        mp_context: str | None = None,
+        monitor_interval: float = 0.5,
+        handle_signals: bool = True,
+    ) -> None:
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        if num_workers < 1:
+            raise ValueError("num_workers must be >= 1")
+        self.runner_factory = runner_factory
+        self.num_workers = num_workers
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.monitor_interval = monitor_interval
+        self.handle_signals = handle_signals
+        self.context = multiprocessing.get_context(mp_context)
+        self.stop_event = self.context.Event()
+        """ワーカープロセスへ停止を伝えるイベント。"""
+        self.stopping = threading.Event()
+        self.processes: list[multiprocessing.process.BaseProcess] = []
+        self.restart_count = 0
+
+    def run(self) -> None:
+        """ワーカープロセスを起動し、graceful_shutdown()されるか全ワーカーが正常終了するまで監視する。
+
+        graceful_shutdown()後は全ワーカーの実行中のジョブの完了を待ってから戻る。
+        """
+        original_handlers: dict[int, typing.Any] = {}
+        if self.handle_signals and threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                original_handlers[signum] = signal.signal(signum, lambda *_: self.graceful_shutdown())
+        try:
+            self.processes = [self._start_worker(i) for i in range(self.num_workers)]
+            restart_at: dict[int, float] = {}
+            exited: set[int] = set()  # 正常終了したため再起動しないワーカー
+            while not self.stopping.wait(self.monitor_interval):
+                now = time.monotonic()
+                for i, process in enumerate(self.processes):
+                    if i in exited:
+                        continue
+                    if i in restart_at:
+                        if now >= restart_at[i]:
+                            del restart_at[i]
+                            self.processes[i] = self._start_worker(i)
+                            self.restart_count += 1
+                    elif not process.is_alive():
+                        process.join()
+                        if process.exitcode == 0:
+                            logger.info(f"ワーカープロセス終了: {process.name}")
+                            exited.add(i)
+                        else:
+                            logger.warning(f"ワーカープロセス異常終了: {process.name} (exitcode={process.exitcode})")
+                            restart_at[i] = now + self.restart_delay
+                if len(exited) == len(self.processes):
+                    break
+            self._stop_workers()
+        finally:
+            for signum, handler in original_handlers.items():
+                signal.signal(signum, handler)
+
+    def _start_worker(self, index: int) -> multiprocessing.process.BaseProcess:
+        """ワーカープロセスを起動する。"""
+        process = self.context.Process(  # type: ignore[attr-defined]
+            target=_run_worker,
+            args=(self.runner_factory, self.stop_event),
+            name=f"jobrunner-{index}",
+        )
+        process.start()
+        return process
+
+    def _stop_workers(self) -> None:
+        """全ワーカーに停止を伝え、終了を待つ。"""
+        self.stop_event.set()
+        deadline = None if self.shutdown_timeout is None else time.monotonic() + self.shutdown_timeout
+        for process in self.processes:
+            process.join(None if deadline is None else max(deadline - time.monotonic(), 0.0))
+        for process in self.processes:
+            if process.is_alive():
+                # SIGTERMではgraceful_shutdown()となるため、SIGKILLで強制終了する
+                logger.warning(f"ワーカープロセス強制終了: {process.name}")
+                process.kill()
+                process.join()
+
+    def graceful_shutdown(self) -> None:
+        """全ワーカーの新規ジョブ取得を停止し、実行中のジョブの完了後にrun()から戻るよう要求する。
+
+        他のスレッドやシグナルハンドラーからも呼び出せる。待機はしない。
+        """
+        self.stopping.set()
+
+
+def _run_worker(runner_factory: typing.Callable[[], JobRunner], stop_event: multiprocessing.synchronize.Event) -> None:
+    """ワーカープロセスのエントリーポイント。"""
+    # Ctrl+CのSIGINTはプロセスグループ全体に届くため、停止はスーパーバイザーからの指示に従う
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_arun_worker(runner_factory, stop_event))
+
+
+async def _arun_worker(runner_factory: typing.Callable[[], JobRunner], stop_event: multiprocessing.synchronize.Event) -> None:
+    """ワーカープロセス内でJobRunnerを実行し、停止指示かSIGTERMがあればgraceful_shutdown()する。"""
+    terminated = asyncio.Event()
+    with contextlib.suppress(NotImplementedError):  # Windowsではadd_signal_handlerが使えない
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, terminated.set)
+    runner = runner_factory()
+    run_task = asyncio.create_task(runner.run())
+    while not run_task.done() and not stop_event.is_set() and not terminated.is_set():
+        await asyncio.wait({run_task}, timeout=0.1)
+    if not run_task.done():
+        await runner.graceful_shutdown()
+    await run_task
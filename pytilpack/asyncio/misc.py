@@ -10,7 +10,11 @@ def get_task_id() -> int | None:
         タスクID。タスクが存在しない場合はNone。
 
     """
-    task = asyncio.current_task()
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        # イベントループ外 (同期処理のスレッド) から呼ばれた場合
+        return None
     return id(task) if task is not None else None
 
 
@@ -2,29 +2,119 @@
 
 import asyncio
 import concurrent.futures
+import contextlib
+import dataclasses
+import functools
 import logging
 import threading
+import time
 import typing
 
 logger = logging.getLogger(__name__)
 
 
+DispatchType = typing.Literal["least_loaded", "round_robin"]
+"""ワーカーの選択方式。"""
+
+LoopLagHook = typing.Callable[[str, float], None]
+"""ループ遅延の警告フック。引数はワーカー名と遅延秒数。"""
+
+
+@dataclasses.dataclass(frozen=True)
+class WorkerStats:
+    """ワーカーの統計情報。
+
+    Attributes:
+        name: ワーカー名
+        queued: 送信済みでイベントループがまだ受け付けていないコルーチン数
+        in_flight: 送信済みで未完了のコルーチン数（queuedを含む）
+        completed: 正常終了したコルーチン数
+        failed: 例外終了またはキャンセルされたコルーチン数
+        loop_lag: 直近のループ遅延（送信からイベントループが受け付けるまでの秒数）
+        max_loop_lag: ループ遅延の最大値
+    """
+
+    name: str
+    queued: int
+    in_flight: int
+    completed: int
+    failed: int
+    loop_lag: float
+    max_loop_lag: float
+
+
 class ThreadPool:
-    """N個のスレッド上で非同期処理を実行するスレッドプール。"""
+    """N個のスレッド上で非同期処理を実行するスレッドプール。
 
-    def __init__(self, max_workers: int) -> None:
+    submit()の送信先ワーカーは以下のように選ばれる。
+
+    - keyを指定した場合: keyのハッシュ値で決まる固定のワーカー。
+      スレッドローカルなキャッシュや接続（AsyncMixinのengine等）を同一keyで使い回したい場合に使う。
+      ワーカー数が変わると対応するワーカーも変わる。
+    - dispatch="least_loaded"（デフォルト）: 実行中のコルーチン数が最も少ないワーカー。
+      同数の場合はラウンドロビン順で選ぶ。
+    - dispatch="round_robin": 負荷によらず順番に選ぶ。
+
+    min_workersを指定するとワーカー数が動的に増減する。
+    submit()時に全ワーカーのイベントループが詰まっていれば（受け付け待ちのコルーチン数やループ遅延が閾値以上）
+    max_workersまでワーカーを追加し、
+    idle_timeout秒以上コルーチンを実行していないワーカーはmin_workersまで停止する。
+    resize()で明示的に変更することもできる。
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        dispatch: DispatchType = "least_loaded",
+        loop_lag_threshold: float | None = None,
+        on_loop_lag: LoopLagHook | None = None,
+        min_workers: int | None = None,
+        scale_up_queued: int | None = 4,
+        scale_up_in_flight: int | None = None,
+        scale_up_loop_lag: float | None = None,
+        idle_timeout: float = 60.0,
+    ) -> None:
         """スレッドプールを初期化する。
 
         Args:
-            max_workers: ワーカースレッド数(1以上)
+            max_workers: ワーカースレッド数(1以上)。min_workers指定時は最大ワーカースレッド数
+            dispatch: keyを指定しないsubmit()でのワーカーの選択方式
+            loop_lag_threshold: ループ遅延の警告閾値（秒）。Noneの場合は警告しない
+            on_loop_lag: ループ遅延が閾値を超えた場合に呼ばれるフック。Noneの場合はWARNINGログを出力する
+            min_workers: 最小ワーカースレッド数。Noneの場合はmax_workersで固定
+            scale_up_queued: 全ワーカーのイベントループがまだ受け付けていないコルーチン数がこの値以上ならワーカーを追加する。
+                Noneの場合は判定しない。連続して送信した直後は一時的に増えるため、既定値は余裕を持たせて4とする
+            scale_up_in_flight: 全ワーカーの未完了コルーチン数がこの値以上ならワーカーを追加する。Noneの場合は判定しない。
+                非同期処理では待機中のコルーチンも数えるため、同時実行数に比例してワーカーを増やしたい場合のみ指定する
+            scale_up_loop_lag: 全ワーカーの直近のループ遅延がこの秒数以上ならワーカーを追加する。Noneの場合は判定しない
+            idle_timeout: この秒数以上コルーチンを実行していないワーカーを停止する
         """
         if max_workers < 1:
             raise ValueError("max_workers must be >= 1")
-        self.workers = [WorkerThread(name=f"aloop-{i}") for i in range(max_workers)]
+        if min_workers is None:
+            min_workers = max_workers
+        if not 1 <= min_workers <= max_workers:
+            raise ValueError("min_workers must be >= 1 and <= max_workers")
+        if dispatch not in ("least_loaded", "round_robin"):
+            raise ValueError(f"invalid dispatch: {dispatch}")
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.dispatch: DispatchType = dispatch
+        self.loop_lag_threshold = loop_lag_threshold
+        self.on_loop_lag = on_loop_lag
+        self.scale_up_queued = scale_up_queued
+        self.scale_up_in_flight = scale_up_in_flight
+        self.scale_up_loop_lag = scale_up_loop_lag
+        self.idle_timeout = idle_timeout
+        self.workers: list[WorkerThread] = []
+        self.retiring: list[WorkerThread] = []
+        """ディスパッチ対象から外され、実行中のコルーチンの完了を待っているワーカー。"""
         self.next = 0
+        self.num_created = 0
         self.lock = threading.Lock()
-        for w in self.workers:
-            w.start()
+        with self.lock:
+            for _ in range(min_workers):
+                self._add_worker()
 
     def __enter__(self) -> "ThreadPool":
         """コンテキストマネージャーの開始処理。"""
@@ -34,19 +124,43 @@ class ThreadPool:
         """コンテキストマネージャーの終了処理。"""
         self.shutdown()
 
-    def submit[T](self, coro: typing.Coroutine[typing.Any, typing.Any, T]) -> concurrent.futures.Future[T]:
+    def submit[T](
+        self, coro: typing.Coroutine[typing.Any, typing.Any, T], key: typing.Hashable | None = None
+    ) -> concurrent.futures.Future[T]:
         """コルーチンを実行するワーカーに送信する。
 
         Args:
             coro: 実行するコルーチン
+            key: 指定した場合、同じkeyのコルーチンは常に同じワーカーで実行される
 
         Returns:
             結果を取得するためのFuture
         """
+        # 停止処理中のワーカーへ送信しないよう、ワーカーの選択から送信までをロック内で行う
         with self.lock:
-            idx = self.next
-            self.next = (self.next + 1) % len(self.workers)
-        return self.workers[idx].submit(coro)
+            if len(self.workers) < self.max_workers and self._should_scale_up():
+                self._add_worker()
+            return self._select_worker(key).submit(coro)
+
+    def _should_scale_up(self) -> bool:
+        """ワーカーを追加すべきか否かを返す。ロック内で呼び出すこと。"""
+        if self.scale_up_queued is not None and all(w.queued >= self.scale_up_queued for w in self.workers):
+            return True
+        if self.scale_up_in_flight is not None and all(w.in_flight >= self.scale_up_in_flight for w in self.workers):
+            return True
+        return self.scale_up_loop_lag is not None and all(w.loop_lag >= self.scale_up_loop_lag for w in self.workers)
+
+    def _select_worker(self, key: typing.Hashable | None) -> "WorkerThread":
+        """送信先のワーカーを選ぶ。ロック内で呼び出すこと。"""
+        n = len(self.workers)
+        if key is not None:
+            return self.workers[hash(key) % n]
+        start = self.next % n
+        self.next = (start + 1) % n
+        if self.dispatch == "round_robin":
+            return self.workers[start]
+        # 同数の場合にラウンドロビン順となるよう、startから順に走査する
+        return min((self.workers[(start + i) % n] for i in range(n)), key=lambda w: w.in_flight)
 
     def map[T](self, coros: typing.Iterable[typing.Coroutine[typing.Any, typing.Any, T]]) -> list[concurrent.futures.Future[T]]:
         """複数のコルーチンをワーカーに送信する。
@@ -59,9 +173,81 @@ class ThreadPool:
         """
         return [self.submit(c) for c in coros]
 
+    def resize(self, num_workers: int) -> None:
+        """ワーカー数を変更する。
+
+        減らす場合は未完了のコルーチンが少ないワーカーから停止する。
+        停止するワーカーには新たなコルーチンを送信せず、実行中のコルーチンの完了を待ってから停止する。
+
+        Args:
+            num_workers: 新しいワーカー数。min_workers以上max_workers以下に丸められる
+        """
+        num_workers = min(max(num_workers, self.min_workers), self.max_workers)
+        with self.lock:
+            while len(self.workers) < num_workers:
+                self._add_worker()
+            while len(self.workers) > num_workers:
+                self._retire_worker(min(self.workers, key=lambda w: w.in_flight))
+
+    def _add_worker(self) -> None:
+        """ワーカーを追加する。ロック内で呼び出すこと。"""
+        worker = WorkerThread(
+            name=f"aloop-{self.num_created}",
+            loop_lag_threshold=self.loop_lag_threshold,
+            on_loop_lag=self.on_loop_lag,
+        )
+        self.num_created += 1
+        worker.start()
+        self.workers.append(worker)
+        # 停止済みのワーカーへの参照を解放する
+        self.retiring = [w for w in self.retiring if not w.stopped.is_set()]
+        if self.min_workers < self.max_workers:
+            assert worker.loop is not None
+            worker.loop.call_soon_threadsafe(self._schedule_idle_check, worker)
+        if len(self.workers) > self.min_workers:
+            logger.info(f"ワーカー追加: {worker.name} (workers={len(self.workers)})")
+
+    def _retire_worker(self, worker: "WorkerThread") -> None:
+        """ワーカーをディスパッチ対象から外して停止を要求する。ロック内で呼び出すこと。"""
+        self.workers.remove(worker)
+        self.retiring.append(worker)
+        worker.drain()
+        logger.info(f"ワーカー停止: {worker.name} (workers={len(self.workers)})")
+
+    def _schedule_idle_check(self, worker: "WorkerThread") -> None:
+        """アイドル判定を予約する。workerのイベントループ上で呼び出される。"""
+        assert worker.loop is not None
+        worker.loop.call_later(self.idle_timeout / 2, self._idle_check, worker)
+
+    def _idle_check(self, worker: "WorkerThread") -> None:
+        """アイドル状態が続いているワーカーを停止する。workerのイベントループ上で呼び出される。"""
+        with self.lock:
+            if worker not in self.workers:
+                return
+            if len(self.workers) > self.min_workers and worker.idle_time() >= self.idle_timeout:
+                self._retire_worker(worker)
+                return
+        self._schedule_idle_check(worker)
+
+    def stats(self) -> list[WorkerStats]:
+        """全ワーカーの統計情報を返す。
+
+        queuedやloop_lagが継続的に大きい場合はイベントループが飽和しているため、
+        max_workersの増加やブロッキング処理の除去を検討する。
+
+        Returns:
+            ワーカーごとの統計情報のリスト
+        """
+        with self.lock:
+            workers = list(self.workers)
+        return [w.stats() for w in workers]
+
     def shutdown(self) -> None:
         """全てのワーカースレッドを停止する。"""
-        for w in self.workers:
+        with self.lock:
+            workers = self.workers + self.retiring
+            self.retiring = []
+        for w in workers:
             w.stop()
 
     async def ashutdown(self) -> None:
@@ -78,7 +264,9 @@ class ThreadPool:
 
     def __del__(self) -> None:
         """デストラクタ。停止していないワーカーがいる場合は警告して停止シグナルを送る。"""
-        active_workers = [w for w in self.workers if w.thread is not None]
+        # __init__が例外で中断した場合はworkersが存在しない
+        workers = getattr(self, "workers", []) + getattr(self, "retiring", [])
+        active_workers = [w for w in workers if w.thread is not None and not w.stopped.is_set()]
         if active_workers:
             logger.warning(
                 "ThreadPool is being destroyed with %d active worker(s). Sending stop signal.",
@@ -87,22 +275,45 @@ class ThreadPool:
             # デストラクタ内では待機せず、停止シグナルのみ送出する
             for w in active_workers:
                 if w.loop is not None:
-                    w.loop.call_soon_threadsafe(w.loop.stop)  # 一時的に無効化
+                    with contextlib.suppress(RuntimeError):  # 停止処理と競合してループが閉じられた場合
+                        w.loop.call_soon_threadsafe(w.loop.stop)
 
 
 class WorkerThread:
     """専用のasyncioイベントループを実行するワーカースレッド。"""
 
-    def __init__(self, name: str) -> None:
+    def __init__(
+        self,
+        name: str,
+        loop_lag_threshold: float | None = None,
+        on_loop_lag: LoopLagHook | None = None,
+    ) -> None:
         """ワーカースレッドを初期化する。
 
         Args:
             name: スレッド名
+            loop_lag_threshold: ループ遅延の警告閾値（秒）。Noneの場合は警告しない
+            on_loop_lag: ループ遅延が閾値を超えた場合に呼ばれるフック。Noneの場合はWARNINGログを出力する
         """
         self.name = name
+        self.loop_lag_threshold = loop_lag_threshold
+        self.on_loop_lag = on_loop_lag
         self.thread: threading.Thread | None = None
         self.loop: asyncio.AbstractEventLoop | None = None
         self.stopped = threading.Event()
+        self.in_flight = 0
+        """送信済みで未完了のコルーチン数。"""
+        self.queued = 0
+        """送信済みでイベントループがまだ受け付けていないコルーチン数。"""
+        self.completed = 0
+        self.failed = 0
+        self.loop_lag = 0.0
+        self.max_loop_lag = 0.0
+        self.idle_since: float | None = time.perf_counter()
+        """未完了のコルーチンが無くなった時刻。未完了のコルーチンがある場合はNone。"""
+        self.draining = False
+        """Trueの場合、未完了のコルーチンが無くなった時点で停止する。"""
+        self.lock = threading.Lock()
 
     def start(self) -> None:
         """ワーカースレッドを起動する。"""
@@ -140,13 +351,142 @@ class WorkerThread:
         """
         if self.loop is None:
             raise RuntimeError("worker not started")
-        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self.lock:
+            self.in_flight += 1
+            self.queued += 1
+            self.idle_since = None
+        future: concurrent.futures.Future[T] = concurrent.futures.Future()
+        submitted_at = time.perf_counter()
+        try:
+            # run_coroutine_threadsafe()と同様だが、タスクの最初の実行より前に受け付け時刻を記録するため
+            # タスクの生成は自前のコールバックで行う
+            self.loop.call_soon_threadsafe(self._start, coro, future, submitted_at)
+        except BaseException:
+            coro.close()
+            with self.lock:
+                self.in_flight -= 1
+                self.queued -= 1
+                if self.in_flight == 0:
+                    self.idle_since = time.perf_counter()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _start[T](
+        self,
+        coro: typing.Coroutine[typing.Any, typing.Any, T],
+        future: concurrent.futures.Future[T],
+        submitted_at: float,
+    ) -> None:
+        """コルーチンのタスクを生成してfutureと連動させる。イベントループ上で呼び出される。"""
+        self._on_start(submitted_at)
+        if future.cancelled():
+            # イベントループが受け付ける前にキャンセルされた
+            coro.close()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            task = loop.create_task(coro)
+        except BaseException as e:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
+            raise
+        task.add_done_callback(functools.partial(_copy_task_state, future))
+        future.add_done_callback(functools.partial(_cancel_task, loop, task))
+
+    def _on_start(self, submitted_at: float) -> None:
+        """イベントループがコルーチンを受け付けた時の処理。
+
+        タスクの最初の実行より前に呼ばれるため、送信からイベントループが受け付けるまでの時間を
+        コルーチン自身の実行時間を含めずにループ遅延として計測できる。
+        """
+        lag = time.perf_counter() - submitted_at
+        with self.lock:
+            self.queued = max(self.queued - 1, 0)
+            self.loop_lag = lag
+            self.max_loop_lag = max(self.max_loop_lag, lag)
+        if self.loop_lag_threshold is not None and lag >= self.loop_lag_threshold:
+            if self.on_loop_lag is None:
+                logger.warning(f"イベントループ遅延: {self.name} {lag * 1000:.0f} ms")
+            else:
+                try:
+                    self.on_loop_lag(self.name, lag)
+                except Exception:
+                    logger.warning("ループ遅延フックエラー", exc_info=True)
+
+    def _on_done(self, future: concurrent.futures.Future) -> None:
+        """コルーチン完了時の処理。"""
+        succeeded = not future.cancelled() and future.exception() is None
+        with self.lock:
+            self.in_flight -= 1
+            if succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+            if self.in_flight == 0:
+                self.idle_since = time.perf_counter()
+                if self.draining:
+                    self._request_stop()
+
+    def idle_time(self) -> float:
+        """未完了のコルーチンが無くなってからの経過秒数を返す。未完了のコルーチンがある場合は0。"""
+        with self.lock:
+            return 0.0 if self.idle_since is None else time.perf_counter() - self.idle_since
+
+    def drain(self) -> None:
+        """未完了のコルーチンの完了を待ってから停止するよう要求する。待機はしない。"""
+        with self.lock:
+            self.draining = True
+            if self.in_flight == 0:
+                self._request_stop()
+
+    def _request_stop(self) -> None:
+        """イベントループの停止を要求する。"""
+        loop = self.loop
+        if loop is not None:
+            with contextlib.suppress(RuntimeError):  # 停止処理と競合してループが閉じられた場合
+                loop.call_soon_threadsafe(loop.stop)
+
+    def stats(self) -> WorkerStats:
+        """統計情報を返す。"""
+        with self.lock:
+            return WorkerStats(
+                name=self.name,
+                queued=self.queued,
+                in_flight=self.in_flight,
+                completed=self.completed,
+                failed=self.failed,
+                loop_lag=self.loop_lag,
+                max_loop_lag=self.max_loop_lag,
+            )
 
     def stop(self) -> None:
         """ワーカースレッドを停止する。"""
         if self.loop is None:
             return
-        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._request_stop()
         self.stopped.wait()
         self.loop = None
         self.thread = None
+        with self.lock:
+            # イベントループが受け付ける前に停止したコルーチンの分を戻す
+            self.queued = 0
+
+
+def _copy_task_state[T](future: concurrent.futures.Future[T], task: asyncio.Task[T]) -> None:
+    """完了したタスクの結果をfutureに設定する。"""
+    if task.cancelled():
+        future.cancel()
+    elif future.set_running_or_notify_cancel():
+        exception = task.exception()
+        if exception is None:
+            future.set_result(task.result())
+        else:
+            future.set_exception(exception)
+
+
+def _cancel_task(loop: asyncio.AbstractEventLoop, task: asyncio.Task, future: concurrent.futures.Future) -> None:
+    """futureがキャンセルされた場合にタスクもキャンセルする。"""
+    if future.cancelled():
+        with contextlib.suppress(RuntimeError):  # 停止処理と競合してループが閉じられた場合
+            loop.call_soon_threadsafe(task.cancel)
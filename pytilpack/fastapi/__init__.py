@@ -20,4 +20,5 @@ __all__ = [
     "init_app",
     # misc
     "JSONResponse",
+    "metrics_response",
 ]
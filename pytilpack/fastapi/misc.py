@@ -6,7 +6,9 @@ import typing
 import fastapi.encoders
 import starlette.responses
 
-__all__ = ["JSONResponse"]
+import pytilpack.metrics
+
+__all__ = ["JSONResponse", "metrics_response"]
 
 
 class JSONResponse(starlette.responses.Response):
@@ -33,3 +35,20 @@ class JSONResponse(starlette.responses.Response):
         """コンテンツをインデント付きJSONのバイト列に変換する。"""
         encoded = fastapi.encoders.jsonable_encoder(content)
         return json.dumps(encoded, ensure_ascii=False, indent=2, separators=(", ", ": ")).encode("utf-8")
+
+
+def metrics_response(registry: pytilpack.metrics.MetricsRegistry | None = None) -> starlette.responses.Response:
+    """メトリクスをPrometheusのテキスト形式で返すレスポンスを作成する。
+
+    Usage:
+        @app.get("/metrics")
+        def metrics():
+            return pytilpack.fastapi.metrics_response()
+
+    Args:
+        registry: 出力するレジストリ。Noneの場合は既定のレジストリ。
+
+    Returns:
+        レスポンス。
+    """
+    return starlette.responses.Response(pytilpack.metrics.generate_text(registry), media_type=pytilpack.metrics.CONTENT_TYPE)
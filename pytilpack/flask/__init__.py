@@ -26,6 +26,7 @@ __all__ = [
     "get_safe_url",
     "RouteInfo",
     "get_routes",
+    "metrics_response",
     "run",
     # proxy_fix
     "ProxyFix",
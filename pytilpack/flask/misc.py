@@ -12,6 +12,7 @@ import flask
 import httpx
 import werkzeug.serving
 
+import pytilpack.metrics
 import pytilpack.secrets
 import pytilpack.web
 
@@ -24,6 +25,7 @@ __all__ = [
     "get_safe_url",
     "RouteInfo",
     "get_routes",
+    "metrics_response",
     "run",
 ]
 
@@ -133,6 +135,24 @@ def get_routes(app: flask.Flask) -> list[RouteInfo]:
     return pytilpack.web.build_routes(app.url_map.iter_rules(), app.config.get("APPLICATION_ROOT"))
 
 
+def metrics_response(registry: pytilpack.metrics.MetricsRegistry | None = None) -> flask.Response:
+    """メトリクスをPrometheusのテキスト形式で返すレスポンスを作成する。
+
+    使用例::
+
+        @app.route("/metrics")
+        def metrics():
+            return pytilpack.flask.metrics_response()
+
+    Args:
+        registry: 出力するレジストリ。Noneの場合は既定のレジストリ。
+
+    Returns:
+        レスポンス。
+    """
+    return flask.Response(pytilpack.metrics.generate_text(registry), content_type=pytilpack.metrics.CONTENT_TYPE)
+
+
 @contextlib.contextmanager
 def run(app: flask.Flask, host: str = "localhost", port: int = 5000):
     """Flaskアプリを実行するコンテキストマネージャ。テストコードなど用。"""
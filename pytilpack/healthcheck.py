@@ -1,11 +1,17 @@
 """ヘルスチェック機能の実装用ヘルパー。"""
 
 import asyncio
+import atexit
+import concurrent.futures
+import contextlib
+import contextvars
 import datetime
 import functools
 import inspect
 import logging
+import threading
 import time
+import types
 import typing
 
 import pytilpack.logging
@@ -26,9 +32,12 @@ logger = logging.getLogger(__name__)
 
 
 class HealthCheckDetail(typing.TypedDict):
-    """ヘルスチェックの詳細を表す型。"""
+    """ヘルスチェックの詳細を表す型。
 
-    status: typing.Literal["ok", "fail"]
+    statusの"skipped"は、重要なヘルスチェックが失敗したため実行しなかったことを表す。
+    """
+
+    status: typing.Literal["ok", "fail", "skipped"]
     response_time_ms: float
     error: typing.NotRequired[str]
 
@@ -56,7 +65,8 @@ def make_entry[**P, R](
 ) -> CheckerEntry:
     """CheckerEntryを作成する。
 
-    同期関数は自動的にasyncio.to_thread()で非同期化される。
+    同期関数は自動的に専用のスレッドプール（sync_check_executor）で実行するよう非同期化される。
+    （リクエスト処理などと共有する既定のスレッドプールを占有しないようにするため）
 
     Args:
         name: ヘルスチェックの名前。
@@ -87,17 +97,223 @@ def make_entry[**P, R](
 
     @functools.wraps(func)
     async def sync_wrapper() -> None:
-        await asyncio.to_thread(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        await loop.run_in_executor(sync_check_executor.get(), functools.partial(ctx.run, func, *args, **kwargs))
 
     return (name, sync_wrapper)
 
 
+class SyncCheckExecutor:
+    """同期関数のヘルスチェックを実行する専用スレッドプール。
+
+    スレッドプールは最初の実行時に作成する。
+    set_max_workers()やshutdown()の後は、次の実行時に作り直す。
+
+    通常はモジュール変数sync_check_executorを使用する。
+
+    Args:
+        max_workers: スレッド数。
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> concurrent.futures.ThreadPoolExecutor:
+        """スレッドプールを取得する。未作成の場合は作成する。"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="healthcheck"
+                )
+            return self._executor
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """スレッド数を変更する。
+
+        作成済みのスレッドプールは実行中のヘルスチェックの完了後に停止し、次の実行時に新しいスレッド数で作り直す。
+
+        Args:
+            max_workers: スレッド数。
+        """
+        with self._lock:
+            self.max_workers = max_workers
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """スレッドプールを停止する。
+
+        Args:
+            wait: 実行中のヘルスチェックの完了を待つかどうか。
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+sync_check_executor = SyncCheckExecutor()
+"""同期関数のヘルスチェックを実行する専用スレッドプール。プロセス終了時に停止する。"""
+
+atexit.register(sync_check_executor.shutdown)
+
+
+class CachedChecker:
+    """結果をキャッシュするヘルスチェック関数のラッパー。
+
+    複数のプローブから高頻度に呼ばれても、依存先へのアクセスが ttl 秒に1回程度になるようにする。
+    キャッシュが切れた時に同時に呼ばれた場合も、実行は1回にまとめる。
+    refresh_interval を指定した場合は、初回の呼び出し以降はバックグラウンドで定期的に実行し、
+    呼び出し時は直近の結果を待たずに返す。
+
+    通常はcached_entry()を使用して作成する。
+
+    Args:
+        checker: ヘルスチェック関数。
+        ttl: 成功した結果をキャッシュする時間（秒）。
+        failure_ttl: 失敗した結果をキャッシュする時間（秒）。Noneの場合は ttl と同じ。
+        timeout: 1回の実行のタイムアウト（秒）。Noneの場合は無制限。
+        refresh_interval: バックグラウンドで実行する間隔（秒）。Noneの場合はバックグラウンドでは実行しない。
+    """
+
+    def __init__(
+        self,
+        checker: CheckerType,
+        ttl: float = 5.0,
+        failure_ttl: float | None = None,
+        timeout: float | None = None,
+        refresh_interval: float | None = None,
+    ) -> None:
+        self.checker = checker
+        self.ttl = ttl
+        self.failure_ttl = ttl if failure_ttl is None else failure_ttl
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.expires_at: float | None = None
+        """キャッシュの有効期限（time.monotonic()）。未実行の場合はNone。"""
+        self.error: Exception | None = None
+        """直近の実行で発生した例外。成功した場合はNone。"""
+        self._traceback: types.TracebackType | None = None
+        self._inflight: asyncio.Future[None] | None = None
+        self._refresher: asyncio.Task[None] | None = None
+        functools.update_wrapper(self, checker)
+
+    async def __call__(self) -> None:
+        """ヘルスチェックを実行する。キャッシュが有効な場合はキャッシュした結果を返す。"""
+        if self.refresh_interval is not None and self.expires_at is not None:
+            self._ensure_refresher()
+        elif self.expires_at is None or time.monotonic() >= self.expires_at:
+            await self.refresh()
+            if self.refresh_interval is not None:
+                self._ensure_refresher()
+        if self.error is not None:
+            raise self.error.with_traceback(self._traceback)
+
+    async def refresh(self) -> None:
+        """ヘルスチェックを実行してキャッシュを更新する。実行中の場合はその完了を待つ。"""
+        loop = asyncio.get_running_loop()
+        if self._inflight is None or self._inflight.get_loop() is not loop:
+            self._inflight = loop.create_task(self._run())
+        # 呼び出し元がキャンセルされても実行は継続し、他の待機者へ結果を返す
+        await asyncio.shield(self._inflight)
+
+    async def _run(self) -> None:
+        """ヘルスチェックを1回実行して結果を記録する。"""
+        try:
+            await _call_with_timeout(self.checker, self.timeout)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.error = e
+            self._traceback = e.__traceback__
+            self.expires_at = time.monotonic() + self.failure_ttl
+        else:
+            self.error = None
+            self._traceback = None
+            self.expires_at = time.monotonic() + self.ttl
+        finally:
+            self._inflight = None
+
+    def _ensure_refresher(self) -> None:
+        """バックグラウンドでの定期実行を開始する。既に実行中の場合は何もしない。"""
+        loop = asyncio.get_running_loop()
+        if self._refresher is not None and not self._refresher.done() and self._refresher.get_loop() is loop:
+            return
+        self._refresher = loop.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        """refresh_interval ごとにヘルスチェックを実行する。"""
+        assert self.refresh_interval is not None
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def aclose(self) -> None:
+        """バックグラウンドでの定期実行を停止する。"""
+        if self._refresher is None:
+            return
+        self._refresher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._refresher
+        self._refresher = None
+
+
+async def _call_with_timeout(checker: CheckerType, timeout: float | None) -> None:
+    """タイムアウト付きでヘルスチェック関数を実行する。"""
+    cm = asyncio.timeout(timeout)
+    try:
+        async with cm:
+            await checker()
+    except TimeoutError as e:
+        if cm.expired():
+            raise TimeoutError(f"{timeout}秒以内に完了しませんでした") from e
+        raise
+
+
+def cached_entry(
+    entry: CheckerEntry,
+    ttl: float = 5.0,
+    failure_ttl: float | None = None,
+    timeout: float | None = None,
+    refresh_interval: float | None = None,
+) -> CheckerEntry:
+    """結果をキャッシュするCheckerEntryを作成する。
+
+    Args:
+        entry: make_entry()で作成したCheckerEntry。
+        ttl: 成功した結果をキャッシュする時間（秒）。
+        failure_ttl: 失敗した結果をキャッシュする時間（秒）。Noneの場合は ttl と同じ。
+        timeout: 1回の実行のタイムアウト（秒）。Noneの場合は無制限。
+        refresh_interval: バックグラウンドで実行する間隔（秒）。指定した場合、呼び出し時は直近の結果を即座に返す。
+
+    Returns:
+        ヘルスチェックの名前と、CachedCheckerでラップした関数を持つタプル。
+
+    Examples:
+        DBへの問い合わせを10秒に1回までにする例::
+
+            entries = [
+                pytilpack.healthcheck.cached_entry(
+                    pytilpack.healthcheck.make_entry("database", check_db), ttl=10, timeout=3
+                ),
+            ]
+
+    """
+    name, checker = entry
+    return (name, CachedChecker(checker, ttl, failure_ttl, timeout, refresh_interval))
+
+
 async def run(
     checks: CheckerEntries,
     output_details: bool = True,
     dedup_window: datetime.timedelta | None = None,
     now: datetime.datetime | None = None,
     start_time: datetime.datetime | None = None,
+    timeout: float | None = None,
+    max_concurrency: int | None = None,
+    critical: typing.Collection[str] | None = None,
 ) -> HealthCheckResult:
     """ヘルスチェックを実行し、結果を返す。
 
@@ -107,6 +323,12 @@ async def run(
         dedup_window: ログの重複を防ぐための時間ウィンドウ。デフォルトは1日。
         now: 現在の日時。デフォルトは現在の日時を使用。
         start_time: 起動時刻。デフォルトはモジュール変数startup_timeを使用。
+        timeout: 各ヘルスチェックのタイムアウト（秒）。超えた場合は失敗とする。Noneの場合は無制限。
+        max_concurrency: 同時に実行するヘルスチェックの最大数。Noneの場合は無制限。
+        critical: 重要なヘルスチェックの名前。指定した場合、重要なヘルスチェックを先に実行し、
+            いずれかが失敗した場合は残りを実行せずに"skipped"とする。
+            重要でないヘルスチェックの失敗は詳細にのみ記録し、全体のstatusには影響しない。
+            Noneの場合は全てを重要なヘルスチェックとして同時に実行する。
 
     Returns:
         ヘルスチェックの結果。
@@ -120,13 +342,22 @@ async def run(
     # 名前が重複している場合は AssertionError を送出する
     check_names = [name for name, _ in checks]
     assert len(checks) == len(set(check_names)), f"ヘルスチェック名が重複しています: {check_names}"
-
-    details: dict[str, HealthCheckDetail] = {}
+    critical_names = set(check_names) if critical is None else set(critical)
+    assert critical_names <= set(check_names), f"存在しないヘルスチェック名が指定されています: {critical_names}"
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency is not None else None
 
     async def run_check(name: str, func: typing.Callable[[], typing.Awaitable[None]]) -> tuple[str, HealthCheckDetail]:
+        if semaphore is None:
+            return await run_check_unlimited(name, func)
+        async with semaphore:
+            return await run_check_unlimited(name, func)
+
+    async def run_check_unlimited(
+        name: str, func: typing.Callable[[], typing.Awaitable[None]]
+    ) -> tuple[str, HealthCheckDetail]:
         start = time.perf_counter()
         try:
-            await func()
+            await _call_with_timeout(func, timeout)
             elapsed = (time.perf_counter() - start) * 1000
             return name, {"status": "ok", "response_time_ms": int(elapsed)}
         except Exception as e:
@@ -144,14 +375,25 @@ async def run(
                 error=f"{e.__class__.__name__}: {e}",
             )
 
-    tasks = [run_check(name, func) for name, func in checks]
-    done = await asyncio.gather(*tasks)
-
-    for name, result in done:
-        details[name] = result
+    # 重要なヘルスチェック → それ以外 の順に段階的に実行する
+    stages = [
+        [(name, func) for name, func in checks if name in critical_names],
+        [(name, func) for name, func in checks if name not in critical_names],
+    ]
+    results: dict[str, HealthCheckDetail] = {}
+    for stage in stages:
+        if any(detail["status"] != "ok" for name, detail in results.items() if name in critical_names):
+            for name, _ in stage:
+                results[name] = {"status": "skipped", "response_time_ms": 0}
+            continue
+        done = await asyncio.gather(*(run_check(name, func) for name, func in stage))
+        results.update(done)
+    details = {name: results[name] for name in check_names}
 
     uptime = now - start_time
-    overall_status: typing.Literal["ok", "fail"] = "ok" if all(v["status"] == "ok" for v in details.values()) else "fail"
+    overall_status: typing.Literal["ok", "fail"] = (
+        "ok" if all(details[name]["status"] == "ok" for name in critical_names) else "fail"
+    )
 
     result = HealthCheckResult(status=overall_status, checked=str(now), uptime=str(uptime))
     if output_details:
@@ -2,15 +2,24 @@
 
 # pylint: disable=redefined-builtin
 
+import collections
 import contextlib
 import contextvars
+import dataclasses
 import datetime
+import functools
 import hashlib
 import io
+import itertools
 import json
 import logging
 import logging.handlers
+import math
+import operator
 import pathlib
+import queue
+import random
+import threading
 import time
 import typing
 import uuid
@@ -19,6 +28,12 @@ import pytilpack.python
 
 _logger = logging.getLogger(__name__)
 
+JsonEncoder = typing.Literal["json", "orjson"]
+"""jsonifyで使用するJSONエンコーダー。"""
+
+QueueOverflowPolicy = typing.Literal["drop_new", "drop_oldest", "block"]
+"""queue_handlerのキューが満杯の場合の対応方針。"""
+
 
 def _json_default(o: typing.Any) -> typing.Any:
     """JSONエンコードできないオブジェクトの変換処理。
@@ -40,8 +55,116 @@ def _json_default(o: typing.Any) -> typing.Any:
     return str(o)
 
 
-_exception_history: dict[str, tuple[datetime.datetime, int]] = {}
-"""例外フィンガープリント → (最終発生時刻, 最終WARNING以降の発生回数)。"""
+class ExceptionHistory:
+    """exception_with_dedup()の重複排除の履歴。
+
+    件数の上限を超えた場合は最も長く発生していないものから捨て（LRU）、
+    最終発生から max_age 以上経過したものも捨てる。複数スレッドから同時に使用できる。
+
+    既定では全ロガーで1つの履歴を共有する。ロガーごとに分けたい場合は
+    インスタンスを作成してexception_with_dedup()の history に渡す。
+
+    Args:
+        max_entries: 保持する最大件数
+        max_age: 最終発生からこの時間が経過した履歴を捨てる。Noneの場合は時間では捨てない
+    """
+
+    def __init__(self, max_entries: int = 10000, max_age: datetime.timedelta | None = datetime.timedelta(days=7)) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries: collections.OrderedDict[str, tuple[datetime.datetime, int]] = collections.OrderedDict()
+        """例外フィンガープリント → (最終発生時刻, 最終WARNING以降の発生回数)。最終発生時刻の古い順。"""
+        self.suppressed: dict[str, tuple[str, int]] = {}
+        """例外フィンガープリント → (ログメッセージ, 前回のtake_suppressed_counts()以降にINFOへ抑制した回数)。
+
+        entriesから捨てた履歴の分は一緒に捨てるため、件数はmax_entries以下となる。
+        """
+
+    def __len__(self) -> int:
+        """保持している件数を返す。"""
+        return len(self.entries)
+
+    def check(
+        self,
+        fingerprint: str,
+        now: datetime.datetime,
+        dedup_window: datetime.timedelta | None,
+        dedup_count: int | None,
+        msg: str = "",
+    ) -> bool:
+        """発生を記録し、WARNINGで出力すべきか否かを返す。
+
+        Args:
+            fingerprint: 例外フィンガープリント
+            now: 現在時刻
+            dedup_window: 同一エラーとみなす時間幅
+            dedup_count: 同一エラーとみなす回数
+            msg: 抑制回数の集計に使うログメッセージ
+
+        Returns:
+            WARNINGで出力すべき場合True
+        """
+        with self.lock:
+            last = self.entries.get(fingerprint)
+            if last is None:
+                should_warn = True
+            else:
+                last_seen, count = last
+                time_expired = dedup_window is not None and (now - last_seen) >= dedup_window
+                count_expired = dedup_count is not None and count + 1 >= dedup_count
+                should_warn = time_expired or count_expired
+            if should_warn:
+                self.entries[fingerprint] = (now, 0)
+            else:
+                assert last is not None
+                self.entries[fingerprint] = (now, last[1] + 1)
+                _, suppressed_count = self.suppressed.get(fingerprint, (msg, 0))
+                self.suppressed[fingerprint] = (msg, suppressed_count + 1)
+            self.entries.move_to_end(fingerprint)
+            self._prune(now)
+            return should_warn
+
+    def _prune(self, now: datetime.datetime) -> None:
+        """上限を超えた履歴と期限切れの履歴を捨てる。ロックを取得した状態で呼び出す。"""
+        while len(self.entries) > self.max_entries:
+            fingerprint, _ = self.entries.popitem(last=False)
+            self.suppressed.pop(fingerprint, None)
+        if self.max_age is not None:
+            while self.entries:
+                last_seen, _ = next(iter(self.entries.values()))
+                if now - last_seen < self.max_age:
+                    break
+                fingerprint, _ = self.entries.popitem(last=False)
+                self.suppressed.pop(fingerprint, None)
+
+    def take_suppressed_counts(self) -> dict[str, int]:
+        """前回の呼び出し以降にINFOへ抑制した回数をログメッセージごとに返し、集計をリセットする。
+
+        集計前に履歴から捨てられたエラーの分は含まない。
+
+        Returns:
+            ログメッセージ → 抑制した回数
+        """
+        with self.lock:
+            suppressed = list(self.suppressed.values())
+            self.suppressed.clear()
+        counts: collections.Counter[str] = collections.Counter()
+        for msg, count in suppressed:
+            counts[msg] += count
+        return dict(counts)
+
+    def clear(self) -> None:
+        """履歴をクリアする。"""
+        with self.lock:
+            self.entries.clear()
+            self.suppressed.clear()
+
+
+_exception_history = ExceptionHistory()
+"""exception_with_dedup()の既定の履歴。"""
 
 
 def clear_exception_history() -> None:
@@ -49,6 +172,155 @@ def clear_exception_history() -> None:
     _exception_history.clear()
 
 
+def log_suppressed_exceptions(logger: logging.Logger, history: ExceptionHistory | None = None) -> int:
+    """exception_with_dedup()が前回の呼び出し以降にINFOへ抑制した回数をまとめてログ出力する。
+
+    定期的に呼び出すことで、抑制されたエラーの発生状況を要約として残せる。
+
+    Args:
+        logger: 出力先ロガー
+        history: 集計対象の履歴。Noneの場合は既定の履歴
+
+    Returns:
+        抑制した回数の合計
+    """
+    if history is None:
+        history = _exception_history
+    counts = history.take_suppressed_counts()
+    for msg, count in sorted(counts.items(), key=lambda item: -item[1]):
+        logger.warning(f"{msg} (前回の集計以降に{count}回抑制)")
+    return sum(counts.values())
+
+
+class RateLimitFilter(logging.Filter):
+    """ロガー名とメッセージテンプレートの組ごとに、期間あたりのログ件数を制限するフィルタ。
+
+    リトライやセッション開始などの同じログが大量に出力される場合に、
+    期間（ interval 秒）ごとに先頭の max_records 件だけを通し、残りを抑制する。
+    抑制が発生した期間の終了時に、抑制した件数を別スレッドから summary_logger へまとめて出力する。
+    （loggingはフィルタやハンドラの処理中に出力されたログを捨てるため、フィルタ内では出力しない）
+
+    期間はすべての組で共通の固定ウィンドウとし、1レコードあたりの処理は
+    時刻の取得と辞書の更新のみとしている。ルートロガーのハンドラにも取り付けられる。
+
+    使用例::
+
+        ```python
+        handler = pytilpack.logging.stream_handler()
+        handler.addFilter(pytilpack.logging.RateLimitFilter(max_records=10, interval=60))
+        logging.getLogger().addHandler(handler)
+        ```
+
+    Args:
+        max_records: 期間あたりに通す件数。
+        interval: 期間（秒）。
+        sample_every: 上限を超えた後もN件に1件は通す場合のN。Noneの場合は上限を超えたら全て抑制する。
+        level: このレベル以上のログは制限しない。
+        max_keys: 1期間に集計する組の最大数。超えた場合、新しい組のログは制限せずに通す。
+        summary_logger: 抑制件数の出力先ロガー。Noneの場合はこのモジュールのロガー。
+    """
+
+    _SUMMARY_MSG = "[%s] %s (前回の集計以降に%d件抑制)"
+    """抑制件数のログメッセージ。このメッセージ自体は制限しない。"""
+
+    def __init__(
+        self,
+        max_records: int = 10,
+        interval: float = 60.0,
+        sample_every: int | None = None,
+        level: int = logging.WARNING,
+        max_keys: int = 10000,
+        summary_logger: logging.Logger | None = None,
+    ) -> None:
+        super().__init__()
+        if max_records < 0:
+            raise ValueError("max_records must be >= 0")
+        if interval <= 0:
+            raise ValueError("interval must be > 0")
+        if sample_every is not None and sample_every < 1:
+            raise ValueError("sample_every must be >= 1")
+        self.max_records = max_records
+        self.interval = interval
+        self.sample_every = sample_every
+        self.level = level
+        self.max_keys = max_keys
+        self.summary_logger = _logger if summary_logger is None else summary_logger
+        self.lock = threading.Lock()
+        self.counts: dict[tuple[str, str], int] = {}
+        """(ロガー名, メッセージテンプレート) → 現在の期間の件数。"""
+        self.suppressed: collections.Counter[tuple[str, str]] = collections.Counter()
+        """(ロガー名, メッセージテンプレート) → 終了した期間で抑制した件数のうち未出力のもの。"""
+        self.window_end = time.monotonic() + interval
+        self.timer: threading.Timer | None = None
+        """抑制件数を出力するタイマー。"""
+
+    @typing.override
+    def filter(self, record: logging.LogRecord) -> bool:
+        msg = record.msg
+        if record.levelno >= self.level or type(msg) is not str or msg is self._SUMMARY_MSG:  # pylint: disable=unidiomatic-typecheck
+            return True
+        now = time.monotonic()
+        key = (record.name, msg)
+        with self.lock:
+            if now >= self.window_end:
+                self._rotate(now)
+            count = self.counts.get(key)
+            if count is None:
+                if len(self.counts) >= self.max_keys:
+                    return True
+                count = 0
+            count += 1
+            self.counts[key] = count
+            if count <= self.max_records:
+                return True
+            if self.timer is None:
+                self.timer = threading.Timer(self.window_end - now, self._on_timer)
+                self.timer.daemon = True
+                self.timer.start()
+        return self.sample_every is not None and (count - self.max_records) % self.sample_every == 0
+
+    def _rotate(self, now: float) -> None:
+        """現在の期間の抑制件数をsuppressedへ移し、新しい期間を始める。ロックを取得した状態で呼び出す。"""
+        for key, count in self.counts.items():
+            if count > self.max_records:
+                self.suppressed[key] += count - self.max_records
+        self.counts = {}
+        self.window_end = now + self.interval
+
+    def _on_timer(self) -> None:
+        """タイマーから呼び出され、抑制件数を出力する。"""
+        with self.lock:
+            self.timer = None
+        self.log_suppressed()
+
+    def take_suppressed_counts(self) -> dict[tuple[str, str], int]:
+        """前回の呼び出し以降に抑制した件数を組ごとに返し、集計をリセットする。
+
+        現在の期間は終了し、新しい期間を始める。
+
+        Returns:
+            (ロガー名, メッセージテンプレート) → 抑制した件数（サンプリングで通した分を含む）
+        """
+        with self.lock:
+            self._rotate(time.monotonic())
+            counts = dict(self.suppressed)
+            self.suppressed.clear()
+        return counts
+
+    def log_suppressed(self) -> int:
+        """前回の呼び出し以降に抑制した件数をまとめてログ出力する。
+
+        抑制が発生した期間の終了時に自動的に呼び出される。
+
+        Returns:
+            抑制した件数の合計
+        """
+        counts = self.take_suppressed_counts()
+        for (name, msg), count in sorted(counts.items(), key=lambda item: -item[1]):
+            self.summary_logger.info(self._SUMMARY_MSG, name, msg, count)
+        return sum(counts.values())
+
+
 def stream_handler(
     stream: io.TextIOBase | None = None,
     level: int | None = logging.INFO,
@@ -93,9 +365,259 @@ def file_handler(
     return handler
 
 
+def queue_handler(
+    *handlers: logging.Handler,
+    max_queue_size: int = 10000,
+    overflow: QueueOverflowPolicy = "drop_new",
+    level: int | None = None,
+) -> "NonBlockingQueueHandler":
+    """ハンドラの出力を別スレッドで行うハンドラを作成する。
+
+    stream_handler()やfile_handler()の出力はログを出したスレッドで行われるため、
+    イベントループのスレッドでは遅いディスクが全リクエストを止めてしまう。
+    このハンドラはレコードを上限付きキューへ積むだけで戻り、出力はリスナースレッドで行う。
+
+    使用例::
+
+        ```python
+        logger.addHandler(pytilpack.logging.queue_handler(pytilpack.logging.file_handler("app.log")))
+        ```
+
+    Args:
+        handlers: 実際に出力を行うハンドラ。レベルはそれぞれのハンドラの設定に従う
+        max_queue_size: キューの最大件数
+        overflow: キューが満杯の場合の対応方針。
+            "drop_new"は新しいレコードを捨て、"drop_oldest"は最も古いレコードを捨て、"block"は空くまで待つ
+        level: このハンドラのログレベル。Noneの場合はhandlersのうち最も低いレベル
+
+    Returns:
+        ハンドラ。close()でキューに残ったレコードを出力してからリスナースレッドを停止する。
+        logging.shutdown()（終了時に自動で呼ばれる）でもclose()される。
+    """
+    handler = NonBlockingQueueHandler(handlers, max_queue_size=max_queue_size, overflow=overflow)
+    if level is None:
+        level = min((h.level for h in handlers), default=logging.NOTSET)
+    handler.setLevel(level)
+    return handler
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """上限付きキューを介して別スレッドでログを出力するハンドラ。queue_handler()で作成する。
+
+    Args:
+        handlers: 実際に出力を行うハンドラ
+        max_queue_size: キューの最大件数
+        overflow: キューが満杯の場合の対応方針
+    """
+
+    def __init__(
+        self,
+        handlers: typing.Sequence[logging.Handler],
+        max_queue_size: int = 10000,
+        overflow: QueueOverflowPolicy = "drop_new",
+    ) -> None:
+        if overflow not in typing.get_args(QueueOverflowPolicy):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        super().__init__(queue.Queue(max_queue_size))
+        self.overflow = overflow
+        self.handlers = list(handlers)
+        self.dropped = 0
+        """キューが満杯のため捨てたレコード数。"""
+        self.listener: _QueueListener | None = _QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    @typing.override
+    def enqueue(self, record: logging.LogRecord) -> None:
+        assert isinstance(self.queue, queue.Queue)
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                self.dropped += 1
+                if self.overflow == "drop_new":
+                    return
+            # drop_oldest: 先頭を捨ててから積み直す
+            with contextlib.suppress(queue.Empty):
+                self.queue.get_nowait()
+                self.queue.task_done()
+
+    def flush(self) -> None:
+        """キューに積まれたレコードを全て出力し終えるまで待つ。"""
+        assert isinstance(self.queue, queue.Queue)
+        if self.listener is not None:
+            self.queue.join()
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        """キューに残ったレコードを出力してからリスナースレッドを停止し、handlersを閉じる。"""
+        self.acquire()
+        try:
+            listener, self.listener = self.listener, None
+        finally:
+            self.release()
+        if listener is not None:
+            listener.stop()
+            # ロガー経由だと終了処理中の自分自身へ戻りうるため、lastResort（標準エラー出力）へ直接出す
+            if self.dropped > 0 and logging.lastResort is not None:
+                logging.lastResort.handle(
+                    logging.makeLogRecord(
+                        {
+                            "levelno": logging.WARNING,
+                            "levelname": "WARNING",
+                            "msg": f"ログキュー溢れのため破棄: {self.dropped}件",
+                        }
+                    )
+                )
+            for handler in self.handlers:
+                handler.close()
+        super().close()
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """キューが満杯でも停止指示を確実に積めるQueueListener。"""
+
+    @typing.override
+    def enqueue_sentinel(self) -> None:
+        assert isinstance(self.queue, queue.Queue)
+        # QueueListenerの停止指示（_sentinel）はNone。満杯でも空くまで待って積む
+        self.queue.put(None)
+
+
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("request_id", default=None)
+"""JsonFormatterがログへ付与するリクエストID。リクエストの開始時にアプリケーション側で設定する。"""
+
+_LOG_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+"""LogRecordの標準の属性名。これ以外の属性はextraで渡された値とみなす。"""
+
+
+class JsonFormatter(logging.Formatter):
+    """LogRecordを1行のJSON (JSON Lines) へ変換するフォーマッター。
+
+    ログ収集基盤が正規表現で解析せずに取り込めるよう、LogRecordの各フィールドと
+    コンテキスト情報（asyncioのタスクID、リクエストID、DBセッション名など）を1つのJSONにまとめる。
+    出力するフィールドの取得方法は生成時に決めておき、レコードごとの処理を最小限にする。
+
+    使用例::
+
+        ```python
+        handler = pytilpack.logging.stream_handler(format=None)
+        handler.setFormatter(pytilpack.logging.JsonFormatter(context={"db_session": Base.session_name}))
+        ```
+
+    Args:
+        fields: 出力するフィールド。キーは出力名、値はLogRecordの属性名。
+            "created"は日時文字列、"message"は引数を埋め込んだメッセージに変換する。
+        context: 追加で出力するコンテキスト情報。キーは出力名、値はContextVarまたは引数なしの関数。
+            値がNoneの場合は出力しない。
+        include_task_id: asyncioのタスクIDを"task_id"として出力するか否か。
+        include_request_id: request_id_varの値を"request_id"として出力するか否か。
+        include_extra: `logger.info(..., extra={...})`で渡された値を出力するか否か。
+        encoder: 使用するJSONエンコーダー。
+    """
+
+    DEFAULT_FIELDS: typing.ClassVar[dict[str, str]] = {
+        "time": "created",
+        "level": "levelname",
+        "logger": "name",
+        "message": "message",
+    }
+
+    def __init__(
+        self,
+        fields: dict[str, str] | None = None,
+        context: dict[str, contextvars.ContextVar[typing.Any] | typing.Callable[[], typing.Any]] | None = None,
+        include_task_id: bool = True,
+        include_request_id: bool = True,
+        include_extra: bool = True,
+        encoder: JsonEncoder = "json",
+    ) -> None:
+        super().__init__()
+        if fields is None:
+            fields = self.DEFAULT_FIELDS
+        self.field_plan: list[tuple[str, typing.Callable[[logging.LogRecord], typing.Any]]] = [
+            (key, self._make_getter(attr)) for key, attr in fields.items()
+        ]
+        """(出力名, LogRecordから値を取得する関数)のリスト。"""
+        context_plan: list[tuple[str, typing.Callable[[], typing.Any]]] = []
+        if include_task_id:
+            from pytilpack.asyncio import get_task_id  # pylint: disable=import-outside-toplevel
+
+            context_plan.append(("task_id", functools.partial(_get_task_id_hex, get_task_id)))
+        if include_request_id:
+            context_plan.append(("request_id", request_id_var.get))
+        for key, source in (context or {}).items():
+            context_plan.append((key, source.get if isinstance(source, contextvars.ContextVar) else source))
+        self.context_plan = context_plan
+        """(出力名, 値を取得する関数)のリスト。"""
+        self.include_extra = include_extra
+        if encoder == "orjson":
+            import orjson  # pylint: disable=import-outside-toplevel
+
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            self.dumps: typing.Callable[[typing.Any], str] = lambda data: orjson.dumps(
+                data, default=_json_default, option=option
+            ).decode("utf-8")
+        else:
+            self.dumps = functools.partial(json.dumps, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+    def _make_getter(self, attr: str) -> typing.Callable[[logging.LogRecord], typing.Any]:
+        """LogRecordから値を取得する関数を作成する。"""
+        if attr == "message":
+            return logging.LogRecord.getMessage
+        if attr == "created":
+            return self._format_created
+        return operator.attrgetter(attr)
+
+    def _format_created(self, record: logging.LogRecord) -> str:
+        """ログの日時を文字列に変換する。datefmt指定時はformatTime()に従う。"""
+        if self.datefmt is not None:
+            return self.formatTime(record, self.datefmt)
+        return datetime.datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds")
+
+    @typing.override
+    def format(self, record: logging.LogRecord) -> str:
+        data = {key: getter(record) for key, getter in self.field_plan}
+        for key, get in self.context_plan:
+            value = get()
+            if value is not None:
+                data[key] = value
+        if self.include_extra:
+            for key, value in record.__dict__.items():
+                if key not in _LOG_RECORD_ATTRS and key not in data:
+                    data[key] = value
+        if record.exc_info and not record.exc_text:
+            # logging.Formatter.format()と同様にexc_textへキャッシュする
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+        if record.stack_info:
+            data["stack_info"] = self.formatStack(record.stack_info)
+        return self.dumps(data)
+
+
+def _get_task_id_hex(get_task_id: typing.Callable[[], int | None]) -> str | None:
+    """現在のタスクIDを16進数文字列で返す。タスク外ではNoneを返す。"""
+    task_id = get_task_id()
+    return None if task_id is None else f"{task_id:x}"
+
+
 @contextlib.contextmanager
-def timer(name: str, logger: logging.Logger | None = None):
-    """処理時間を計測してログ出力するコンテキストマネージャー。"""
+def timer(
+    name: str, logger: logging.Logger | None = None, registry: "TimerRegistry | None" = None, log: bool = True
+) -> typing.Generator[None, None, None]:
+    """処理時間を計測してログ出力するコンテキストマネージャー。
+
+    Args:
+        name: 計測対象の名前。
+        logger: 出力先ロガー。Noneの場合はこのモジュールのロガー。
+        registry: 指定した場合、処理時間を名前ごとに集計する。
+        log: 1回ごとにログ出力するか否か。集計のみ行う場合はFalseにする。
+    """
     start_time = time.perf_counter()
     has_error = False
     try:
@@ -105,12 +627,224 @@ def timer(name: str, logger: logging.Logger | None = None):
         raise
     finally:
         elapsed = time.perf_counter() - start_time
+        if registry is not None:
+            registry.record(name, elapsed)
+        if log:
+            if logger is None:
+                logger = _logger
+            if has_error:
+                logger.warning(f"[{name}] failed in {elapsed:.0f} s")
+            else:
+                logger.info(f"[{name}] done in {elapsed:.0f} s")
+
+
+@dataclasses.dataclass(frozen=True)
+class TimerStats:
+    """TimerRegistryの名前ごとの集計結果。時間の単位は秒。"""
+
+    name: str
+    count: int
+    total: float
+    min: float
+    max: float
+    p50: float
+    p90: float
+    p99: float
+
+    @property
+    def mean(self) -> float:
+        """平均時間。"""
+        return self.total / self.count if self.count > 0 else 0.0
+
+    @typing.override
+    def __str__(self) -> str:
+        """ログ出力用の文字列を返す。"""
+        return (
+            f"[{self.name}] count={self.count} total={self.total:.3f}s mean={self.mean * 1000:.3f}ms"
+            f" min={self.min * 1000:.3f}ms p50={self.p50 * 1000:.3f}ms p90={self.p90 * 1000:.3f}ms"
+            f" p99={self.p99 * 1000:.3f}ms max={self.max * 1000:.3f}ms"
+        )
+
+
+class _TimerAggregate:
+    """TimerRegistryの名前ごとの集計途中の値。"""
+
+    __slots__ = ("count", "total", "min", "max", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.samples: list[float] = []
+        """パーセンタイル算出用のサンプル（リザーバーサンプリング）。"""
+
+
+class TimerRegistry:
+    """名前ごとに処理時間を集計するレジストリ。
+
+    1回ごとにログ出力する代わりに、件数・合計・最小・最大・パーセンタイルを集計し、
+    snapshot()で取得したり、定期的にまとめてログ出力したりする。
+    パーセンタイルは名前ごとに最大 max_samples 件をリザーバーサンプリングで保持して算出する。
+    複数スレッドから同時に使用できる。
+
+    使用例::
+
+        ```python
+        registry = pytilpack.logging.TimerRegistry()
+        registry.start_emitter(interval=60)
+
+        with registry.timer("db.query"):
+            ...
+        ```
+
+    Args:
+        max_samples: パーセンタイル算出用に名前ごとに保持するサンプル数。
+    """
+
+    def __init__(self, max_samples: int = 1024) -> None:
+        if max_samples < 1:
+            raise ValueError("max_samples must be >= 1")
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.aggregates: dict[str, _TimerAggregate] = {}
+        self._emitter: threading.Thread | None = None
+        self._emitter_stop = threading.Event()
+
+    @contextlib.contextmanager
+    def timer(self, name: str) -> typing.Generator[None, None, None]:
+        """処理時間を計測して集計するコンテキストマネージャー。ログ出力は行わない。
+
+        例外が発生した場合も集計する。
+
+        Args:
+            name: 計測対象の名前。
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start_time)
+
+    def record(self, name: str, elapsed: float) -> None:
+        """処理時間を記録する。
+
+        Args:
+            name: 計測対象の名前。
+            elapsed: 処理時間（秒）。
+        """
+        with self.lock:
+            aggregate = self.aggregates.get(name)
+            if aggregate is None:
+                aggregate = self.aggregates[name] = _TimerAggregate()
+            aggregate.count += 1
+            aggregate.total += elapsed
+            aggregate.min = min(aggregate.min, elapsed)
+            aggregate.max = max(aggregate.max, elapsed)
+            if len(aggregate.samples) < self.max_samples:
+                aggregate.samples.append(elapsed)
+            else:
+                index = int(random.random() * aggregate.count)
+                if index < self.max_samples:
+                    aggregate.samples[index] = elapsed
+
+    def snapshot(self, reset: bool = False) -> dict[str, TimerStats]:
+        """現在の集計結果を取得する。
+
+        Args:
+            reset: 取得後に集計をリセットするか否か。
+
+        Returns:
+            名前 → 集計結果
+        """
+        with self.lock:
+            aggregates = self.aggregates
+            if reset:
+                self.aggregates = {}
+            else:
+                aggregates = {name: _copy_timer_aggregate(aggregate) for name, aggregate in aggregates.items()}
+        # ソートはロックの外で行う
+        return {name: _make_timer_stats(name, aggregate) for name, aggregate in aggregates.items()}
+
+    def log_summary(self, logger: logging.Logger | None = None, reset: bool = True) -> int:
+        """集計結果を合計時間の長い順にログ出力する。
+
+        Args:
+            logger: 出力先ロガー。Noneの場合はこのモジュールのロガー。
+            reset: 出力後に集計をリセットするか否か。
+
+        Returns:
+            出力した名前の数
+        """
         if logger is None:
             logger = _logger
-        if has_error:
-            logger.warning(f"[{name}] failed in {elapsed:.0f} s")
-        else:
-            logger.info(f"[{name}] done in {elapsed:.0f} s")
+        stats = self.snapshot(reset=reset)
+        for item in sorted(stats.values(), key=lambda item: -item.total):
+            logger.info(str(item))
+        return len(stats)
+
+    def start_emitter(self, interval: float = 60.0, logger: logging.Logger | None = None, reset: bool = True) -> None:
+        """集計結果を定期的にログ出力するスレッドを開始する。
+
+        Args:
+            interval: 出力間隔（秒）。
+            logger: 出力先ロガー。Noneの場合はこのモジュールのロガー。
+            reset: 出力後に集計をリセットするか否か。
+        """
+        if self._emitter is not None:
+            raise RuntimeError("emitter is already started")
+        self._emitter_stop.clear()
+
+        def run() -> None:
+            while not self._emitter_stop.wait(interval):
+                self.log_summary(logger, reset=reset)
+
+        self._emitter = threading.Thread(target=run, name="TimerRegistry-emitter", daemon=True)
+        self._emitter.start()
+
+    def stop_emitter(self) -> None:
+        """定期的なログ出力を停止する。"""
+        if self._emitter is None:
+            return
+        self._emitter_stop.set()
+        self._emitter.join()
+        self._emitter = None
+
+    def clear(self) -> None:
+        """集計をクリアする。"""
+        with self.lock:
+            self.aggregates.clear()
+
+
+def _copy_timer_aggregate(aggregate: _TimerAggregate) -> _TimerAggregate:
+    """集計途中の値を複製する。"""
+    copied = _TimerAggregate()
+    copied.count = aggregate.count
+    copied.total = aggregate.total
+    copied.min = aggregate.min
+    copied.max = aggregate.max
+    copied.samples = list(aggregate.samples)
+    return copied
+
+
+def _make_timer_stats(name: str, aggregate: _TimerAggregate) -> TimerStats:
+    """集計途中の値から集計結果を作成する。"""
+    samples = sorted(aggregate.samples)
+
+    def percentile(p: float) -> float:
+        # nearest-rank法
+        return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+    return TimerStats(
+        name=name,
+        count=aggregate.count,
+        total=aggregate.total,
+        min=aggregate.min,
+        max=aggregate.max,
+        p50=percentile(50),
+        p90=percentile(90),
+        p99=percentile(99),
+    )
 
 
 def exception_with_dedup(
@@ -120,6 +854,7 @@ def exception_with_dedup(
     dedup_window: datetime.timedelta | None = None,
     dedup_count: int | None = None,
     now: datetime.datetime | None = None,
+    history: ExceptionHistory | None = None,
 ) -> None:
     """同一 fingerprint が重複排除ウィンドウ内にあれば INFO、そうでなければ WARN でログ出力する。
 
@@ -137,35 +872,26 @@ def exception_with_dedup(
         dedup_window: 同一エラーとみなす時間幅。デフォルト 24 時間（dedup_count 指定時は None）。
         dedup_count: 同一エラーとみなす回数。この回数分 INFO で抑制した後に再度 WARN で出力する。
         now: 現在時刻。
+        history: 重複排除の履歴。Noneの場合は全ロガーで共有する既定の履歴。
     """
     if dedup_window is None and dedup_count is None:
         dedup_window = datetime.timedelta(days=1)
     if now is None:
         now = datetime.datetime.now()
+    if history is None:
+        history = _exception_history
 
     is_exception = isinstance(exc, BaseException)
     raw = f"{exc.__class__.__name__}:{str(exc)}:{msg}" if is_exception else f"{exc}:{msg}"
     fingerprint = hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-    last = _exception_history.get(fingerprint)
-    if last is None:
-        should_warn = True
-    else:
-        last_seen, count = last
-        time_expired = dedup_window is not None and (now - last_seen) >= dedup_window
-        count_expired = dedup_count is not None and count + 1 >= dedup_count
-        should_warn = time_expired or count_expired
-
-    if should_warn:
+    if history.check(fingerprint, now, dedup_window, dedup_count, msg=msg):
         if is_exception:
             logger.warning(msg, exc_info=True)
         else:
             logger.warning(msg)
-        _exception_history[fingerprint] = (now, 0)
     else:
         logger.info(msg)
-        assert last is not None
-        _exception_history[fingerprint] = (now, last[1] + 1)
 
 
 _current_context_id: contextvars.ContextVar[str] = contextvars.ContextVar("_current_context_id", default="")
@@ -176,13 +902,18 @@ async def capture_context(
     target_logger: logging.Logger,
     formatter: logging.Formatter,
     level: int = logging.INFO,
+    max_size: int | None = 1024 * 1024,
 ) -> typing.AsyncGenerator[typing.Callable[[], str], None]:
-    """指定ロガーに対して“この非同期コンテキストのログだけ”をStringIOへ集約する。
+    """指定ロガーに対して“この非同期コンテキストのログだけ”をバッファへ集約する。
+
+    ロガーごとに1つの振り分け用ハンドラを共有し、コンテキストIDからバッファを引いて書き込む。
+    同時に実行中のキャプチャ数によらず、1レコードあたりの処理は一定となる。
 
     Args:
         target_logger: ハンドラを一時的に取り付ける対象のロガー。
         formatter: このキャプチャ専用のフォーマッタ。
-        level: このキャプチャハンドラのログレベル。
+        level: このキャプチャのログレベル。
+        max_size: バッファに保持する最大文字数。超えた場合は古い行から破棄する。Noneの場合は無制限。
 
     Yields:
         get_value: これまでにバッファへ書かれた文字列を返す関数。
@@ -190,28 +921,102 @@ async def capture_context(
     context_id: str = str(uuid.uuid4())
     token = _current_context_id.set(context_id)
     try:
-        buffer: io.StringIO = io.StringIO()
-        handler: logging.StreamHandler = logging.StreamHandler(buffer)
-        handler.setFormatter(formatter)
-        handler.setLevel(level)
-        handler.addFilter(ContextFilter(context_id))
-        target_logger.addHandler(handler)
+        buffer = _CaptureBuffer(formatter, level, max_size)
+        handler = _ContextDispatchHandler.register(target_logger, context_id, buffer)
         try:
-
-            def get_value() -> str:
-                return buffer.getvalue()
-
-            yield get_value
+            yield buffer.getvalue
         finally:
-            target_logger.removeHandler(handler)
-            handler.close()
-            buffer.close()
+            handler.unregister(target_logger, context_id)
     finally:
         _current_context_id.reset(token)
 
 
+class _CaptureBuffer:
+    """capture_contextの1コンテキスト分のバッファ。"""
+
+    def __init__(self, formatter: logging.Formatter, level: int, max_size: int | None) -> None:
+        self.formatter = formatter
+        self.level = level
+        self.max_size = max_size
+        self.lines: collections.deque[str] = collections.deque()
+        self.size = 0
+        self.dropped = 0
+        """max_sizeを超えたため破棄した行数。"""
+        self.lock = threading.Lock()
+
+    def append(self, msg: str) -> None:
+        """フォーマット済みの行を追加する。"""
+        with self.lock:
+            self.lines.append(msg)
+            self.size += len(msg)
+            if self.max_size is not None:
+                # 直近の1行は常に残す
+                while self.size > self.max_size and len(self.lines) > 1:
+                    self.size -= len(self.lines.popleft())
+                    self.dropped += 1
+
+    def getvalue(self) -> str:
+        """これまでにバッファへ書かれた文字列を返す。"""
+        with self.lock:
+            value = "".join(self.lines)
+            if self.dropped > 0:
+                value = f"...({self.dropped}行省略)\n" + value
+            return value
+
+
+class _ContextDispatchHandler(logging.Handler):
+    """コンテキストIDに対応するcapture_contextのバッファへログを振り分けるハンドラ。
+
+    ロガーごとに1つだけ取り付け、キャプチャがすべて終了したら取り外す。
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buffers: dict[str, _CaptureBuffer] = {}
+
+    @classmethod
+    def register(cls, target_logger: logging.Logger, context_id: str, buffer: _CaptureBuffer) -> "_ContextDispatchHandler":
+        """ロガーのハンドラ（無ければ作成して取り付ける）へバッファを登録する。"""
+        with cls._lock:
+            handler = next((h for h in target_logger.handlers if isinstance(h, cls)), None)
+            if handler is None:
+                handler = cls()
+                target_logger.addHandler(handler)
+            handler.buffers[context_id] = buffer
+            return handler
+
+    def unregister(self, target_logger: logging.Logger, context_id: str) -> None:
+        """バッファの登録を解除する。最後の1つであればロガーからハンドラを取り外す。"""
+        with self._lock:
+            self.buffers.pop(context_id, None)
+            if not self.buffers:
+                target_logger.removeHandler(self)
+                self.close()
+
+    @typing.override
+    def handle(self, record: logging.LogRecord) -> bool:
+        # 対象外のレコードはロックもフォーマットもせずに捨てる
+        buffer = self.buffers.get(_current_context_id.get())
+        if buffer is None or record.levelno < buffer.level:
+            return False
+        try:
+            buffer.append(buffer.formatter.format(record) + "\n")
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.handleError(record)
+        return True
+
+    @typing.override
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
 class ContextFilter(logging.Filter):
-    """_context_idと一致するログだけを通すフィルタ。"""
+    """_context_idと一致するログだけを通すフィルタ。
+
+    capture_contextは現在は使用していないが、互換性のために残している。
+    """
 
     def __init__(self, target_id: str) -> None:
         super().__init__()
@@ -224,15 +1029,32 @@ class ContextFilter(logging.Filter):
 
 
 def jsonify(
-    data: typing.Any, indent: int | None = None, truncate: bool = True, model_dump_kwargs: dict[str, typing.Any] | None = None
+    data: typing.Any,
+    indent: int | None = None,
+    truncate: bool = True,
+    model_dump_kwargs: dict[str, typing.Any] | None = None,
+    encoder: JsonEncoder = "json",
+    max_depth: int | None = None,
+    max_items: int | None = None,
+    max_total_size: int | None = None,
 ) -> str:
     """オブジェクトをJSON文字列に変換する。
 
+    truncate がTrueの場合、max_depth・max_items・max_total_sizeを指定しなければ
+    値を省略した複製を作ってからJSON化する（JSON化はC実装に任せる）。
+    指定した場合は上限に達した時点で打ち切れるよう、encoder が"json"なら省略しながら1パスでJSON化し、
+    "orjson"ならtruncate_values()で上限を適用してからJSON化する。
+    "orjson"の場合はorjson（`orjson` extra）でJSON化する。インデントは2固定となる。
+
     Args:
         data: JSON化するオブジェクト。
         indent: インデント幅。Noneの場合は改行なし。
         truncate: 長い文字列/バイト列を省略するかどうか。
         model_dump_kwargs: pydanticモデルをdictに変換する際の追加引数。
+        encoder: 使用するJSONエンコーダー。
+        max_depth: truncate がTrueの場合のdict/list/tupleの最大の深さ。詳細はtruncate_values()を参照。
+        max_items: truncate がTrueの場合のdict/list/tupleごとの最大要素数。
+        max_total_size: truncate がTrueの場合の全体の出力サイズの目安。
 
     Returns:
         JSON文字列。
@@ -240,11 +1062,18 @@ def jsonify(
     if model_dump_kwargs is None:
         model_dump_kwargs = {}
     try:
+        budget: dict[str, typing.Any] = {"max_depth": max_depth, "max_items": max_items, "max_total_size": max_total_size}
+        has_budget = any(v is not None for v in budget.values())
+        if encoder == "orjson":
+            return _orjson_dumps(data, indent, truncate, model_dump_kwargs, budget if has_budget else None)
         if truncate:
-            data = truncate_values(data, bytes_to_str=True, model_dump_kwargs=model_dump_kwargs)
-        else:
-            data = pytilpack.python.pydantic_to_dict(data, **model_dump_kwargs)
+            if has_budget:
+                return _TruncatingEncoder(indent=indent, model_dump_kwargs=model_dump_kwargs, **budget).encode(data)
+            data = _truncate_for_json(data, model_dump_kwargs=model_dump_kwargs)
+            separators = None if indent is not None else (",", ":")
+            return json.dumps(data, ensure_ascii=False, indent=indent, separators=separators)
 
+        data = pytilpack.python.pydantic_to_dict(data, **model_dump_kwargs)
         separators = None if indent is not None else (",", ":")
         return json.dumps(data, ensure_ascii=False, indent=indent, separators=separators, default=_json_default)
     except Exception:
@@ -253,6 +1082,293 @@ def jsonify(
         return repr(data)
 
 
+def _orjson_dumps(
+    data: typing.Any,
+    indent: int | None,
+    truncate: bool,
+    model_dump_kwargs: dict[str, typing.Any],
+    budget: dict[str, typing.Any] | None,
+) -> str:
+    """orjsonでJSON化する。"""
+    import orjson  # pylint: disable=import-outside-toplevel
+
+    if truncate:
+        if budget is None:
+            data = _truncate_for_json(data, model_dump_kwargs=model_dump_kwargs)
+        else:
+            data = truncate_values(data, bytes_to_str=True, model_dump_kwargs=model_dump_kwargs, **budget)
+    else:
+        data = pytilpack.python.pydantic_to_dict(data, **model_dump_kwargs)
+    # 日時の書式をjsonと揃えるため、日時の変換は_json_defaultへ任せる
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if indent is not None:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=_json_default, option=option).decode("utf-8")
+
+
+_JSON_SCALAR_TYPES: frozenset[type] = frozenset({int, float, bool, type(None)})
+"""そのままJSON化できる末端の値の型。"""
+
+
+def _is_long_num_list(o: typing.Any, max_num_list_len: int) -> bool:
+    """max_num_list_len件を超える数値型(int/float)のlistか否かを返す。
+
+    全要素を調べるとlistの長さに比例した時間がかかるため、先頭のmax_num_list_len + 1件だけで判定する。
+    """
+    return (
+        isinstance(o, list)
+        and len(o) > max_num_list_len
+        and all(
+            isinstance(item, (int, float)) and not isinstance(item, bool) for item in itertools.islice(o, max_num_list_len + 1)
+        )
+    )
+
+
+def _truncate_for_json(
+    data: typing.Any,
+    max_str_len: int = 100,
+    max_num_list_len: int = 3,
+    model_dump_kwargs: dict[str, typing.Any] | None = None,
+) -> typing.Any:
+    """jsonify()用に、長い値を省略したJSON化できる複製を作る。
+
+    truncate_values(bytes_to_str=True)と同じ結果を返す。ただし、_TruncatingEncoderと同様に
+    JSON化できないオブジェクトはここで変換し（`__dict__`等）、その中の値も省略する。
+    循環参照しているコンテナは"..."に置き換える。
+    """
+    if model_dump_kwargs is None:
+        model_dump_kwargs = {}
+    scalar_types = _JSON_SCALAR_TYPES
+    active: set[int] = set()  # 走査中のコンテナのid (循環参照の検出用)
+
+    def truncate(o: typing.Any) -> typing.Any:
+        # 要素の大半を占める末端の値はtype()の完全一致で判定し、再帰呼び出しを避ける
+        # pylint: disable=unidiomatic-typecheck
+        if isinstance(o, str):
+            return o if len(o) <= max_str_len else o[:max_str_len] + "..."
+        if isinstance(o, dict):
+            if id(o) in active:
+                return "..."
+            active.add(id(o))
+            result: dict[typing.Any, typing.Any] = {}
+            for k, v in o.items():
+                if type(k) is not str or len(k) > max_str_len:
+                    k = truncate(k)
+                t = type(v)
+                if t in scalar_types:
+                    result[k] = v
+                elif t is str:
+                    result[k] = v if len(v) <= max_str_len else v[:max_str_len] + "..."
+                else:
+                    result[k] = truncate(v)
+            active.discard(id(o))
+            return result
+        if isinstance(o, (list, tuple)):
+            if id(o) in active:
+                return "..."
+            if _is_long_num_list(o, max_num_list_len):
+                return [*o[:max_num_list_len], "..."]
+            active.add(id(o))
+            items: list[typing.Any] = []
+            for item in o:
+                t = type(item)
+                if t in scalar_types:
+                    items.append(item)
+                elif t is str:
+                    items.append(item if len(item) <= max_str_len else item[:max_str_len] + "...")
+                else:
+                    items.append(truncate(item))
+            active.discard(id(o))
+            return items
+        if o is None or isinstance(o, (bool, int, float)):
+            return o
+        if isinstance(o, bytes):
+            return truncate(o.decode("utf-8", errors="replace"))
+        converted = pytilpack.python.pydantic_to_dict(o, **model_dump_kwargs)
+        return truncate(_json_default(o) if converted is o else converted)
+
+    return truncate(data)
+
+
+class _TruncatingEncoder:
+    """長い値を省略しながら1パスでJSON化するエンコーダー。
+
+    truncate_values(bytes_to_str=True)の結果をjson.dumps()したものと同じ文字列を返す。
+    ただし、JSON化できないオブジェクトを変換した結果（`__dict__`等）の中の値も省略する。
+    また、max_total_size は出力するJSON文字列の長さで判定する。
+    """
+
+    def __init__(
+        self,
+        indent: int | None = None,
+        max_str_len: int = 100,
+        max_num_list_len: int = 3,
+        model_dump_kwargs: dict[str, typing.Any] | None = None,
+        max_depth: int | None = None,
+        max_items: int | None = None,
+        max_total_size: int | None = None,
+    ) -> None:
+        self.indent = indent
+        self.max_str_len = max_str_len
+        self.max_num_list_len = max_num_list_len
+        self.model_dump_kwargs = model_dump_kwargs or {}
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_total_size = max_total_size
+        self.limited = max_items is not None or max_total_size is not None
+        self.active: set[int] = set()
+        """走査中のコンテナのid (循環参照の検出用)。"""
+        self.size = 0
+        """parts[:counted]の合計長。"""
+        self.counted = 0
+        self.key_separator = ":" if indent is None else ": "
+        self.delimiters: list[tuple[str, str, str]] = []
+        """階層ごとの(開始直後, 要素間, 終了直前)の区切り。"""
+
+    def encode(self, data: typing.Any) -> str:
+        """JSON文字列に変換する。"""
+        parts: list[str] = []
+        self._encode(data, parts, 0)
+        return "".join(parts)
+
+    def _encode(self, o: typing.Any, parts: list[str], level: int) -> None:
+        # 要素の大半を占める末端の値は、メソッド呼び出しを避けるため_encode_containerでも直接処理する
+        if isinstance(o, str):
+            if len(o) > self.max_str_len:
+                o = o[: self.max_str_len] + "..."
+            parts.append(_encode_json_str(o))
+        elif o is None or isinstance(o, (bool, int, float)):
+            parts.append(_encode_json_scalar(o))
+        elif isinstance(o, (dict, list, tuple)):
+            self._encode_container(o, parts, level)
+        elif isinstance(o, bytes):
+            self._encode(o.decode("utf-8", errors="replace"), parts, level)
+        else:
+            converted = pytilpack.python.pydantic_to_dict(o, **self.model_dump_kwargs)
+            self._encode(_json_default(o) if converted is o else converted, parts, level)
+
+    def _encode_container(self, o: dict | list | tuple, parts: list[str], level: int) -> None:
+        if (self.max_depth is not None and level >= self.max_depth) or id(o) in self.active:
+            parts.append('"..."')
+            return
+        if not o:
+            parts.append("{}" if isinstance(o, dict) else "[]")
+            return
+        self.active.add(id(o))
+        try:
+            self._encode_items(o, parts, level)
+        finally:
+            self.active.discard(id(o))
+
+    def _encode_items(self, o: dict | list | tuple, parts: list[str], level: int) -> None:
+        # 末端の値はtype()の完全一致で判定する (boolやstrのサブクラスは_encodeへ回す)
+        # pylint: disable=unidiomatic-typecheck
+        head, separator, tail = self._get_delimiters(level)
+        max_str_len = self.max_str_len
+        limited = self.limited
+        append = parts.append
+        if isinstance(o, dict):
+            key_separator = self.key_separator
+            append("{" + head)
+            for i, (k, v) in enumerate(o.items()):
+                if limited and self._should_stop(i, parts):
+                    append('"..."' + key_separator + '"..."')
+                    append(separator)
+                    break
+                if type(k) is str and len(k) <= max_str_len:
+                    append(_encode_json_str(k))
+                else:
+                    append(self._encode_key(k))
+                append(key_separator)
+                if type(v) is str:
+                    append(_encode_json_str(v if len(v) <= max_str_len else v[:max_str_len] + "..."))
+                elif type(v) is int:
+                    append(int.__repr__(v))
+                elif v is None:
+                    append("null")
+                else:
+                    self._encode(v, parts, level + 1)
+                append(separator)
+            parts[-1] = tail + "}"
+            return
+
+        items: typing.Iterable[typing.Any] = o
+        if _is_long_num_list(o, self.max_num_list_len):
+            items = [*o[: self.max_num_list_len], "..."]
+        append("[" + head)
+        for i, item in enumerate(items):
+            if limited and self._should_stop(i, parts):
+                append('"..."')
+                append(separator)
+                break
+            if type(item) is str:
+                append(_encode_json_str(item if len(item) <= max_str_len else item[:max_str_len] + "..."))
+            elif type(item) is int:
+                append(int.__repr__(item))
+            elif item is None:
+                append("null")
+            else:
+                self._encode(item, parts, level + 1)
+            append(separator)
+        parts[-1] = tail + "]"
+
+    def _should_stop(self, index: int, parts: list[str]) -> bool:
+        """要素数または出力サイズの上限に達したか否かを返す。"""
+        if self.max_items is not None and index >= self.max_items:
+            return True
+        if self.max_total_size is not None:
+            self.size += sum(map(len, parts[self.counted :]))
+            self.counted = len(parts)
+            return self.size >= self.max_total_size
+        return False
+
+    def _encode_key(self, k: typing.Any) -> str:
+        """dictのキーをJSON文字列に変換する。変換規則はjson.dumps()に合わせる。"""
+        if isinstance(k, bytes):
+            k = k.decode("utf-8", errors="replace")
+        if isinstance(k, str):
+            if len(k) > self.max_str_len:
+                k = k[: self.max_str_len] + "..."
+            return _encode_json_str(k)
+        if k is None or isinstance(k, (bool, int, float)):
+            return _encode_json_str(_encode_json_scalar(k))
+        raise TypeError(f"keys must be str, int, float, bool or None, not {k.__class__.__name__}")
+
+    def _get_delimiters(self, level: int) -> tuple[str, str, str]:
+        """指定した階層のコンテナの区切りを返す。"""
+        while len(self.delimiters) <= level:
+            if self.indent is None:
+                self.delimiters.append(("", ",", ""))
+            else:
+                inner = "\n" + " " * (self.indent * (len(self.delimiters) + 1))
+                outer = "\n" + " " * (self.indent * len(self.delimiters))
+                self.delimiters.append((inner, "," + inner, outer))
+        return self.delimiters[level]
+
+
+_encode_json_str: typing.Callable[[str], str] = json.encoder.encode_basestring  # type: ignore[attr-defined]
+"""文字列をJSON文字列に変換する (ensure_ascii=False相当)。"""
+
+
+def _encode_json_scalar(o: None | bool | int | float) -> str:
+    """None/bool/int/floatをJSONに変換する。変換規則はjson.dumps()に合わせる。"""
+    if o is None:
+        return "null"
+    if o is True:
+        return "true"
+    if o is False:
+        return "false"
+    if isinstance(o, int):
+        return int.__repr__(o)
+    if o != o:  # pylint: disable=comparison-with-itself
+        return "NaN"
+    if o == float("inf"):
+        return "Infinity"
+    if o == float("-inf"):
+        return "-Infinity"
+    return float.__repr__(o)
+
+
 def truncate_values(
     data: typing.Any,
     max_str_len: int = 100,
@@ -260,55 +1376,94 @@ def truncate_values(
     bytes_to_str: bool = False,
     model_dump_kwargs: dict[str, typing.Any] | None = None,
     max_num_list_len: int = 3,
+    max_depth: int | None = None,
+    max_items: int | None = None,
+    max_total_size: int | None = None,
 ) -> typing.Any:
     """dictやlist/tuple内の長いstr/bytesを再帰的に省略する。
 
+    max_depth・max_items・max_total_sizeを指定すると、その時点で走査を打ち切るため、
+    巨大なデータでも処理量はデータの大きさではなく指定した上限に比例する。
+    循環参照しているコンテナは"..."に置き換える。
+
     Args:
         data: 処理対象のデータ。
         max_str_len: 文字列の最大長。
         max_bytes_len: バイト列の最大長。
         bytes_to_str: bytesをstrに変換するかどうか。
         model_dump_kwargs: pydanticモデルをdictに変換する際の追加引数。
-        max_num_list_len: 全要素が数値型(int/float)のlistの最大表示件数。超えた場合は先頭n件+"..."に省略。
+        max_num_list_len: 数値型(int/float)のlistの最大表示件数。超えた場合は先頭n件+"..."に省略。
+            数値型のlistか否かは先頭n+1件で判定する。
+        max_depth: dict/list/tupleの最大の深さ。超えたコンテナは"..."に置き換える。Noneの場合は無制限。
+        max_items: dict/list/tupleごとの最大要素数。超えた場合は先頭n件+"..."に省略
+            （dictの場合は`"...": "..."`を追加）。Noneの場合は無制限。
+        max_total_size: 全体の出力サイズの目安（文字列/バイト列は長さ、その他の値は1として数える）。
+            超えた時点で以降の要素を"..."に省略する。Noneの場合は無制限。
 
     Returns:
         省略処理を行った新しいオブジェクト。
     """
     if model_dump_kwargs is None:
         model_dump_kwargs = {}
-    data = pytilpack.python.pydantic_to_dict(data, **model_dump_kwargs)
-
-    if isinstance(data, str):
-        if len(data) > max_str_len:
-            return data[:max_str_len] + "..."
-        return data
-    if isinstance(data, bytes):
-        if bytes_to_str:
-            decoded = data.decode("utf-8", errors="replace")
-            if len(decoded) > max_str_len:
-                return decoded[:max_str_len] + "..."
-            return decoded
-        else:
+    remaining = max_total_size
+    active: set[int] = set()  # 走査中のコンテナのid (循環参照の検出用)
+
+    def consume(size: int) -> None:
+        nonlocal remaining
+        if remaining is not None:
+            remaining -= size
+
+    def exhausted() -> bool:
+        return remaining is not None and remaining <= 0
+
+    def truncate(data: typing.Any, depth: int) -> typing.Any:
+        data = pytilpack.python.pydantic_to_dict(data, **model_dump_kwargs)
+
+        if isinstance(data, str):
+            if len(data) > max_str_len:
+                data = data[:max_str_len] + "..."
+            consume(len(data))
+            return data
+        if isinstance(data, bytes):
+            if bytes_to_str:
+                decoded = data.decode("utf-8", errors="replace")
+                if len(decoded) > max_str_len:
+                    decoded = decoded[:max_str_len] + "..."
+                consume(len(decoded))
+                return decoded
             if len(data) > max_bytes_len:
-                return data[:max_bytes_len] + b"..."
+                data = data[:max_bytes_len] + b"..."
+            consume(len(data))
             return data
-    if isinstance(data, dict):
-        return {
-            truncate_values(k, max_str_len, max_bytes_len, bytes_to_str, model_dump_kwargs, max_num_list_len): truncate_values(
-                v, max_str_len, max_bytes_len, bytes_to_str, model_dump_kwargs, max_num_list_len
-            )
-            for k, v in data.items()
-        }
-    if isinstance(data, list):
-        if len(data) > max_num_list_len and all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in data):
-            return [*data[:max_num_list_len], "..."]
-        return [
-            truncate_values(item, max_str_len, max_bytes_len, bytes_to_str, model_dump_kwargs, max_num_list_len)
-            for item in data
-        ]
-    if isinstance(data, tuple):
-        return tuple(
-            truncate_values(item, max_str_len, max_bytes_len, bytes_to_str, model_dump_kwargs, max_num_list_len)
-            for item in data
-        )
-    return data
+        if not isinstance(data, (dict, list, tuple)):
+            consume(1)
+            return data
+
+        if (max_depth is not None and depth >= max_depth) or id(data) in active:
+            consume(3)
+            return "..."
+        consume(2)
+        active.add(id(data))
+        try:
+            if isinstance(data, dict):
+                result_dict: dict[typing.Any, typing.Any] = {}
+                for i, (k, v) in enumerate(data.items()):
+                    if (max_items is not None and i >= max_items) or exhausted():
+                        result_dict["..."] = "..."
+                        break
+                    result_dict[truncate(k, depth + 1)] = truncate(v, depth + 1)
+                return result_dict
+            if _is_long_num_list(data, max_num_list_len):
+                consume(max_num_list_len + 1)
+                return [*data[:max_num_list_len], "..."]
+            result: list[typing.Any] = []
+            for i, item in enumerate(data):
+                if (max_items is not None and i >= max_items) or exhausted():
+                    result.append("...")
+                    break
+                result.append(truncate(item, depth + 1))
+            return result if isinstance(data, list) else tuple(result)
+        finally:
+            active.discard(id(data))
+
+    return truncate(data, 0)
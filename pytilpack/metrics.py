@@ -0,0 +1,437 @@
+"""プロセス内のメトリクス（カウンター・ゲージ・ヒストグラム）の集計とPrometheus形式での出力。
+
+値の更新はスレッドごとのセルに対して行い、ロックを取得しない。
+（各セルは1つのスレッドからしか書き込まれないため、GILの下で値が失われない）
+読み取り時に全セルを合算する。
+
+使用例::
+
+    ```python
+    requests_total = pytilpack.metrics.counter("app_requests_total", "リクエスト数", ["method"])
+    latency = pytilpack.metrics.histogram("app_request_seconds", "リクエストの処理時間")
+
+    requests_total.labels(method="GET").inc()
+    latency.observe(0.012)
+
+    text = pytilpack.metrics.generate_text()  # /metrics で返す
+    ```
+
+Flask/Quart/FastAPI向けには各パッケージのmetrics_response()を使用する。
+"""
+
+import abc
+import bisect
+import math
+import re
+import threading
+import typing
+
+__all__ = [
+    "CONTENT_TYPE",
+    "DEFAULT_BUCKETS",
+    "MetricType",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "default_registry",
+    "counter",
+    "gauge",
+    "histogram",
+    "generate_text",
+]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+"""Prometheusのテキスト形式のContent-Type。"""
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""ヒストグラムの既定のバケット（秒単位の処理時間向け）。"""
+
+MetricType = typing.Literal["counter", "gauge", "histogram"]
+"""メトリクスの種類。"""
+
+_METRIC_NAME_PATTERN = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+_LABEL_NAME_PATTERN = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+
+
+class _ShardedValue:
+    """スレッドごとのセルに分けて加算する値。"""
+
+    __slots__ = ("cells", "lock", "size")
+
+    def __init__(self, size: int = 1) -> None:
+        self.size = size
+        self.cells: dict[int, list[float]] = {}
+        """スレッドID → そのスレッドが加算した値。"""
+        self.lock = threading.Lock()
+
+    def cell(self) -> list[float]:
+        """現在のスレッドのセルを返す。"""
+        cell = self.cells.get(threading.get_ident())
+        if cell is None:
+            # スレッドごとの初回のみロックを取得する
+            with self.lock:
+                cell = self.cells.setdefault(threading.get_ident(), [0.0] * self.size)
+        return cell
+
+    def sum(self) -> list[float]:
+        """全スレッドの合計を返す。"""
+        total = [0.0] * self.size
+        for cell in list(self.cells.values()):
+            for i, value in enumerate(cell):
+                total[i] += value
+        return total
+
+
+class _Metric(metaclass=abc.ABCMeta):
+    """メトリクスの基底クラス。
+
+    ラベル名を指定した場合はlabels()でラベルの値ごとの子メトリクスを取得して使用する。
+    """
+
+    metric_type: typing.ClassVar[MetricType]
+
+    def __init__(self, name: str, documentation: str = "", labelnames: typing.Sequence[str] = ()) -> None:
+        if _METRIC_NAME_PATTERN.fullmatch(name) is None:
+            raise ValueError(f"メトリクス名が不正です: {name!r}")
+        for labelname in labelnames:
+            if _LABEL_NAME_PATTERN.fullmatch(labelname) is None or labelname == "le":
+                raise ValueError(f"ラベル名が不正です: {labelname!r}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], typing.Self] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str, **kwargs: str) -> typing.Self:
+        """ラベルの値に対応する子メトリクスを返す。
+
+        Args:
+            *values: ラベルの値（labelnamesの順）。
+            **kwargs: ラベル名と値。
+
+        Returns:
+            子メトリクス。
+        """
+        if not self.labelnames:
+            raise ValueError(f"{self.name} はラベルを持ちません")
+        if kwargs:
+            if values:
+                raise ValueError("ラベルの値は位置引数かキーワード引数のどちらかで指定してください")
+            if set(kwargs) != set(self.labelnames):
+                raise ValueError(f"{self.name} のラベルが一致しません: {sorted(kwargs)} != {sorted(self.labelnames)}")
+            values = tuple(kwargs[name] for name in self.labelnames)
+        elif len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} のラベルの数が一致しません: {len(values)} != {len(self.labelnames)}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._make_child()
+        return child
+
+    @abc.abstractmethod
+    def _make_child(self) -> typing.Self:
+        """子メトリクスを作成する。"""
+
+    def _check_unlabeled(self) -> None:
+        """ラベルを持つメトリクスを直接更新しようとした場合にエラーにする。"""
+        if self.labelnames:
+            raise ValueError(f"{self.name} はラベルを持つため、labels()で取得した子メトリクスを使用してください")
+
+    def collect(self) -> list[tuple[str, dict[str, str], float]]:
+        """出力するサンプルを返す。
+
+        Returns:
+            (サンプル名, ラベル, 値)のリスト。
+        """
+        if not self.labelnames:
+            return self._collect_samples({})
+        samples: list[tuple[str, dict[str, str], float]] = []
+        for values, child in sorted(self._children.copy().items()):
+            samples.extend(child._collect_samples(dict(zip(self.labelnames, values, strict=True))))  # pylint: disable=protected-access
+        return samples
+
+    @abc.abstractmethod
+    def _collect_samples(self, labels: dict[str, str]) -> list[tuple[str, dict[str, str], float]]:
+        """ラベルを持たないメトリクス1つ分のサンプルを返す。"""
+
+
+class Counter(_Metric):
+    """単調増加するカウンター。"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str = "", labelnames: typing.Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._value = _ShardedValue()
+
+    @typing.override
+    def _make_child(self) -> typing.Self:
+        return type(self)(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """値を加算する。
+
+        Args:
+            amount: 加算する値。0以上。
+        """
+        if amount < 0:
+            raise ValueError("Counterは減算できません")
+        self._check_unlabeled()
+        self._value.cell()[0] += amount
+
+    def get(self) -> float:
+        """現在の値を返す。"""
+        return self._value.sum()[0]
+
+    @typing.override
+    def _collect_samples(self, labels: dict[str, str]) -> list[tuple[str, dict[str, str], float]]:
+        return [(self.name, labels, self.get())]
+
+
+class Gauge(_Metric):
+    """増減する値。
+
+    inc()/dec()はロックを取得しないが、set()は全スレッドのセルをリセットするためロックを取得する。
+    set()と他のスレッドのinc()/dec()が同時に行われた場合の順序は保証しない。
+    """
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str = "", labelnames: typing.Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._value = _ShardedValue()
+        self._base = 0.0
+        self._function: typing.Callable[[], float] | None = None
+
+    @typing.override
+    def _make_child(self) -> typing.Self:
+        return type(self)(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """値を加算する。"""
+        self._check_unlabeled()
+        self._value.cell()[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """値を減算する。"""
+        self._check_unlabeled()
+        self._value.cell()[0] -= amount
+
+    def set(self, value: float) -> None:
+        """値を設定する。"""
+        self._check_unlabeled()
+        with self._value.lock:
+            self._value.cells = {}
+            self._base = value
+
+    def set_function(self, function: typing.Callable[[], float] | None) -> None:
+        """出力時に値を取得する関数を設定する。キューの長さなど、既存の状態をそのまま出力する場合に使用する。
+
+        Args:
+            function: 値を返す関数。Noneの場合は解除する。
+        """
+        self._check_unlabeled()
+        self._function = function
+
+    def get(self) -> float:
+        """現在の値を返す。"""
+        if self._function is not None:
+            return float(self._function())
+        return self._base + self._value.sum()[0]
+
+    @typing.override
+    def _collect_samples(self, labels: dict[str, str]) -> list[tuple[str, dict[str, str], float]]:
+        return [(self.name, labels, self.get())]
+
+
+class Histogram(_Metric):
+    """値の分布をバケットごとの件数で集計するヒストグラム。
+
+    Args:
+        name: メトリクス名。
+        documentation: 説明。
+        labelnames: ラベル名。
+        buckets: バケットの上限値（昇順）。+Infは自動的に追加する。
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        upper_bounds = [float(b) for b in buckets if b != math.inf]
+        if upper_bounds != sorted(set(upper_bounds)):
+            raise ValueError("bucketsは重複のない昇順で指定してください")
+        self.upper_bounds: tuple[float, ...] = (*upper_bounds, math.inf)
+        # [バケットごとの件数..., 合計]
+        self._value = _ShardedValue(len(self.upper_bounds) + 1)
+
+    @typing.override
+    def _make_child(self) -> typing.Self:
+        return type(self)(self.name, self.documentation, buckets=self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        """値を記録する。"""
+        self._check_unlabeled()
+        cell = self._value.cell()
+        cell[bisect.bisect_left(self.upper_bounds, value)] += 1
+        cell[-1] += value
+
+    def get(self) -> tuple[list[float], float, float]:
+        """現在の値を返す。
+
+        Returns:
+            (バケットごとの累積件数, 合計, 件数)
+        """
+        *counts, total = self._value.sum()
+        cumulative: list[float] = []
+        running = 0.0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+    @typing.override
+    def _collect_samples(self, labels: dict[str, str]) -> list[tuple[str, dict[str, str], float]]:
+        cumulative, total, count = self.get()
+        samples = [
+            (f"{self.name}_bucket", {**labels, "le": _format_value(upper_bound)}, bucket_count)
+            for upper_bound, bucket_count in zip(self.upper_bounds, cumulative, strict=True)
+        ]
+        samples.append((f"{self.name}_sum", labels, total))
+        samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """メトリクスを名前で管理するレジストリ。
+
+    同じ名前で再度取得した場合は既存のメトリクスを返す。
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str = "", labelnames: typing.Sequence[str] = ()) -> Counter:
+        """Counterを取得する。存在しない場合は作成する。"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str = "", labelnames: typing.Sequence[str] = ()) -> Gauge:
+        """Gaugeを取得する。存在しない場合は作成する。"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Histogramを取得する。存在しない場合は作成する。"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def _get_or_create[T: _Metric](
+        self,
+        metric_class: type[T],
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str],
+        **kwargs: typing.Any,
+    ) -> T:
+        """メトリクスを取得し、存在しない場合は作成する。"""
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, documentation, labelnames, **kwargs)
+        if not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"{name} は異なる種類またはラベルで登録済みです")
+        return metric
+
+    def unregister(self, name: str) -> None:
+        """メトリクスを削除する。"""
+        with self._lock:
+            self.metrics.pop(name, None)
+
+    def generate_text(self) -> str:
+        """Prometheusのテキスト形式で出力する。"""
+        lines: list[str] = []
+        for name, metric in sorted(self.metrics.copy().items()):
+            if metric.documentation:
+                lines.append(f"# HELP {name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {name} {metric.metric_type}")
+            for sample_name, labels, value in metric.collect():
+                if labels:
+                    label_text = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in labels.items())
+                    lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{sample_name} {_format_value(value)}")
+        return "".join(f"{line}\n" for line in lines)
+
+
+default_registry = MetricsRegistry()
+"""既定のレジストリ。"""
+
+
+def counter(name: str, documentation: str = "", labelnames: typing.Sequence[str] = ()) -> Counter:
+    """既定のレジストリのCounterを取得する。存在しない場合は作成する。"""
+    return default_registry.counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str = "", labelnames: typing.Sequence[str] = ()) -> Gauge:
+    """既定のレジストリのGaugeを取得する。存在しない場合は作成する。"""
+    return default_registry.gauge(name, documentation, labelnames)
+
+
+def histogram(
+    name: str,
+    documentation: str = "",
+    labelnames: typing.Sequence[str] = (),
+    buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """既定のレジストリのHistogramを取得する。存在しない場合は作成する。"""
+    return default_registry.histogram(name, documentation, labelnames, buckets)
+
+
+def generate_text(registry: MetricsRegistry | None = None) -> str:
+    """Prometheusのテキスト形式で出力する。
+
+    Args:
+        registry: 出力するレジストリ。Noneの場合は既定のレジストリ。
+
+    Returns:
+        Prometheusのテキスト形式の文字列。Content-TypeはCONTENT_TYPEを使用する。
+    """
+    if registry is None:
+        registry = default_registry
+    return registry.generate_text()
+
+
+def _format_value(value: float) -> str:
+    """値をPrometheusのテキスト形式の数値表現にする。"""
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    """HELP行の文字列をエスケープする。"""
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(text: str) -> str:
+    """ラベルの値をエスケープする。"""
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
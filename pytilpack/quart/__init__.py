@@ -2,33 +2,15 @@
 
 # flake8: noqa
 
+from . import asserts, i18n, misc, proxy_fix
 from .asserts import *
 from .i18n import *
 from .misc import *
 from .proxy_fix import *
 
-__all__ = [
-    # asserts
-    "ResponseType",
-    "assert_bytes",
-    "assert_html",
-    "assert_json",
-    "assert_xml",
-    "assert_sse",
-    "assert_response",
-    # i18n
-    "init_app",
-    # misc
-    "ConcurrencyState",
-    "set_max_concurrency",
-    "exhaust_concurrency",
-    "run_sync",
-    "get_next_url",
-    "prefer_markdown",
-    "static_url_for",
-    "RouteInfo",
-    "get_routes",
-    "run",
-    # proxy_fix
-    "ProxyFix",
-]
+# 各モジュールの__all__と重複して管理しないよう、そのまま再エクスポートする
+__all__: list[str] = []
+__all__ += asserts.__all__
+__all__ += i18n.__all__
+__all__ += misc.__all__
+__all__ += proxy_fix.__all__
@@ -1,11 +1,16 @@
 """Quart関連のその他のユーティリティ。"""
 
+import abc
 import asyncio
+import bisect
+import collections
 import contextlib
 import dataclasses
 import functools
 import logging
+import math
 import threading
+import time
 import typing
 
 import httpx
@@ -13,11 +18,17 @@ import quart
 import quart.utils
 import uvicorn
 
+import pytilpack.metrics
 import pytilpack.web
 
 __all__ = [
+    "ConcurrencyLimiter",
+    "AdaptiveLimit",
+    "AIMDLimit",
+    "GradientLimit",
     "ConcurrencyState",
     "set_max_concurrency",
+    "get_concurrency_state",
     "exhaust_concurrency",
     "run_sync",
     "get_next_url",
@@ -25,6 +36,7 @@ __all__ = [
     "static_url_for",
     "RouteInfo",
     "get_routes",
+    "metrics_response",
     "run",
 ]
 
@@ -34,25 +46,320 @@ _TIMESTAMP_CACHE: dict[str, int] = {}
 """静的ファイルの最終更新日時をキャッシュするための辞書。プロセス単位でキャッシュされる。"""
 
 
+class ConcurrencyLimiter:
+    """asyncio.Semaphore互換の同時実行数の制限。
+
+    上限を実行時に変更でき、実行中の数と待機中の数を取得できる。
+    待機中のものは優先度（priority）の高いレーンから順に実行し、同じレーン内では到着順に実行する。
+    ただしレーンの待機数が lifo_threshold を超えている間は、新しく到着したものから実行する。
+    （過負荷時は古いリクエストほどクライアント側で既にタイムアウトしている可能性が高いため）
+
+    Args:
+        limit: 同時実行数の上限。
+        lifo_threshold: 新しく到着したものから実行するレーンの待機数。Noneの場合は常に到着順。
+    """
+
+    def __init__(self, limit: int, lifo_threshold: int | None = None) -> None:
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        self._limit = limit
+        self.lifo_threshold = lifo_threshold
+        self._in_flight = 0
+        self._lanes: dict[int, collections.deque[asyncio.Future[None]]] = {}
+        """優先度 → 待機中のもの。"""
+        self._priorities: list[int] = []
+        """待機中のものがある優先度（降順）。"""
+
+    @property
+    def limit(self) -> int:
+        """同時実行数の上限。"""
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int) -> None:
+        if value < 1:
+            raise ValueError("limit must be >= 1")
+        self._limit = value
+        # 下げた場合は実行中のものは中断せず、解放されるまで新たに実行しない
+        self._wake()
+
+    @property
+    def in_flight(self) -> int:
+        """実行中の数。"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """待機中の数。"""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def waiters_ahead(self, priority: int = 0) -> int:
+        """指定した優先度で新たに待機した場合に、先に実行される待機中の数を返す。"""
+        ahead = 0
+        for p, lane in self._lanes.items():
+            if p > priority or (p == priority and (self.lifo_threshold is None or len(lane) < self.lifo_threshold)):
+                ahead += len(lane)
+        return ahead
+
+    def locked(self) -> bool:
+        """すぐには取得できない場合True。"""
+        return self._in_flight >= self._limit
+
+    async def acquire(self, priority: int = 0) -> bool:
+        """実行枠を取得する。空きが無い場合は空くまで待機する。
+
+        Args:
+            priority: 優先度。大きいほど先に実行する。
+        """
+        if not self._priorities and self._in_flight < self._limit:
+            self._in_flight += 1
+            return True
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = collections.deque()
+            bisect.insort(self._priorities, priority, key=lambda p: -p)
+        lane.append(future)
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # 枠を割り当てられた直後にキャンセルされた場合は次の待機者へ譲る
+                self.release()
+            else:
+                with contextlib.suppress(ValueError):
+                    lane.remove(future)
+                self._remove_empty_lane(priority)
+            raise
+        return True
+
+    def release(self) -> None:
+        """実行枠を解放する。"""
+        if self._in_flight <= 0:
+            raise ValueError("ConcurrencyLimiter released too many times")
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """空いている枠を待機中のものへ割り当てる。"""
+        while self._priorities and self._in_flight < self._limit:
+            priority = self._priorities[0]
+            lane = self._lanes[priority]
+            lifo = self.lifo_threshold is not None and len(lane) > self.lifo_threshold
+            future = lane.pop() if lifo else lane.popleft()
+            self._remove_empty_lane(priority)
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _remove_empty_lane(self, priority: int) -> None:
+        """待機中のものが無くなったレーンを削除する。"""
+        lane = self._lanes.get(priority)
+        if lane is not None and len(lane) <= 0:
+            del self._lanes[priority]
+            self._priorities.remove(priority)
+
+
+class AdaptiveLimit(metaclass=abc.ABCMeta):
+    """観測した処理時間から同時実行数の上限を調整するアルゴリズムの基底クラス。"""
+
+    @abc.abstractmethod
+    def update(self, limit: float, latency: float, in_flight: int, failed: bool) -> float:
+        """リクエストの完了ごとに呼び出され、新しい上限を返す。
+
+        範囲（min_concurrency～max_concurrency）への切り詰めは呼び出し側で行う。
+
+        Args:
+            limit: 現在の上限（小数）。
+            latency: 完了したリクエストの処理時間（秒）。
+            in_flight: 完了したリクエストを含む実行中の数。
+            failed: 例外で終了した場合True。
+
+        Returns:
+            新しい上限（小数）。
+        """
+
+
+class AIMDLimit(AdaptiveLimit):
+    """AIMD（加算増加・乗算減少）による上限の調整。
+
+    処理時間が latency_threshold 以下で上限付近まで使われている間は上限を少しずつ増やし、
+    処理時間が超過した場合や例外が発生した場合は backoff_ratio 倍に減らす。
+    減らした時点より前に開始したリクエストでは続けて減らさない。
+
+    Args:
+        latency_threshold: 許容する処理時間（秒）。
+        backoff_ratio: 減らす際の倍率。
+    """
+
+    def __init__(self, latency_threshold: float = 1.0, backoff_ratio: float = 0.9) -> None:
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be in (0, 1)")
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self._last_decrease = -math.inf
+
+    @typing.override
+    def update(self, limit: float, latency: float, in_flight: int, failed: bool) -> float:
+        if failed or latency > self.latency_threshold:
+            now = time.monotonic()
+            if now - latency < self._last_decrease:
+                return limit
+            self._last_decrease = now
+            return limit * self.backoff_ratio
+        if in_flight * 2 >= limit:
+            # 上限の数だけ完了するごとに1増やす
+            return limit + 1 / limit
+        return limit
+
+
+class GradientLimit(AdaptiveLimit):
+    """処理時間の長期平均と直近の値の比（勾配）による上限の調整。
+
+    直近の処理時間が長期平均の tolerance 倍以内であれば上限を増やし、
+    それを超えて遅くなるほど上限を減らす。増やす量は上限の平方根とする。
+    （Netflixのconcurrency-limitsのGradient2Limitを簡略化したもの）
+
+    Args:
+        tolerance: 許容する処理時間の長期平均に対する倍率。
+        smoothing: 新しい上限を反映する割合。
+        long_window: 長期平均を求めるサンプル数の目安。
+    """
+
+    def __init__(self, tolerance: float = 1.5, smoothing: float = 0.2, long_window: int = 600) -> None:
+        if tolerance < 1:
+            raise ValueError("tolerance must be >= 1")
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.long_window = long_window
+        self.long_latency: float | None = None
+        """処理時間の長期平均（指数移動平均）。"""
+
+    @typing.override
+    def update(self, limit: float, latency: float, in_flight: int, failed: bool) -> float:
+        if failed:
+            return limit * (1 - self.smoothing / 2)
+        if self.long_latency is None:
+            self.long_latency = latency
+        else:
+            self.long_latency += (latency - self.long_latency) / self.long_window
+            if self.long_latency > latency * 2:
+                # 負荷が下がった後に長期平均が高いまま残らないよう早めに追従させる
+                self.long_latency *= 0.95
+        if in_flight * 2 < limit:
+            # 上限に対して余裕がある間は増やさない
+            return limit
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_latency / max(latency, 1e-9)))
+        new_limit = limit * gradient + math.sqrt(limit)
+        return limit * (1 - self.smoothing) + new_limit * self.smoothing
+
+
 @dataclasses.dataclass
 class ConcurrencyState:
-    """set_max_concurrency の内部状態。exhaust_concurrency から参照される。"""
+    """set_max_concurrency の内部状態。exhaust_concurrency から参照される。
+
+    get_concurrency_state()で取得し、current_limit/queue_depth/in_flightを監視に使用できる。
+    """
 
-    semaphore: asyncio.Semaphore
+    semaphore: asyncio.Semaphore | ConcurrencyLimiter
     max_concurrency: int
     timeout: float | None
+    limiter: ConcurrencyLimiter | None = None
+    """同時実行数の制限。exhaust_concurrency中もsemaphoreとは異なり差し替えない。"""
+    adaptive: AdaptiveLimit | None = None
+    """上限の調整アルゴリズム。Noneの場合は上限を固定する。"""
+    min_concurrency: int = 1
+    estimated_limit: float = 0.0
+    """調整中の上限（小数）。limiter.limitはこれを丸めた値。"""
+    priority: dict[str, int] | typing.Callable[[], int] | None = None
+    """リクエストの優先度。エンドポイント名 → 優先度の辞書か、リクエストコンテキストで呼び出す関数。"""
+    load_shedding: bool = False
+    """待機時間の見込みがtimeoutを超える場合に待たずに503を返すか否か。"""
+    avg_latency: float = 0.0
+    """リクエストの処理時間の指数移動平均（秒）。"""
+
+    @property
+    def current_limit(self) -> int:
+        """現在の同時実行数の上限。"""
+        return self.limiter.limit if self.limiter is not None else self.max_concurrency
+
+    @property
+    def queue_depth(self) -> int:
+        """待機中のリクエスト数。"""
+        return self.limiter.queue_depth if self.limiter is not None else 0
+
+    @property
+    def in_flight(self) -> int:
+        """実行中のリクエスト数。"""
+        return self.limiter.in_flight if self.limiter is not None else 0
+
+    def get_priority(self) -> int:
+        """現在のリクエストの優先度を返す。"""
+        if self.priority is None:
+            return 0
+        if isinstance(self.priority, dict):
+            endpoint = quart.request.endpoint
+            return self.priority.get(endpoint, 0) if endpoint is not None else 0
+        return self.priority()
+
+    def expected_wait(self, priority: int = 0) -> float:
+        """指定した優先度のリクエストが今から待機した場合の待機時間の見込み（秒）を返す。"""
+        if self.limiter is None or not self.limiter.locked():
+            return 0.0
+        return (self.limiter.waiters_ahead(priority) + 1) * self.avg_latency / self.limiter.limit
+
+    def on_complete(self, latency: float, in_flight: int, failed: bool) -> None:
+        """リクエストの完了時に処理時間を記録し、上限を調整する。"""
+        self.avg_latency = latency if self.avg_latency <= 0 else self.avg_latency * 0.9 + latency * 0.1
+        if self.adaptive is None or self.limiter is None:
+            return
+        estimated = self.adaptive.update(self.estimated_limit, latency, in_flight, failed)
+        self.estimated_limit = max(float(self.min_concurrency), min(float(self.max_concurrency), estimated))
+        self.limiter.limit = max(1, int(self.estimated_limit))
+
+
+def set_max_concurrency(
+    app: quart.Quart,
+    max_concurrency: int,
+    timeout: float | None = 3.0,
+    adaptive: AdaptiveLimit | typing.Literal["aimd", "gradient"] | None = None,
+    min_concurrency: int = 1,
+    priority: dict[str, int] | typing.Callable[[], int] | None = None,
+    lifo_threshold: int | None = None,
+    load_shedding: bool = False,
+) -> None:
+    """Quart アプリ全体の最大同時リクエスト数を制限する。
 
+    adaptive を指定した場合は、リクエストの処理時間を元に min_concurrency ～ max_concurrency の範囲で
+    上限を自動的に調整する。初期値は範囲の中央とする。
 
-def set_max_concurrency(app: quart.Quart, max_concurrency: int, timeout: float | None = 3.0) -> None:
-    """Quart アプリ全体の最大同時リクエスト数を制限する。
+    priority を指定した場合は、優先度の高いリクエストから先に実行する。
+    ヘルスチェックやログイン済みユーザーのリクエストを優先する例::
+
+        pytilpack.quart.set_max_concurrency(
+            app,
+            100,
+            priority=lambda: 10 if quart.request.path == "/healthz" else 5 if "user_id" in quart.session else 0,
+            lifo_threshold=50,
+            load_shedding=True,
+        )
 
     Args:
         app: 対象の Quart アプリケーション。
         max_concurrency: 許可する同時リクエスト数の上限。
         timeout: 最大待機秒数。タイムアウト時は 503 Service Unavailable を返す。
+        adaptive: 上限の調整アルゴリズム。"aimd"/"gradient"の場合は既定の設定のAIMDLimit/GradientLimitを使用する。
+        min_concurrency: adaptive 指定時の上限の下限。
+        priority: リクエストの優先度（大きいほど先に実行）。エンドポイント名 → 優先度の辞書か、
+            リクエストコンテキストで呼び出して優先度を返す関数。未指定のエンドポイントは0。
+        lifo_threshold: 同じ優先度の待機数がこの数を超えている間は、新しいリクエストから実行する。
+            Noneの場合は常に到着順。
+        load_shedding: Trueの場合、直近の処理時間から見込んだ待機時間が timeout を超えるリクエストには
+            待たずに 503 を返す。
 
     Raises:
-        ValueError: max_concurrency が 1 未満の場合。
+        ValueError: max_concurrency が 1 未満の場合、min_concurrency が範囲外の場合。
         RuntimeError: 同一アプリに対して二度目に呼び出した場合。
             before_request/teardown_request が重複登録されてセマフォが二重管理されるため、
             同一アプリへの複数回呼び出しは禁止する。
@@ -63,14 +370,28 @@ def set_max_concurrency(app: quart.Quart, max_concurrency: int, timeout: float |
     """
     if max_concurrency < 1:
         raise ValueError("max_concurrency must be >= 1")
+    if not 1 <= min_concurrency <= max_concurrency:
+        raise ValueError("min_concurrency must be in [1, max_concurrency]")
     if "pytilpack_concurrency" in app.extensions:
         raise RuntimeError("set_max_concurrency is already configured on this app")
 
-    semaphore = asyncio.Semaphore(max_concurrency)
+    if adaptive == "aimd":
+        adaptive = AIMDLimit()
+    elif adaptive == "gradient":
+        adaptive = GradientLimit()
+    assert adaptive is None or isinstance(adaptive, AdaptiveLimit)
+    initial_limit = max_concurrency if adaptive is None else (min_concurrency + max_concurrency) // 2
+    limiter = ConcurrencyLimiter(initial_limit, lifo_threshold=lifo_threshold)
     state = ConcurrencyState(
-        semaphore=semaphore,
+        semaphore=limiter,
         max_concurrency=max_concurrency,
         timeout=timeout,
+        limiter=limiter,
+        adaptive=adaptive,
+        min_concurrency=min_concurrency,
+        estimated_limit=float(initial_limit),
+        priority=priority,
+        load_shedding=load_shedding,
     )
     app.extensions["pytilpack_concurrency"] = state
 
@@ -78,41 +399,76 @@ def set_max_concurrency(app: quart.Quart, max_concurrency: int, timeout: float |
         # テスト時にセマフォ/timeoutを一時変更できるようstateから読む
         sem = state.semaphore
         to = state.timeout
+        if isinstance(sem, ConcurrencyLimiter):
+            priority = state.get_priority()
+            if state.load_shedding and to is not None and state.expected_wait(priority) > to:
+                # 待っても間に合わない見込みのため、待たずに返す
+                logger.warning(f"Concurrency limit reached, shedding request: {quart.request.path}")
+                _abort_busy()
+            acquire = functools.partial(sem.acquire, priority)
+        else:
+            acquire = sem.acquire
         try:
             if to is None:
-                await sem.acquire()
+                await acquire()
             else:
-                await asyncio.wait_for(sem.acquire(), timeout=to)
+                await asyncio.wait_for(acquire(), timeout=to)
         except TimeoutError:
             logger.warning(f"Concurrency limit reached, aborting request: {quart.request.path}")
-            quart.abort(
-                503,
-                description="サーバーが混みあっています。しばらく待ってから再度お試しください。",
-            )
+            _abort_busy()
         # asyncio.CancelledError はここでは捕捉しない。
         # - to is None 経路（await sem.acquire() 直接）: acquire 待機中にキャンセルされると
         #   セマフォ未取得のまま CancelledError が伝播するため、漏洩は発生しない。
         # - to is not None 経路（asyncio.wait_for 経由）: wait_for がキャンセルされた場合、
-        #   CPython の保証により acquire 完了済みであれば内部で release 済み。
+        #   acquire 完了済みであれば内部で release 済み。
         #   未完了であれば未取得のまま伝播する。
         # いずれの経路でも、この時点では未取得状態が保証されるため保護は不要。
 
         # acquire 完了。トークン設定前にキャンセルが発生してもセマフォを解放するよう保護する。
         try:
-            quart.g.quart__concurrency_token = True
+            quart.g.quart__concurrency_token = (sem, time.perf_counter())
         except BaseException:
             sem.release()
             raise
 
-    async def _release(_: typing.Any) -> None:
-        if hasattr(quart.g, "quart__concurrency_token"):
-            state.semaphore.release()
+    async def _release(exc: BaseException | None) -> None:
+        token = getattr(quart.g, "quart__concurrency_token", None)
+        if token is not None:
+            sem, start = token
+            if sem is state.limiter:
+                state.on_complete(time.perf_counter() - start, state.in_flight, exc is not None)
+            sem.release()
             del quart.g.quart__concurrency_token
 
     app.before_request(_acquire)
     app.teardown_request(_release)
 
 
+def _abort_busy() -> typing.NoReturn:
+    """混雑により 503 Service Unavailable を返す。"""
+    quart.abort(
+        503,
+        description="サーバーが混みあっています。しばらく待ってから再度お試しください。",
+    )
+
+
+def get_concurrency_state(app: quart.Quart) -> ConcurrencyState:
+    """set_max_concurrency()の状態を取得する。
+
+    現在の上限や待機中のリクエスト数を監視する場合に使用する。
+
+    使用例::
+
+        state = pytilpack.quart.get_concurrency_state(app)
+        pytilpack.metrics.gauge("app_concurrency_limit").set_function(lambda: state.current_limit)
+        pytilpack.metrics.gauge("app_concurrency_queue_depth").set_function(lambda: state.queue_depth)
+
+    Raises:
+        KeyError: set_max_concurrency()を呼び出していない場合。
+    """
+    return app.extensions["pytilpack_concurrency"]
+
+
 @contextlib.asynccontextmanager
 async def exhaust_concurrency(app: quart.Quart):
     """テスト用: セマフォを枯渇させて503を発生させるコンテキストマネージャ。
@@ -223,6 +579,24 @@ def get_routes(app: quart.Quart) -> list[RouteInfo]:
     return pytilpack.web.build_routes(app.url_map.iter_rules(), app.config.get("APPLICATION_ROOT"))
 
 
+def metrics_response(registry: pytilpack.metrics.MetricsRegistry | None = None) -> quart.Response:
+    """メトリクスをPrometheusのテキスト形式で返すレスポンスを作成する。
+
+    使用例::
+
+        @app.route("/metrics")
+        async def metrics():
+            return pytilpack.quart.metrics_response()
+
+    Args:
+        registry: 出力するレジストリ。Noneの場合は既定のレジストリ。
+
+    Returns:
+        レスポンス。
+    """
+    return quart.Response(pytilpack.metrics.generate_text(registry), content_type=pytilpack.metrics.CONTENT_TYPE)
+
+
 @contextlib.asynccontextmanager
 async def run(app: quart.Quart, host: str = "localhost", port: int = 5000):
     """Quartアプリを実行するコンテキストマネージャ。テストコードなど用。"""
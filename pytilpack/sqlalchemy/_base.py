@@ -1,5 +1,6 @@
 """SQLAlchemy Mixin共通の基底クラス。"""
 
+import contextvars
 import datetime
 import logging
 import time
@@ -91,6 +92,12 @@ class _ToDictMixin:
         }
 
 
+def _get_session_name(session_var: contextvars.ContextVar[typing.Any]) -> str | None:
+    """session_varの現在のセッションの名前を返す。sync/async版Mixinのsession_name()で共用する。"""
+    sess = session_var.get(None)
+    return None if sess is None else sess.info.get("session_name")
+
+
 class _WaitForConnectionState:
     """wait_for_connection/await_for_connectionで共有する状態管理。
 
@@ -18,7 +18,7 @@ import sqlalchemy.sql.base
 
 import pytilpack.asyncio
 import pytilpack.paginator
-from pytilpack.sqlalchemy._base import _ReprMixin, _ToDictMixin, _WaitForConnectionState
+from pytilpack.sqlalchemy._base import _get_session_name, _ReprMixin, _ToDictMixin, _WaitForConnectionState
 
 logger = logging.getLogger(__name__)
 
@@ -257,6 +257,7 @@ class SyncMixin(_ReprMixin, _ToDictMixin, SyncAsyncBridgeMixin):
         session = cls.sessionmaker()  # pylint: disable=not-callable
         token = cls.session_var.set(session)
         if name is not None:
+            session.info["session_name"] = name
             logger.log(
                 log_level,
                 f"セッション開始: {name} session={id(session):x},"
@@ -291,6 +292,17 @@ class SyncMixin(_ReprMixin, _ToDictMixin, SyncAsyncBridgeMixin):
             raise RuntimeError(f"セッションが開始されていません。{cls.__qualname__}.start_session()を呼び出してください。")
         return sess
 
+    @classmethod
+    def session_name(cls) -> str | None:
+        """現在のセッションの名前を取得する。
+
+        pytilpack.logging.JsonFormatterのcontextに渡すと、ログにセッション名を付与できる。
+
+        Returns:
+            start_session()やsession_scope()で指定したセッション名。セッションが無いか名前が無い場合はNone。
+        """
+        return _get_session_name(cls.session_var)
+
     @classmethod
     def select(cls) -> sqlalchemy.Select[tuple[typing.Self]]:
         """sqlalchemy.Selectを返す。"""
@@ -1,15 +1,28 @@
 """Server-Sent Eventsメッセージ生成ユーティリティ。"""
 
 import asyncio
+import collections
 import contextlib
 import dataclasses
 import functools
+import itertools
 import logging
 import re
 import typing
 
 logger = logging.getLogger(__name__)
 
+# SSE仕様の行区切りは \n, \r\n, \r の3種のみ (splitlines()は対象が広すぎる)
+_LINE_SEPARATOR = re.compile(r"\r\n|\r|\n")
+
+_PING = object()
+"""generator()の内部キューでキープアライブの送信を表す番兵。"""
+_END = object()
+"""generator()の内部キューでプロデューサーの終了を表す番兵。"""
+
+SlowConsumerPolicy = typing.Literal["drop_oldest", "disconnect", "coalesce"]
+"""送信キューが満杯の購読者への対応方針。"""
+
 
 @dataclasses.dataclass
 class SSE:
@@ -19,6 +32,10 @@ class SSE:
     `comment`に文字列を指定するとSSE仕様上のコメント行（`:`始まり）として出力する。
     `data`と`comment`は併用でき、いずれか一方は必ず指定する。
 
+    シリアライズ結果はインスタンスにキャッシュするため、同じインスタンスを
+    複数の接続へ送る場合も変換は1回で済む。
+    キャッシュは変換時のフィールドの値と照合して使うため、フィールドを変更しても古い結果は返さない。
+
     仕様: <https://triple-underscore.github.io/HTML-server-sent-events-ja.html>
 
     Quartでの使用例::
@@ -63,6 +80,9 @@ class SSE:
         """dataとcommentがともに未指定でないことを検証する。"""
         if self.data is None and self.comment is None:
             raise ValueError("`data`と`comment`のいずれかを指定してください。")
+        # シリアライズ結果のキャッシュ。(変換時のフィールドの値, to_str()の結果, to_bytes()の結果)
+        # dataclassのフィールドに含めないよう、ここで初期化する
+        self._cache: tuple[tuple, str, bytes | None] | None = None
 
     def __str__(self) -> str:
         """`to_str()`の結果を返す。"""
@@ -75,6 +95,10 @@ class SSE:
             SSE形式の文字列。各フィールドはコロンで区切られ、最後に空行が付加される。
             data・commentフィールドに改行が含まれる場合は複数の行に分割される。
         """
+        key = (self.data, self.event, self.id, self.retry, self.comment)
+        cache = self._cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
         lines = []
 
         if self.event is not None:
@@ -84,32 +108,57 @@ class SSE:
         if self.retry is not None:
             lines.append(f"retry: {self.retry}")
 
-        # SSE仕様の行区切りは \n, \r\n, \r の3種のみ (splitlines()は対象が広すぎる)
         if self.comment is not None:
-            for line in re.split(r"\r\n|\r|\n", self.comment):
-                lines.append(f": {line}")
+            lines.append(": " + "\n: ".join(_LINE_SEPARATOR.split(self.comment)))
         if self.data is not None:
-            for line in re.split(r"\r\n|\r|\n", self.data):
-                lines.append(f"data: {line}")
+            lines.append("data: " + "\ndata: ".join(_LINE_SEPARATOR.split(self.data)))
 
-        return "\n".join(lines) + "\n\n"
+        result = "\n".join(lines) + "\n\n"
+        self._cache = (key, result, None)
+        return result
 
+    def to_bytes(self) -> bytes:
+        """SSE形式のUTF-8バイト列への変換。
 
-def generator(interval: float = 15) -> typing.Callable:
+        Returns:
+            `to_str()`の結果をUTF-8でエンコードしたバイト列
+        """
+        text = self.to_str()
+        cache = self._cache
+        assert cache is not None
+        data = cache[2]
+        if data is None:
+            data = text.encode("utf-8")
+            self._cache = (cache[0], text, data)
+        return data
+
+
+def generator(interval: float = 15, as_bytes: bool = False, batch_size: int = 1) -> typing.Callable:
     """SSEジェネレーターのデコレーター。
 
     15秒以上メッセージが送信されない場合、コメント行を送信してコネクションを維持する。
 
+    as_bytes をTrueにするとUTF-8エンコード済みのbytesを返す。SSEインスタンスのエンコード結果は
+    キャッシュされるため、同じインスタンスを多数の接続へ送る場合に有利。
+
+    batch_size を2以上にすると、送信側（フレームワーク）の処理が追いつかずメッセージが
+    溜まっている場合に最大 batch_size 件を連結して1回で返し、書き込み回数を減らす。
+
     Args:
         interval: キープアライブを送信する間隔（秒）。デフォルトは15秒
+        as_bytes: strではなくbytesを返すか否か
+        batch_size: 1回に連結して返す最大メッセージ数
 
     Returns:
         キープアライブが追加されたSSEメッセージストリームを生成するデコレーター
     """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    ping: str | bytes = b": ping\n\n" if as_bytes else ": ping\n\n"
 
     def decorator[**P, T: str | SSE](
         func: typing.Callable[P, typing.AsyncGenerator[T, None]],
-    ) -> typing.Callable[P, typing.AsyncGenerator[str, None]]:
+    ) -> typing.Callable[P, typing.AsyncGenerator[str | bytes, None]]:
         """デコレーター本体。
 
         Args:
@@ -119,44 +168,77 @@ def generator(interval: float = 15) -> typing.Callable:
             キープアライブが追加されたSSEメッセージストリームを生成する非同期ジェネレーター関数。
         """
 
-        # Awaitable -> Coroutine 用ユーティリティ
-        async def _anext(it: typing.AsyncIterator[T]) -> T:
-            return await anext(it)
-
         @functools.wraps(func)
-        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> typing.AsyncGenerator[str, None]:
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> typing.AsyncGenerator[str | bytes, None]:
             loop = asyncio.get_running_loop()
-            last_msg_time = loop.time()
             generator_ = func(*args, **kwargs)
+            # メッセージごとにタスクやタイムアウトを作らないよう、プロデューサーは接続ごとに
+            # 1つのタスクで回してキューで受け渡し、キープアライブは無通信時のみ発火するタイマーで行う
+            queue: asyncio.Queue[T | BaseException | object] = asyncio.Queue(maxsize=batch_size)
+            last_msg_time = loop.time()
+            timer: asyncio.TimerHandle | None = None
+
+            async def pump() -> None:
+                try:
+                    async for msg in generator_:
+                        await queue.put(msg)
+                except BaseException as e:
+                    task = asyncio.current_task()
+                    if isinstance(e, asyncio.CancelledError) and task is not None and task.cancelling() > 0:
+                        raise  # 接続側の終了処理によるpump_task.cancel()
+                    # プロデューサー内で発生したキャンセル等も含め、終了を必ず接続側へ伝える
+                    await queue.put(e)
+                else:
+                    await queue.put(_END)
+
+            def on_timer() -> None:
+                nonlocal timer
+                idle = loop.time() - last_msg_time
+                if idle < interval:
+                    # 前回の発火以降にメッセージが送信されていれば残り時間で再設定するだけ
+                    timer = loop.call_later(interval - idle, on_timer)
+                    return
+                # キューが空でなければ送信待ちのメッセージがあるためキープアライブは不要
+                if queue.empty():
+                    queue.put_nowait(_PING)
+                timer = loop.call_later(interval, on_timer)
+
             try:
-                next_task: asyncio.Task[T] | None = None
+                pump_task = loop.create_task(pump())
                 try:
-                    iterator = aiter(generator_)
-                    next_task = loop.create_task(_anext(iterator))
-
-                    while True:
-                        # 次メッセージ取得タスク完了 or タイムアウト待ち
-                        delay = interval - (loop.time() - last_msg_time)
-                        try:
-                            msg = await asyncio.wait_for(
-                                asyncio.shield(next_task),
-                                timeout=max(0.0, delay),
-                            )
-                            # メッセージ到着
-                            if isinstance(msg, SSE):
-                                yield str(msg)
+                    timer = loop.call_later(interval, on_timer)
+                    finished = False
+                    while not finished:
+                        item = await queue.get()
+                        chunks: list[typing.Any] = []
+                        error: BaseException | None = None
+                        while True:
+                            if item is _END:
+                                finished = True
+                                break
+                            if isinstance(item, BaseException):
+                                error = item
+                                break
+                            if item is _PING:
+                                chunks.append(ping)
+                            elif as_bytes:
+                                chunks.append(_encode(typing.cast(str | SSE, item)))
+                            elif isinstance(item, SSE):
+                                chunks.append(item.to_str())
                             else:
                                 # strの場合は念のため末尾の改行を保証
-                                yield msg.rstrip("\n") + "\n\n"
-                            last_msg_time = loop.time()
-                            next_task = loop.create_task(_anext(iterator))
-                        except TimeoutError:
-                            # タイムアウト → キープアライブ送信
-                            yield ": ping\n\n"
-                            last_msg_time = loop.time()
-                        except StopAsyncIteration:
-                            # ループ正常終了
-                            break
+                                chunks.append(typing.cast(str, item).rstrip("\n") + "\n\n")
+                            # 溜まっているメッセージは batch_size 件まで連結して返す
+                            if len(chunks) >= batch_size or queue.empty():
+                                break
+                            item = queue.get_nowait()
+                        if len(chunks) == 1:
+                            yield chunks[0]
+                        elif len(chunks) > 1:
+                            yield (b"" if as_bytes else "").join(chunks)
+                        last_msg_time = loop.time()
+                        if error is not None:
+                            raise error
                 except GeneratorExit:
                     logger.info("SSE切断[1]")
                     raise
@@ -164,10 +246,11 @@ def generator(interval: float = 15) -> typing.Callable:
                     logger.info("SSE切断[2]")
                     raise
                 finally:
-                    if next_task is not None:
-                        next_task.cancel()
-                        with contextlib.suppress(StopAsyncIteration):
-                            await asyncio.shield(next_task)
+                    if timer is not None:
+                        timer.cancel()
+                    pump_task.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await asyncio.shield(pump_task)
             finally:
                 # ジェネレーターをクリーンアップ
                 await asyncio.shield(generator_.aclose())
@@ -175,3 +258,289 @@ def generator(interval: float = 15) -> typing.Callable:
         return wrapper
 
     return decorator
+
+
+class SSEHub:
+    """SSEメッセージを複数の購読者へ配信するハブ。
+
+    publish()されたメッセージは1回だけシリアライズし、同じbytesを各購読者のキューへ積む。
+    接続ごとにプロデューサーを動かす必要がないため、多数のクライアントへの一斉配信に向く。
+
+    各購読者のキューは max_queue_size 件までで、満杯の場合は policy に従う。
+
+    - "drop_oldest": 最も古いメッセージを捨てて新しいメッセージを積む
+    - "disconnect": 購読者を切断する（クライアント側の再接続に任せる）
+    - "coalesce": 同じキー（既定ではSSEのevent）の未送信メッセージを新しいメッセージで置き換える。
+      同じキーのメッセージが無い場合は最も古いメッセージを捨てる
+
+    publish()はイベントループのスレッドから呼び出す必要がある。
+
+    replay_buffer を指定すると、idを持つSSEメッセージを保持し、
+    再接続したクライアントへLast-Event-ID以降のメッセージを再送できる。
+
+    Quartでの使用例::
+
+        ```python
+        hub = pytilpack.sse.SSEHub(replay_buffer=pytilpack.sse.SSEReplayBuffer())
+
+        @app.route("/events")
+        async def events():
+            last_event_id = quart.request.headers.get("Last-Event-ID")
+
+            async def generate():
+                with hub.subscribe(last_event_id) as subscriber:
+                    async for chunk in subscriber:
+                        yield chunk
+
+            return quart.Response(generate(), content_type="text/event-stream")
+
+        # 他のリクエストやバックグラウンドタスクから
+        hub.publish(pytilpack.sse.SSE(data="hello", event="update"))
+        ```
+
+    Args:
+        max_queue_size: 購読者ごとの未送信メッセージの最大数
+        policy: キューが満杯の購読者への対応方針
+        keepalive_interval: 購読者へメッセージが送信されない場合にコメント行を送信する間隔（秒）。Noneなら送信しない
+        replay_buffer: 再接続時の再送に使うバッファ。Noneなら再送しない
+        batch_size: 購読者の送信が追いついていない場合に、溜まったメッセージを連結して1回で返す最大件数
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        policy: SlowConsumerPolicy = "drop_oldest",
+        keepalive_interval: float | None = 15,
+        replay_buffer: "SSEReplayBuffer | None" = None,
+        batch_size: int = 1,
+    ) -> None:
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be >= 1")
+        if policy not in typing.get_args(SlowConsumerPolicy):
+            raise ValueError(f"Unknown policy: {policy}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.keepalive_interval = keepalive_interval
+        self.replay_buffer = replay_buffer
+        self.batch_size = batch_size
+        self.subscribers: set[SSESubscriber] = set()
+
+    def subscribe(self, last_event_id: str | None = None) -> "SSESubscriber":
+        """購読者を登録する。
+
+        返り値をwith文で使うと、ブロックを抜けたときに購読を解除する。
+
+        last_event_id を指定した場合、replay_buffer に残っているそれ以降のメッセージを
+        配信中のメッセージより先に返す。last_event_id がバッファに残っていない場合は
+        SSESubscriber.replay_missed がTrueになるため、必要に応じて状態全体を送り直す。
+
+        Args:
+            last_event_id: クライアントが最後に受信したメッセージのid（Last-Event-IDヘッダーの値）
+
+        Returns:
+            メッセージのbytesを返す非同期イテレーター
+        """
+        subscriber = SSESubscriber(self)
+        if last_event_id is not None:
+            replayed = None if self.replay_buffer is None else self.replay_buffer.replay(last_event_id)
+            if replayed is None:
+                subscriber.replay_missed = True
+            else:
+                # publish()と同じスレッドで呼ばれるため、再送と配信の間に取りこぼしは無い
+                subscriber.queue.extend((data, None) for data in replayed)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def publish(self, msg: str | SSE, key: str | None = None) -> int:
+        """全購読者へメッセージを配信する。
+
+        Args:
+            msg: 配信するメッセージ
+            key: policyが"coalesce"の場合に置き換え対象を判定するキー。Noneの場合はSSEのevent
+
+        Returns:
+            メッセージを積んだ購読者数
+        """
+        data = _encode(msg)
+        if isinstance(msg, SSE):
+            if key is None:
+                key = msg.event
+            if self.replay_buffer is not None and msg.id is not None:
+                self.replay_buffer.append(msg.id, data)
+        delivered = 0
+        # 配信中に切断された購読者が集合から外れるためコピーして回す
+        for subscriber in list(self.subscribers):
+            if subscriber.put(data, key):
+                delivered += 1
+        return delivered
+
+    def close(self) -> None:
+        """全購読者を切断する。未送信のメッセージは送信してから終了する。"""
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+
+
+class SSESubscriber:
+    """SSEHubの購読者。
+
+    非同期イテレーターとしてメッセージのbytesを返す。
+    SSEHub.subscribe()で生成する。
+
+    Args:
+        hub: 購読先のハブ
+    """
+
+    def __init__(self, hub: SSEHub) -> None:
+        self.hub = hub
+        self.queue: collections.deque[tuple[bytes, str | None]] = collections.deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+        """キューが満杯のため捨てたメッセージ数。"""
+        self.replay_missed = False
+        """Last-Event-IDが再送バッファに無く、再送できなかった場合True。"""
+
+    def __enter__(self) -> typing.Self:
+        """購読者自身を返す。"""
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        """購読を解除する。"""
+        del args  # noqa
+        self.close()
+
+    def __aiter__(self) -> typing.Self:
+        """購読者自身を返す。"""
+        return self
+
+    async def __anext__(self) -> bytes:
+        """次のメッセージを待って返す。一定時間メッセージが無ければキープアライブのコメント行を返す。"""
+        while not self.queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self.wakeup.clear()
+            try:
+                async with asyncio.timeout(self.hub.keepalive_interval):
+                    await self.wakeup.wait()
+            except TimeoutError:
+                return b": ping\n\n"
+        if self.hub.batch_size == 1 or len(self.queue) == 1:
+            return self.queue.popleft()[0]
+        # 送信が追いついていない場合は溜まったメッセージを連結して書き込み回数を減らす
+        return b"".join(self.queue.popleft()[0] for _ in range(min(self.hub.batch_size, len(self.queue))))
+
+    def put(self, data: bytes, key: str | None = None) -> bool:
+        """メッセージをキューへ積む。
+
+        Args:
+            data: シリアライズ済みのメッセージ
+            key: policyが"coalesce"の場合に置き換え対象を判定するキー
+
+        Returns:
+            積んだ場合True。切断済みまたは切断した場合False
+        """
+        if self.closed:
+            return False
+        if len(self.queue) >= self.hub.max_queue_size:
+            self.dropped += 1
+            if self.hub.policy == "disconnect":
+                logger.info(f"SSE送信キュー溢れのため切断 (queued={len(self.queue)})")
+                self.queue.clear()
+                self.close()
+                return False
+            if self.hub.policy == "coalesce" and key is not None:
+                for i, (_, queued_key) in enumerate(self.queue):
+                    if queued_key == key:
+                        del self.queue[i]
+                        break
+                else:
+                    self.queue.popleft()
+            else:
+                self.queue.popleft()
+        self.queue.append((data, key))
+        self.wakeup.set()
+        return True
+
+    def close(self) -> None:
+        """購読を解除する。キューに残ったメッセージは引き続き取得できる。"""
+        self.closed = True
+        self.hub.subscribers.discard(self)
+        self.wakeup.set()
+
+
+class SSEReplayBuffer:
+    """再接続時の再送用に、直近のシリアライズ済みSSEメッセージをidとともに保持するリングバッファ。
+
+    件数とバイト数の両方で上限を設け、超えた分は古い順に捨てる。
+    同じidが複数回追加された場合は最新のものを基準に再送する。
+
+    Args:
+        max_events: 保持する最大件数
+        max_bytes: 保持する最大バイト数
+    """
+
+    def __init__(self, max_events: int = 1000, max_bytes: int = 1024 * 1024) -> None:
+        if max_events < 1:
+            raise ValueError("max_events must be >= 1")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.entries: collections.deque[tuple[str, bytes]] = collections.deque()
+        self.num_bytes = 0
+        self.first_seq = 0
+        """entries[0]の通し番号。"""
+        self.seq_by_id: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """保持している件数を返す。"""
+        return len(self.entries)
+
+    def append(self, event_id: str, data: bytes) -> None:
+        """メッセージを追加する。
+
+        Args:
+            event_id: メッセージのid
+            data: シリアライズ済みのメッセージ
+        """
+        self.seq_by_id[event_id] = self.first_seq + len(self.entries)
+        self.entries.append((event_id, data))
+        self.num_bytes += len(data)
+        while len(self.entries) > self.max_events or (self.num_bytes > self.max_bytes and len(self.entries) > 1):
+            old_id, old_data = self.entries.popleft()
+            self.num_bytes -= len(old_data)
+            if self.seq_by_id.get(old_id) == self.first_seq:
+                del self.seq_by_id[old_id]
+            self.first_seq += 1
+
+    def replay(self, last_event_id: str) -> list[bytes] | None:
+        """指定したidより後のメッセージを返す。
+
+        Args:
+            last_event_id: クライアントが最後に受信したメッセージのid
+
+        Returns:
+            last_event_id より後のメッセージのリスト。last_event_id を保持していない場合はNone
+        """
+        seq = self.seq_by_id.get(last_event_id)
+        if seq is None:
+            return None
+        start = seq - self.first_seq + 1
+        return [data for _, data in itertools.islice(self.entries, start, None)]
+
+    def clear(self) -> None:
+        """保持しているメッセージを全て捨てる。"""
+        self.first_seq += len(self.entries)
+        self.entries.clear()
+        self.num_bytes = 0
+        self.seq_by_id.clear()
+
+
+def _encode(msg: str | SSE) -> bytes:
+    """メッセージをSSE形式のbytesへ変換する。"""
+    if isinstance(msg, SSE):
+        return msg.to_bytes()
+    # strの場合は念のため末尾の改行を保証
+    return (msg.rstrip("\n") + "\n\n").encode("utf-8")
@@ -0,0 +1,95 @@
+"""pytilpack.logging.capture_context()の処理時間計測。
+
+同時に実行中のキャプチャ数を変えながら、1レコードあたりのログ出力時間を計測する。
+比較用に、キャプチャごとにStreamHandlerとContextFilterを取り付ける旧実装も同じ条件で計測する。
+
+使用例::
+
+    uv run python scripts/bench_capture_context.py --captures 1 10 100
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import time
+import typing
+import uuid
+
+import pytilpack.logging
+
+
+def main() -> None:
+    """メイン処理。"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--captures", type=int, nargs="+", default=[1, 10, 100], help="同時に実行するキャプチャ数")
+    parser.add_argument("--records", type=int, default=100, help="キャプチャごとに出力するレコード数")
+    args = parser.parse_args()
+
+    variants: list[tuple[str, typing.Callable]] = [
+        ("legacy", _legacy_capture_context),
+        ("current", pytilpack.logging.capture_context),
+    ]
+    for num_captures in args.captures:
+        for name, capture_context in variants:
+            elapsed = asyncio.run(_measure(capture_context, num_captures, args.records))
+            per_record = elapsed / (num_captures * args.records)
+            print(f"captures={num_captures:>4} {name:>8}: {per_record * 1e6:,.1f} us/record")
+
+
+async def _measure(capture_context: typing.Callable, num_captures: int, num_records: int) -> float:
+    """num_captures 個のキャプチャを同時に開き、それぞれで num_records 件出力した合計時間（秒）を返す。"""
+    logger = logging.getLogger(f"bench_capture_context.{uuid.uuid4()}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    formatter = logging.Formatter("[%(levelname)s] %(message)s")
+    started = asyncio.Barrier(num_captures + 1)
+    finished = asyncio.Event()
+    elapsed: list[float] = []
+
+    async def task() -> None:
+        async with capture_context(logger, formatter, logging.INFO):
+            await started.wait()
+            await finished.wait()
+
+    async def measure() -> None:
+        await started.wait()
+        async with capture_context(logger, formatter, logging.INFO):
+            start = time.perf_counter()
+            for i in range(num_captures * num_records):
+                logger.info("message %d", i)
+            elapsed.append(time.perf_counter() - start)
+        finished.set()
+
+    await asyncio.gather(*(task() for _ in range(num_captures)), measure())
+    return elapsed[0]
+
+
+@contextlib.asynccontextmanager
+async def _legacy_capture_context(
+    target_logger: logging.Logger, formatter: logging.Formatter, level: int = logging.INFO
+) -> typing.AsyncGenerator[typing.Callable[[], str], None]:
+    """比較用の旧実装（キャプチャごとにStreamHandlerとContextFilterを取り付ける）。"""
+    context_id = str(uuid.uuid4())
+    var = pytilpack.logging._current_context_id  # pylint: disable=protected-access
+    token = var.set(context_id)
+    try:
+        buffer = io.StringIO()
+        handler = logging.StreamHandler(buffer)
+        handler.setFormatter(formatter)
+        handler.setLevel(level)
+        handler.addFilter(pytilpack.logging.ContextFilter(context_id))
+        target_logger.addHandler(handler)
+        try:
+            yield buffer.getvalue
+        finally:
+            target_logger.removeHandler(handler)
+            handler.close()
+            buffer.close()
+    finally:
+        var.reset(token)
+
+
+if __name__ == "__main__":
+    main()
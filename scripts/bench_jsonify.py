@@ -0,0 +1,114 @@
+"""pytilpack.logging.jsonify()の処理時間計測。
+
+大きな入れ子のペイロードを対象に、truncate_values()で複製してからjson.dumps()する
+従来の方式と、現在のjsonify()、orjsonを使う方式、
+要素数・全体サイズの上限を指定した場合（省略しながら1パスでJSON化する方式）を比較する。
+従来の方式は計測対象の変更の影響を受けないよう、当時の実装の複製を使う。
+
+orjsonで省略する場合（truncate=True）はtruncate_values()による複製が処理時間の大半を占めるため、
+省略しない場合（truncate=False）も併せて計測する。
+
+使用例::
+
+    uv run python scripts/bench_jsonify.py --items 10000
+"""
+
+import argparse
+import json
+import time
+import typing
+
+import pytilpack.logging
+import pytilpack.python
+
+
+def main() -> None:
+    """メイン処理。"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000, help="ペイロードのリスト要素数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（最良値を採用）")
+    args = parser.parse_args()
+
+    payload = _make_payload(args.items)
+    variants: list[tuple[str, typing.Callable[[typing.Any], str]]] = [
+        ("legacy", _legacy_jsonify),
+        ("current", pytilpack.logging.jsonify),
+        ("orjson", lambda data: pytilpack.logging.jsonify(data, encoder="orjson")),
+        ("orjson-raw", lambda data: pytilpack.logging.jsonify(data, truncate=False, encoder="orjson")),
+        ("budget", lambda data: pytilpack.logging.jsonify(data, max_items=100, max_total_size=100_000)),
+    ]
+    for name, func in variants:
+        elapsed = min(_measure(func, payload) for _ in range(args.repeat))
+        print(f"{name:>10}: {elapsed * 1000:,.1f} ms")
+
+
+def _make_payload(num_items: int) -> dict[str, typing.Any]:
+    """リクエスト/レスポンスのログを模した入れ子のペイロードを作成する。"""
+    return {
+        "model": "test",
+        "messages": [
+            {
+                "role": "user",
+                "content": f"message {i} " + "x" * 500,
+                "metadata": {"id": i, "tags": ["a", "b", "c"], "scores": [0.1, 0.2, 0.3, 0.4, 0.5]},
+                "attachment": b"\x00" * 200,
+            }
+            for i in range(num_items)
+        ],
+    }
+
+
+def _measure(func: typing.Callable[[typing.Any], str], payload: typing.Any) -> float:
+    """1回の処理時間（秒）を返す。"""
+    start = time.perf_counter()
+    func(payload)
+    return time.perf_counter() - start
+
+
+def _legacy_jsonify(data: typing.Any) -> str:
+    """比較用の従来方式（truncate_values()で複製してからjson.dumps()する）。"""
+    data = _legacy_truncate_values(data, bytes_to_str=True)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=pytilpack.logging._json_default)  # pylint: disable=protected-access
+
+
+def _legacy_truncate_values(
+    data: typing.Any,
+    max_str_len: int = 100,
+    max_bytes_len: int = 100,
+    bytes_to_str: bool = False,
+    max_num_list_len: int = 3,
+) -> typing.Any:
+    """比較用の旧実装のtruncate_values()（深さ・要素数・全体サイズの上限の追加前）。"""
+    data = pytilpack.python.pydantic_to_dict(data)
+
+    if isinstance(data, str):
+        if len(data) > max_str_len:
+            return data[:max_str_len] + "..."
+        return data
+    if isinstance(data, bytes):
+        if bytes_to_str:
+            decoded = data.decode("utf-8", errors="replace")
+            if len(decoded) > max_str_len:
+                return decoded[:max_str_len] + "..."
+            return decoded
+        if len(data) > max_bytes_len:
+            return data[:max_bytes_len] + b"..."
+        return data
+    if isinstance(data, dict):
+        return {
+            _legacy_truncate_values(k, max_str_len, max_bytes_len, bytes_to_str, max_num_list_len): _legacy_truncate_values(
+                v, max_str_len, max_bytes_len, bytes_to_str, max_num_list_len
+            )
+            for k, v in data.items()
+        }
+    if isinstance(data, list):
+        if len(data) > max_num_list_len and all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in data):
+            return [*data[:max_num_list_len], "..."]
+        return [_legacy_truncate_values(item, max_str_len, max_bytes_len, bytes_to_str, max_num_list_len) for item in data]
+    if isinstance(data, tuple):
+        return tuple(_legacy_truncate_values(item, max_str_len, max_bytes_len, bytes_to_str, max_num_list_len) for item in data)
+    return data
+
+
+if __name__ == "__main__":
+    main()
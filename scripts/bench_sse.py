@@ -0,0 +1,143 @@
+"""pytilpack.sse.generator()のスループット計測。
+
+キープアライブが発火しない高頻度ストリームで、1秒あたりに中継できるメッセージ数を計測する。
+比較用に、メッセージごとにタスク・shield・wait_forを使う旧実装も同じ条件で計測する。
+bytes出力（as_bytes=True）と連結（batch_size）の効果も併せて計測する。
+また、SSEインスタンスを1回だけ使う場合の生成とシリアライズの時間を旧実装と比較する。
+
+使用例::
+
+    uv run python scripts/bench_sse.py --messages 100000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import functools
+import re
+import time
+import timeit
+import typing
+
+import pytilpack.sse
+
+
+def main() -> None:
+    """メイン処理。"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000, help="1回の計測で送信するメッセージ数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数（最良値を採用）")
+    args = parser.parse_args()
+
+    variants: list[tuple[str, typing.Callable]] = [
+        ("legacy", _legacy_generator),
+        ("current", pytilpack.sse.generator),
+        ("bytes", functools.partial(pytilpack.sse.generator, as_bytes=True)),
+        ("batch16", functools.partial(pytilpack.sse.generator, as_bytes=True, batch_size=16)),
+    ]
+    for name, decorator in variants:
+        rate = max(asyncio.run(_measure(decorator, args.messages)) for _ in range(args.repeat))
+        print(f"{name:>8}: {rate:,.0f} messages/s")
+
+    # 1回だけ使うメッセージの生成+シリアライズ
+    sse_classes: list[tuple[str, typing.Callable]] = [("legacy", _LegacySSE), ("current", pytilpack.sse.SSE)]
+    for name, sse_class in sse_classes:
+        elapsed = min(timeit.repeat(functools.partial(_single_use, sse_class), number=100_000, repeat=args.repeat))
+        print(f"{name:>8}: {elapsed / 100_000 * 1e6:.2f} us/message (single use)")
+
+
+async def _measure(decorator: typing.Callable, num_messages: int) -> float:
+    """指定したデコレーターで num_messages 件を中継し、1秒あたりのメッセージ数を返す。"""
+
+    @decorator(interval=15)
+    async def generate() -> typing.AsyncGenerator[pytilpack.sse.SSE, None]:
+        msg = pytilpack.sse.SSE(data="x" * 64, event="update")
+        for _ in range(num_messages):
+            yield msg
+
+    start = time.perf_counter()
+    size = 0
+    async for chunk in generate():
+        size += len(chunk)
+    assert size == num_messages * len(pytilpack.sse.SSE(data="x" * 64, event="update").to_bytes())
+    return num_messages / (time.perf_counter() - start)
+
+
+def _single_use(sse_class: typing.Callable) -> str:
+    """SSEインスタンスを生成して1回だけシリアライズする。"""
+    return sse_class(data="x" * 64, event="update").to_str()
+
+
+@dataclasses.dataclass
+class _LegacySSE:
+    """比較用の旧実装のSSE（キャッシュ無し）。"""
+
+    data: str | None = None
+    event: str | None = None
+    id: str | None = None
+    retry: int | None = None
+    comment: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.data is None and self.comment is None:
+            raise ValueError("`data`と`comment`のいずれかを指定してください。")
+
+    def to_str(self) -> str:
+        lines = []
+        if self.event is not None:
+            lines.append(f"event: {self.event}")
+        if self.id is not None:
+            lines.append(f"id: {self.id}")
+        if self.retry is not None:
+            lines.append(f"retry: {self.retry}")
+        if self.comment is not None:
+            for line in re.split(r"\r\n|\r|\n", self.comment):
+                lines.append(f": {line}")
+        if self.data is not None:
+            for line in re.split(r"\r\n|\r|\n", self.data):
+                lines.append(f"data: {line}")
+        return "\n".join(lines) + "\n\n"
+
+
+def _legacy_generator(interval: float = 15) -> typing.Callable:
+    """比較用の旧実装（メッセージごとにタスク・shield・wait_forを使う）。"""
+
+    def decorator(func: typing.Callable) -> typing.Callable:
+        async def _anext(it: typing.AsyncIterator) -> typing.Any:
+            return await anext(it)
+
+        async def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.AsyncGenerator[str, None]:
+            loop = asyncio.get_running_loop()
+            last_msg_time = loop.time()
+            generator_ = func(*args, **kwargs)
+            try:
+                iterator = aiter(generator_)
+                next_task = loop.create_task(_anext(iterator))
+                try:
+                    while True:
+                        delay = interval - (loop.time() - last_msg_time)
+                        try:
+                            msg = await asyncio.wait_for(asyncio.shield(next_task), timeout=max(0.0, delay))
+                            yield str(msg)
+                            last_msg_time = loop.time()
+                            next_task = loop.create_task(_anext(iterator))
+                        except TimeoutError:
+                            yield ": ping\n\n"
+                            last_msg_time = loop.time()
+                        except StopAsyncIteration:
+                            break
+                finally:
+                    next_task.cancel()
+                    with contextlib.suppress(StopAsyncIteration, asyncio.CancelledError):
+                        await asyncio.shield(next_task)
+            finally:
+                await asyncio.shield(generator_.aclose())
+
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    main()
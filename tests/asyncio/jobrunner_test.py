@@ -1,7 +1,13 @@
 """テストコード。"""
 
 import asyncio
+import functools
+import multiprocessing
+import multiprocessing.queues
+import os
 import queue
+import signal
+import sys
 import threading
 import time
 import typing
@@ -196,3 +202,481 @@ async def test_job_runner_graceful_shutdown() -> None:
     assert jobs[0].status == "finished" and jobs[0].count == 1
     assert jobs[1].status == "finished" and jobs[1].count == 1
     assert jobs[2].status == "waiting" and jobs[2].count == 0
+
+
+@pytest.mark.asyncio
+async def test_job_runner_notify() -> None:
+    """notifyによる即時ポーリングのテスト。"""
+    # ポーリング間隔を長くしてnotifyなしでは拾えないようにする
+    runner = JobRunner(poll_interval=5.0)
+    job = CountingJob(sleep_time=0.0)
+
+    async def add_job_and_shutdown() -> None:
+        await asyncio.sleep(0.1)
+        runner.queue.put(job)
+        # 別スレッドからのnotify
+        await asyncio.to_thread(runner.notify)
+        await asyncio.sleep(0.2)
+        await runner.graceful_shutdown()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(runner.run(), add_job_and_shutdown())
+    elapsed_time = time.perf_counter() - start_time
+    assert elapsed_time < 1.0
+    assert job.status == "finished" and job.count == 1
+
+
+@pytest.mark.asyncio
+async def test_job_runner_backoff() -> None:
+    """アイドル時のポーリング間隔のバックオフのテスト。"""
+    poll_count = 0
+
+    class CountingRunner(JobRunner):
+        @typing.override
+        async def poll(self) -> pytilpack.asyncio.Job | None:
+            nonlocal poll_count
+            poll_count += 1
+            return await super().poll()
+
+    runner = CountingRunner(poll_interval=0.05, max_poll_interval=0.4)
+
+    async def shutdown_after() -> None:
+        await asyncio.sleep(1.0)
+        # 間隔が最大まで延びていること
+        assert runner.current_poll_interval == 0.4
+        # ジョブを取得したら最小間隔に戻ること
+        runner.queue.put(CountingJob(sleep_time=0.0))
+        runner.notify()
+        await asyncio.sleep(0.02)
+        assert runner.current_poll_interval == 0.05
+        runner.shutdown()
+
+    await asyncio.gather(runner.run(), shutdown_after())
+    # バックオフなし(0.05秒間隔)なら約20回となる
+    assert poll_count <= 10
+
+
+@pytest.mark.asyncio
+async def test_job_runner_poll_many() -> None:
+    """poll_manyによる一括取得のテスト。"""
+    requested: list[int] = []
+
+    class BatchRunner(pytilpack.asyncio.JobRunner):
+        def __init__(self) -> None:
+            super().__init__(max_job_concurrency=4, poll_interval=0.1)
+            self.jobs: list[pytilpack.asyncio.Job] = []
+
+        @typing.override
+        async def poll_many(self, n: int) -> list[pytilpack.asyncio.Job]:
+            requested.append(n)
+            jobs, self.jobs = self.jobs[:n], self.jobs[n:]
+            return jobs
+
+    runner = BatchRunner()
+    jobs = [CountingJob(sleep_time=0.2) for _ in range(6)]
+    runner.jobs.extend(jobs)
+
+    async def shutdown_after() -> None:
+        await asyncio.sleep(0.1)
+        # 空き枠の数だけまとめて取得され、同時に実行される
+        assert requested[0] == 4
+        assert len(runner.tasks) == 4
+        await asyncio.sleep(0.4)
+        await runner.graceful_shutdown()
+
+    await asyncio.gather(runner.run(), shutdown_after())
+    assert all(job.status == "finished" and job.count == 1 for job in jobs)
+
+
+@pytest.mark.asyncio
+async def test_job_runner_poll_many_default() -> None:
+    """poll_manyのデフォルト実装のテスト。"""
+    runner = JobRunner(max_job_concurrency=4)
+    for _ in range(3):
+        runner.queue.put(CountingJob())
+    jobs = await runner.poll_many(2)
+    assert len(jobs) == 2
+    jobs = await runner.poll_many(2)
+    assert len(jobs) == 1
+    assert await runner.poll_many(2) == []
+
+
+def test_job_runner_poll_not_implemented() -> None:
+    """poll()とpoll_many()のどちらも実装しない場合のテスト。"""
+
+    class NoPollRunner(pytilpack.asyncio.JobRunner):
+        pass
+
+    with pytest.raises(TypeError):
+        NoPollRunner()
+
+
+@pytest.mark.asyncio
+async def test_job_runner_poll_many_too_many(caplog: pytest.LogCaptureFixture) -> None:
+    """poll_manyが空き枠数を超えて返した場合のテスト。"""
+
+    class TooManyRunner(pytilpack.asyncio.JobRunner):
+        def __init__(self) -> None:
+            super().__init__(max_job_concurrency=2, poll_interval=0.05)
+            self.jobs: list[pytilpack.asyncio.Job] = []
+
+        @typing.override
+        async def poll_many(self, n: int) -> list[pytilpack.asyncio.Job]:
+            jobs, self.jobs = self.jobs, []
+            return jobs
+
+    runner = TooManyRunner()
+    jobs = [CountingJob(sleep_time=0.05) for _ in range(5)]
+    runner.jobs.extend(jobs)
+
+    async def shutdown_after() -> None:
+        await asyncio.sleep(0.4)
+        await runner.graceful_shutdown()
+
+    with caplog.at_level("ERROR"):
+        await asyncio.gather(runner.run(), shutdown_after())
+    # 超過分も実行枠が空き次第実行される
+    assert all(job.status == "finished" and job.count == 1 for job in jobs)
+    assert "poll_many(2)が5件のジョブを返しました。" in caplog.text
+    assert runner.semaphore._value == 2  # pylint: disable=protected-access
+
+
+class CategoryJob(CountingJob):
+    """種別・優先度を持つジョブ。"""
+
+    def __init__(self, order: list[str], name: str, category: str, priority: int = 0, sleep_time: float = 0.1) -> None:
+        super().__init__(sleep_time=sleep_time)
+        self.order = order
+        self.name = name
+        self.category = category
+        self.priority = priority
+
+    @typing.override
+    async def run(self) -> None:
+        self.order.append(self.name)
+        await super().run()
+
+
+@pytest.mark.asyncio
+async def test_job_runner_category_limits() -> None:
+    """種別ごとの同時実行数上限と優先度のテスト。"""
+    order: list[str] = []
+
+    class BatchRunner(pytilpack.asyncio.JobRunner):
+        def __init__(self) -> None:
+            super().__init__(max_job_concurrency=4, poll_interval=0.05, category_limits={"bulk": 1})
+            self.jobs: list[pytilpack.asyncio.Job] = []
+
+        @typing.override
+        async def poll_many(self, n: int) -> list[pytilpack.asyncio.Job]:
+            jobs, self.jobs = self.jobs[:n], self.jobs[n:]
+            return jobs
+
+    runner = BatchRunner()
+    runner.jobs.extend(
+        [
+            CategoryJob(order, "bulk0", "bulk", priority=0, sleep_time=0.2),
+            CategoryJob(order, "bulk1", "bulk", priority=0, sleep_time=0.2),
+            CategoryJob(order, "bulk2", "bulk", priority=5, sleep_time=0.2),
+        ]
+    )
+    assert runner.category_capacity("bulk") == 1
+    assert runner.category_capacity("interactive") is None
+
+    async def check_and_shutdown() -> None:
+        await asyncio.sleep(0.1)
+        # bulkは1件ずつしか実行されず、残りは待機する
+        assert runner.category_running["bulk"] == 1
+        assert runner.category_capacity("bulk") == 0
+        # bulkが待機していても他の種別は実行される
+        interactive = CategoryJob(order, "interactive", "interactive", sleep_time=0.0)
+        runner.jobs.append(interactive)
+        runner.notify()
+        await asyncio.sleep(0.05)
+        assert interactive.status == "finished"
+        await asyncio.sleep(0.6)
+        await runner.graceful_shutdown()
+
+    await asyncio.gather(runner.run(), check_and_shutdown())
+    # bulkは優先度順・取得順に実行される
+    assert order == ["bulk2", "interactive", "bulk0", "bulk1"]
+
+
+@pytest.mark.parametrize("batch", [False, True])
+@pytest.mark.asyncio
+async def test_job_runner_category_backlog(batch: bool) -> None:
+    """上限のある種別のジョブがmax_pendingを超えて溜まっていても、取得元で除外すれば他の種別のジョブが実行されることのテスト。"""
+    order: list[str] = []
+
+    class FilteringRunner(pytilpack.asyncio.JobRunner):
+        def __init__(self) -> None:
+            super().__init__(max_job_concurrency=4, poll_interval=0.05, category_limits={"bulk": 1}, max_pending=2)
+            self.jobs: list[pytilpack.asyncio.Job] = []
+
+        def _take(self, n: int) -> list[pytilpack.asyncio.Job]:
+            # `WHERE category NOT IN (...)` 相当の絞り込み
+            saturated = self.saturated_categories()
+            jobs = [job for job in self.jobs if job.category not in saturated][:n]
+            self.jobs = [job for job in self.jobs if job not in jobs]
+            return jobs
+
+        @typing.override
+        async def poll(self) -> pytilpack.asyncio.Job | None:
+            jobs = self._take(1)
+            return jobs[0] if len(jobs) > 0 else None
+
+        @typing.override
+        async def poll_many(self, n: int) -> list[pytilpack.asyncio.Job]:
+            if not batch:
+                return await super().poll_many(n)
+            return self._take(n)
+
+    runner = FilteringRunner()
+    bulk_jobs = [CategoryJob(order, f"bulk{i}", "bulk", sleep_time=0.05) for i in range(10)]
+    interactive = CategoryJob(order, "interactive", "interactive", sleep_time=0.0)
+    runner.jobs.extend([*bulk_jobs, interactive])
+
+    async def check_and_shutdown() -> None:
+        await asyncio.sleep(0.1)
+        # bulkの実行を待たずに、空いている実行枠でinteractiveが実行される
+        assert interactive.status == "finished"
+        assert runner.category_running["bulk"] == 1
+        assert runner.saturated_categories() == {"bulk"}
+        await asyncio.sleep(1.5)
+        await runner.graceful_shutdown()
+
+    await asyncio.gather(runner.run(), check_and_shutdown())
+    assert all(job.status == "finished" for job in bulk_jobs)
+    assert order.index("interactive") <= 1
+
+
+@pytest.mark.parametrize("batch", [False, True])
+@pytest.mark.asyncio
+async def test_job_runner_category_backlog_bounded(batch: bool) -> None:
+    """取得元が上限のある種別のジョブしか返さない場合に、取得数がmax_pendingで抑えられることのテスト。"""
+    order: list[str] = []
+
+    class BulkRunner(pytilpack.asyncio.JobRunner):
+        def __init__(self) -> None:
+            super().__init__(max_job_concurrency=4, poll_interval=0.05, category_limits={"bulk": 1}, max_pending=2)
+            self.num_polled = 0
+
+        @typing.override
+        async def poll(self) -> pytilpack.asyncio.Job | None:
+            self.num_polled += 1
+            return CategoryJob(order, f"bulk{self.num_polled}", "bulk", sleep_time=1.0)
+
+        @typing.override
+        async def poll_many(self, n: int) -> list[pytilpack.asyncio.Job]:
+            if not batch:
+                return await super().poll_many(n)
+            return [job for job in [await self.poll() for _ in range(n)] if job is not None]
+
+    runner = BulkRunner()
+
+    async def check_and_shutdown() -> None:
+        await asyncio.sleep(0.2)
+        # 実行中1件 + 実行待ちは max_pending + 空き枠数(3) まで
+        assert runner.category_running["bulk"] == 1
+        assert runner.num_pending <= 2 + 3
+        assert runner.num_polled == 1 + runner.num_pending
+        runner.shutdown()
+
+    await asyncio.gather(runner.run(), check_and_shutdown())
+    assert runner.num_pending == 0
+    assert runner.canceled_count == runner.num_polled
+
+
+@pytest.mark.asyncio
+async def test_job_runner_category_weights() -> None:
+    """種別ごとの重み付き公平スケジューリングのテスト。"""
+    order: list[str] = []
+    runner = JobRunner(max_job_concurrency=3, category_weights={"x": 2.0})
+    for i in range(3):
+        runner._push_pending(CategoryJob(order, f"x{i}", "x", sleep_time=0.0))  # pylint: disable=protected-access
+        runner._push_pending(CategoryJob(order, f"y{i}", "y", sleep_time=0.0))  # pylint: disable=protected-access
+    for _ in range(3):
+        await runner.semaphore.acquire()
+    # 空き3枠を重み2:1で分け合う
+    assert runner._dispatch(3) == 3  # pylint: disable=protected-access
+    assert runner.category_running == {"x": 2, "y": 1}
+    await asyncio.gather(*runner.tasks)
+    assert sorted(order) == ["x0", "x1", "y0"]
+    assert runner.category_running == {"x": 0, "y": 0}
+
+
+@pytest.mark.asyncio
+async def test_job_runner_cancel_pending() -> None:
+    """停止時に待機中のジョブがキャンセル扱いになることのテスト。"""
+    order: list[str] = []
+    runner = JobRunner(poll_interval=0.05, category_limits={"bulk": 1})
+    jobs = [CategoryJob(order, f"bulk{i}", "bulk", sleep_time=0.2) for i in range(2)]
+    for job in jobs:
+        runner.queue.put(job)
+
+    async def shutdown_after() -> None:
+        await asyncio.sleep(0.1)
+        await runner.graceful_shutdown()
+
+    await asyncio.gather(runner.run(), shutdown_after())
+    assert jobs[0].status == "finished"
+    assert jobs[1].status == "canceled" and jobs[1].count == 0
+
+
+@pytest.mark.asyncio
+async def test_job_runner_timeout() -> None:
+    """ジョブのタイムアウトのテスト。"""
+
+    class TimeoutErrorJob(pytilpack.asyncio.Job):
+        """Job.run()内で発生したTimeoutErrorはエラー扱い。"""
+
+        @typing.override
+        async def run(self) -> None:
+            raise TimeoutError("job error")
+
+    runner = JobRunner(job_timeout=0.2)
+    long_job = CountingJob(sleep_time=3.0)
+    short_job = CountingJob(sleep_time=0.0)
+    override_job = CountingJob(sleep_time=0.3)
+    override_job.timeout = 1.0  # ジョブ単位の指定が優先される
+    error_job = TimeoutErrorJob()
+    for job in (long_job, short_job, override_job, error_job):
+        runner.queue.put(job)
+
+    async def shutdown_after() -> None:
+        await asyncio.sleep(0.6)
+        await runner.graceful_shutdown()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(runner.run(), shutdown_after())
+    assert time.perf_counter() - start_time < 1.0
+    assert long_job.status == "canceled" and long_job.count == 0
+    assert short_job.status == "finished"
+    assert override_job.status == "finished"
+    assert error_job.status == "errored"
+
+    stats = runner.stats()
+    assert stats.finished == 2
+    assert stats.errored == 1
+    assert stats.canceled == 1
+    assert stats.timed_out == 1
+    assert stats.running == 0
+    assert stats.throughput > 0
+    assert stats.wait_time.count == 4
+    assert stats.run_time.count == 4
+    assert 0.2 <= stats.run_time.max < 0.5
+    assert stats.run_time.p50 <= stats.run_time.p95 <= stats.run_time.max
+
+
+class QueueJob(pytilpack.asyncio.Job):
+    """実行結果をプロセス間キューへ送るジョブ。"""
+
+    def __init__(self, job_id: int, results: multiprocessing.queues.Queue) -> None:
+        super().__init__()
+        self.job_id = job_id
+        self.results = results
+
+    @typing.override
+    async def run(self) -> None:
+        if self.job_id < 0:
+            os._exit(1)  # ワーカープロセスの異常終了を模擬
+        if self.job_id >= 1000:
+            # 時間のかかるジョブ。開始したことを通知する
+            self.results.put((-self.job_id, os.getpid()))
+            await asyncio.sleep(0.5)
+        await asyncio.sleep(0.01)
+        self.results.put((self.job_id, os.getpid()))
+
+
+class QueueJobRunner(pytilpack.asyncio.JobRunner):
+    """プロセス間キューからジョブを取得するJobRunner。"""
+
+    def __init__(self, jobs: multiprocessing.queues.Queue, results: multiprocessing.queues.Queue) -> None:
+        super().__init__(max_job_concurrency=2, poll_interval=0.05)
+        self.jobs = jobs
+        self.results = results
+
+    @typing.override
+    async def poll(self) -> pytilpack.asyncio.Job | None:
+        try:
+            # Queue.get_nowaitはプロセス間で同じ要素を二重に返さない
+            return QueueJob(self.jobs.get_nowait(), self.results)
+        except queue.Empty:
+            return None
+
+
+def _make_queue_job_runner(jobs: multiprocessing.queues.Queue, results: multiprocessing.queues.Queue) -> QueueJobRunner:
+    return QueueJobRunner(jobs, results)
+
+
+def test_job_runner_supervisor() -> None:
+    """JobRunnerSupervisorのテスト。"""
+    context = multiprocessing.get_context("spawn")
+    jobs: multiprocessing.queues.Queue = context.Queue()
+    results: multiprocessing.queues.Queue = context.Queue()
+    supervisor = pytilpack.asyncio.JobRunnerSupervisor(
+        functools.partial(_make_queue_job_runner, jobs, results),
+        num_workers=2,
+        restart_delay=0.1,
+        shutdown_timeout=10.0,
+        mp_context="spawn",
+        monitor_interval=0.05,
+        handle_signals=False,
+    )
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+    try:
+        # ワーカーを1つ異常終了させ、再起動されるまで待つ
+        jobs.put(-1)
+        deadline = time.monotonic() + 30.0
+        while supervisor.restart_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert supervisor.restart_count == 1
+        # 再起動後も全ジョブが処理される
+        for i in range(10):
+            jobs.put(i)
+        received = [results.get(timeout=30) for _ in range(10)]
+        assert sorted(job_id for job_id, _ in received) == list(range(10))
+    finally:
+        supervisor.graceful_shutdown()
+        thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert all(process.exitcode == 0 for process in supervisor.processes)
+    jobs.close()
+    results.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGTERMによる終了処理はPOSIXのみ")
+def test_job_runner_supervisor_sigterm() -> None:
+    """ワーカープロセスがSIGTERMで実行中のジョブの完了を待って終了することのテスト。"""
+    context = multiprocessing.get_context("spawn")
+    jobs: multiprocessing.queues.Queue = context.Queue()
+    results: multiprocessing.queues.Queue = context.Queue()
+    supervisor = pytilpack.asyncio.JobRunnerSupervisor(
+        functools.partial(_make_queue_job_runner, jobs, results),
+        num_workers=1,
+        restart_delay=0.1,
+        shutdown_timeout=10.0,
+        mp_context="spawn",
+        monitor_interval=0.05,
+        handle_signals=False,
+    )
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+    try:
+        jobs.put(1000)
+        job_id, pid = results.get(timeout=30)
+        assert job_id == -1000
+        os.kill(pid, signal.SIGTERM)
+        # 実行中のジョブは完了する
+        assert results.get(timeout=30) == (1000, pid)
+        # 正常終了したワーカーは再起動されず、全ワーカーが終了したのでrun()から戻る
+        thread.join(timeout=30)
+        assert not thread.is_alive()
+        assert supervisor.restart_count == 0
+        assert supervisor.processes[0].exitcode == 0
+    finally:
+        supervisor.graceful_shutdown()
+        thread.join(timeout=30)
+    jobs.close()
+    results.close()
@@ -1,6 +1,9 @@
 """テストコード。"""
 
 import asyncio
+import threading
+import time
+import typing
 
 import pytest
 
@@ -39,6 +42,186 @@ def test_thread_pool_map() -> None:
         assert results == [1, 3, 5, 7, 9]
 
 
+async def _thread_name() -> str:
+    """実行スレッド名を返す。"""
+    return threading.current_thread().name
+
+
+async def _wait_event(event: threading.Event) -> None:
+    """イベントがセットされるまで待機する。"""
+    while not event.is_set():
+        await asyncio.sleep(0.01)
+
+
+def _wait_until(predicate: typing.Callable[[], bool], timeout: float = 1.0) -> bool:
+    """predicate()がTrueになるまで待機する。
+
+    Future.result()から戻った時点ではワーカー側の完了処理が終わっていない場合があるため、
+    統計情報などを確認する前に使う。
+    """
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_thread_pool_least_loaded() -> None:
+    """dispatch="least_loaded"のテスト。"""
+    with pytilpack.asyncio.threadpool.ThreadPool(max_workers=2) as pool:
+        event = threading.Event()
+        slow = pool.submit(_wait_event(event))
+        busy = [w for w in pool.workers if w.in_flight == 1]
+        assert len(busy) == 1
+        # 実行中のワーカーを避けて送信される
+        names = {pool.submit(_thread_name()).result(timeout=1) for _ in range(4)}
+        assert names == {w.name for w in pool.workers if w is not busy[0]}
+        event.set()
+        slow.result(timeout=1)
+        assert _wait_until(lambda: all(w.in_flight == 0 for w in pool.workers))
+
+
+def test_thread_pool_round_robin() -> None:
+    """dispatch="round_robin"のテスト。"""
+    with pytilpack.asyncio.threadpool.ThreadPool(max_workers=2, dispatch="round_robin") as pool:
+        event = threading.Event()
+        slow = pool.submit(_wait_event(event))
+        # 負荷によらず順番に送信される
+        names = [pool.submit(_thread_name()).result(timeout=1) for _ in range(2)]
+        assert names == ["aloop-1", "aloop-0"]
+        event.set()
+        slow.result(timeout=1)
+
+    with pytest.raises(ValueError):
+        pytilpack.asyncio.threadpool.ThreadPool(max_workers=2, dispatch="invalid")  # type: ignore[arg-type]
+
+
+def test_thread_pool_submit_key() -> None:
+    """ThreadPool.submit(key=...)のテスト。"""
+    with pytilpack.asyncio.threadpool.ThreadPool(max_workers=4) as pool:
+        for key in ("a", "b", 123):
+            names = {pool.submit(_thread_name(), key=key).result(timeout=1) for _ in range(5)}
+            assert len(names) == 1
+
+
+async def _fail() -> None:
+    """例外を送出する。"""
+    raise ValueError("test")
+
+
+async def _block(seconds: float, started: threading.Event | None = None) -> None:
+    """イベントループをブロックする。"""
+    if started is not None:
+        started.set()
+    time.sleep(seconds)
+
+
+def test_thread_pool_stats() -> None:
+    """ThreadPool.statsのテスト。"""
+    with pytilpack.asyncio.threadpool.ThreadPool(max_workers=2) as pool:
+        pool.submit(_async_add(1, 2), key="k").result(timeout=1)
+        with pytest.raises(ValueError):
+            pool.submit(_fail(), key="k").result(timeout=1)
+        assert _wait_until(lambda: all(s.in_flight == 0 for s in pool.stats()))
+        stats = pool.stats()
+        assert len(stats) == 2
+        assert sum(s.completed for s in stats) == 1
+        assert sum(s.failed for s in stats) == 1
+        assert all(s.queued == 0 for s in stats)
+
+
+def test_thread_pool_loop_lag() -> None:
+    """ループ遅延の計測とフックのテスト。"""
+    lags: list[tuple[str, float]] = []
+    with pytilpack.asyncio.threadpool.ThreadPool(
+        max_workers=1, loop_lag_threshold=0.1, on_loop_lag=lambda name, lag: lags.append((name, lag))
+    ) as pool:
+        started = threading.Event()
+        blocking = pool.submit(_block(0.3, started))
+        assert started.wait(timeout=1)  # ブロック開始を待つ
+        pool.submit(_async_add(1, 2)).result(timeout=1)
+        blocking.result(timeout=1)
+        (stats,) = pool.stats()
+        assert stats.max_loop_lag >= 0.1
+        # ブロックしているコルーチン自身の実行時間はループ遅延に含めない
+        assert len(lags) == 1
+        assert lags[0][0] == "aloop-0"
+        assert lags[0][1] >= 0.1
+
+
+def test_thread_pool_dynamic() -> None:
+    """ワーカー数の動的な増減のテスト。"""
+    with pytilpack.asyncio.threadpool.ThreadPool(max_workers=3, min_workers=1, scale_up_queued=1, idle_timeout=0.2) as pool:
+        assert len(pool.workers) == 1
+        # 待機しているだけのコルーチンではワーカーは追加されない
+        event = threading.Event()
+        waiting = []
+        for _ in range(4):
+            waiting.append(pool.submit(_wait_event(event)))
+            assert _wait_until(lambda: pool.workers[0].queued == 0)  # 受け付けを待つ
+        assert len(pool.workers) == 1
+        event.set()
+        for f in waiting:
+            f.result(timeout=1)
+        # イベントループがブロックされて受け付け待ちのコルーチンが溜まるとmax_workersまで追加される
+        futures = []
+        for _ in range(6):
+            futures.append(pool.submit(_block(0.2)))
+            time.sleep(0.02)  # ブロック開始を待つ
+        assert len(pool.workers) == 3
+        for f in futures:
+            f.result(timeout=3)
+        # アイドル状態が続いたワーカーはmin_workersまで停止する
+        deadline = time.monotonic() + 3.0
+        while len(pool.workers) > 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(pool.workers) == 1
+        assert pool.submit(_async_add(1, 2)).result(timeout=1) == 3
+
+    with pytest.raises(ValueError):
+        pytilpack.asyncio.threadpool.ThreadPool(max_workers=2, min_workers=3)
+
+
+def test_thread_pool_long_running() -> None:
+    """実行中のコルーチンは受け付け待ちに数えず、ワーカーを追加しないことのテスト。"""
+    with pytilpack.asyncio.threadpool.ThreadPool(max_workers=2, min_workers=1, scale_up_queued=1) as pool:
+        started = threading.Event()
+        blocking = pool.submit(_block(0.3, started))
+        assert started.wait(timeout=1)
+        # 実行を開始したコルーチンは受け付け済み
+        (stats,) = pool.stats()
+        assert stats.queued == 0
+        assert stats.in_flight == 1
+        assert stats.max_loop_lag < 0.1
+        # ブロック中に送信したコルーチンは受け付け待ちになるが、送信時点では全ワーカーが詰まっていないため追加しない
+        future = pool.submit(_async_add(1, 2))
+        assert len(pool.workers) == 1
+        assert pool.stats()[0].queued == 1
+        blocking.result(timeout=1)
+        assert future.result(timeout=1) == 3
+        assert _wait_until(lambda: pool.stats()[0].in_flight == 0)
+        assert pool.stats()[0].queued == 0
+
+
+def test_thread_pool_resize() -> None:
+    """ThreadPool.resizeのテスト。"""
+    with pytilpack.asyncio.threadpool.ThreadPool(max_workers=2, min_workers=1, scale_up_queued=None) as pool:
+        pool.resize(5)  # max_workersに丸められる
+        assert len(pool.workers) == 2
+        event = threading.Event()
+        futures = [pool.submit(_wait_event(event)) for _ in range(2)]
+        # 実行中のワーカーも実行中のコルーチンの完了後に停止する
+        pool.resize(1)
+        assert len(pool.workers) == 1
+        (retired,) = pool.retiring
+        assert not retired.stopped.is_set()
+        event.set()
+        for f in futures:
+            f.result(timeout=1)
+        assert retired.stopped.wait(timeout=1)
+
+
 def test_thread_pool_shutdown() -> None:
     """ThreadPool.shutdownのテスト。"""
     pool = pytilpack.asyncio.threadpool.ThreadPool(max_workers=2)
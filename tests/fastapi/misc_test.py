@@ -8,6 +8,7 @@ import pydantic
 import pytest
 
 import pytilpack.fastapi
+import pytilpack.metrics
 
 
 class _Item(pydantic.BaseModel):
@@ -77,3 +78,19 @@ def test_json_response_pydantic_model(client: fastapi.testclient.TestClient) ->
 
     data = json.loads(text)
     assert data == {"name": "test", "value": 123}
+
+
+def test_metrics_response() -> None:
+    """metrics_responseのテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    registry.counter("test_total").inc()
+    app = fastapi.FastAPI()
+
+    @app.get("/metrics")
+    def metrics():
+        return pytilpack.fastapi.metrics_response(registry)
+
+    response = fastapi.testclient.TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == pytilpack.metrics.CONTENT_TYPE
+    assert response.text == "# TYPE test_total counter\ntest_total 1.0\n"
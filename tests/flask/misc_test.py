@@ -7,6 +7,7 @@ import httpx
 
 import pytilpack.flask
 import pytilpack.flask.misc
+import pytilpack.metrics
 
 
 def test_static_url_for(tmp_path: pathlib.Path) -> None:
@@ -154,3 +155,19 @@ def test_prefer_markdown() -> None:
         headers={"Accept": "text/plain;q=0.7, */*;q=0.6"},
     ):
         assert pytilpack.flask.prefer_markdown() is True
+
+
+def test_metrics_response() -> None:
+    """metrics_responseのテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    registry.counter("test_total").inc()
+    app = flask.Flask(__name__)
+
+    @app.route("/metrics")
+    def metrics():
+        return pytilpack.flask.metrics_response(registry)
+
+    response = app.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type == pytilpack.metrics.CONTENT_TYPE
+    assert response.get_data(as_text=True) == "# TYPE test_total counter\ntest_total 1.0\n"
@@ -2,6 +2,7 @@
 
 import asyncio
 import datetime
+import threading
 import time
 
 import pytest
@@ -157,3 +158,175 @@ async def test_run_misc() -> None:
     now = datetime.datetime(2024, 1, 1, 12, 30, 0)
     result = await pytilpack.healthcheck.run([], now=now, start_time=start)
     assert result["uptime"] == str(now - start)
+
+
+@pytest.mark.asyncio
+async def test_run_timeout() -> None:
+    """run関数のタイムアウトのテスト。"""
+    checks = [
+        pytilpack.healthcheck.make_entry("slow", mock_slow_check),
+        pytilpack.healthcheck.make_entry("fast", mock_success_check),
+    ]
+    result = await pytilpack.healthcheck.run(checks, timeout=0.05)
+    assert result["status"] == "fail"
+    details = result.get("details")
+    assert details is not None
+    assert details["slow"]["status"] == "fail"
+    assert details["slow"].get("error") == "TimeoutError: 0.05秒以内に完了しませんでした"
+    assert details["fast"]["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cached_entry() -> None:
+    """cached_entryのキャッシュと同時実行の集約のテスト。"""
+    calls = 0
+    fail = False
+
+    async def check() -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        if fail:
+            raise ValueError("テストエラー")
+
+    name, checker = pytilpack.healthcheck.cached_entry(pytilpack.healthcheck.make_entry("db", check), ttl=3600)
+    assert name == "db"
+    assert isinstance(checker, pytilpack.healthcheck.CachedChecker)
+
+    # 同時に呼ばれても実行は1回
+    results = await asyncio.gather(*(pytilpack.healthcheck.run([(name, checker)]) for _ in range(10)))
+    assert all(r["status"] == "ok" for r in results)
+    assert calls == 1
+
+    # TTL内はキャッシュを返す
+    fail = True
+    assert (await pytilpack.healthcheck.run([(name, checker)]))["status"] == "ok"
+    assert calls == 1
+
+    # TTL切れで再実行し、失敗もキャッシュする
+    checker.expires_at = 0
+    for _ in range(3):
+        result = await pytilpack.healthcheck.run([(name, checker)])
+        details = result.get("details")
+        assert details is not None
+        assert details["db"].get("error") == "ValueError: テストエラー"
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_entry_timeout_and_refresh() -> None:
+    """cached_entryのタイムアウトとバックグラウンド更新のテスト。"""
+    calls = 0
+    delay = 0.0
+
+    async def check() -> None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(delay)
+
+    _, checker = pytilpack.healthcheck.cached_entry(
+        pytilpack.healthcheck.make_entry("db", check), ttl=3600, timeout=0.05, refresh_interval=0.01
+    )
+    assert isinstance(checker, pytilpack.healthcheck.CachedChecker)
+    try:
+        await checker()
+        assert calls == 1
+
+        # 依存先が応答しなくなってもバックグラウンドで更新され、呼び出しは直近の結果を即座に返す
+        delay = 1.0
+        deadline = time.monotonic() + 10
+        while checker.error is None and time.monotonic() < deadline:
+            start = time.perf_counter()
+            await checker()
+            assert time.perf_counter() - start < 0.05
+            await asyncio.sleep(0.01)
+        assert isinstance(checker.error, TimeoutError)
+        with pytest.raises(TimeoutError):
+            await checker()
+        assert calls >= 2
+    finally:
+        await checker.aclose()
+
+
+@pytest.mark.asyncio
+async def test_run_max_concurrency() -> None:
+    """run関数の同時実行数の上限と同期関数用スレッドプールのテスト。"""
+    running = 0
+    max_running = 0
+    thread_names: list[str] = []
+
+    async def check() -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    def sync_check() -> None:
+        thread_names.append(threading.current_thread().name)
+
+    checks = [pytilpack.healthcheck.make_entry(f"test{i}", check) for i in range(6)]
+    checks.append(pytilpack.healthcheck.make_entry("sync", sync_check))
+    result = await pytilpack.healthcheck.run(checks, max_concurrency=2)
+    assert result["status"] == "ok"
+    assert max_running == 2
+    assert len(thread_names) == 1 and thread_names[0].startswith("healthcheck")
+
+
+@pytest.mark.asyncio
+async def test_sync_check_executor() -> None:
+    """同期関数用スレッドプールのスレッド数の変更と停止のテスト。"""
+    executor = pytilpack.healthcheck.sync_check_executor
+    thread_names: set[str] = set()
+
+    def sync_check() -> None:
+        thread_names.add(threading.current_thread().name)
+        time.sleep(0.01)
+
+    checks = [pytilpack.healthcheck.make_entry(f"sync{i}", sync_check) for i in range(4)]
+    try:
+        executor.set_max_workers(1)
+        result = await pytilpack.healthcheck.run(checks)
+        assert result["status"] == "ok"
+        assert len(thread_names) == 1
+        # 停止後は次の実行時に作り直す
+        pool = executor.get()
+        executor.shutdown()
+        assert executor.get() is not pool
+        executor.set_max_workers(4)
+        thread_names.clear()
+        result = await pytilpack.healthcheck.run(checks)
+        assert result["status"] == "ok"
+        assert len(thread_names) > 1
+    finally:
+        executor.set_max_workers(4)
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_critical() -> None:
+    """run関数の重要なヘルスチェックの段階実行のテスト。"""
+    # 重要なヘルスチェックが失敗した場合は残りを実行しない
+    checks = [
+        pytilpack.healthcheck.make_entry("cache", mock_success_check),
+        pytilpack.healthcheck.make_entry("database", mock_fail_check),
+    ]
+    result = await pytilpack.healthcheck.run(checks, critical=["database"])
+    assert result["status"] == "fail"
+    details = result.get("details")
+    assert details is not None
+    assert list(details) == ["cache", "database"]
+    assert details["database"]["status"] == "fail"
+    assert details["cache"] == {"status": "skipped", "response_time_ms": 0}
+
+    # 重要でないヘルスチェックの失敗は全体のstatusに影響しない
+    checks = [
+        pytilpack.healthcheck.make_entry("cache", mock_fail_check),
+        pytilpack.healthcheck.make_entry("database", mock_success_check),
+    ]
+    result = await pytilpack.healthcheck.run(checks, critical=["database"])
+    assert result["status"] == "ok"
+    details = result.get("details")
+    assert details is not None
+    assert details["cache"]["status"] == "fail"
+    assert details["database"]["status"] == "ok"
@@ -2,8 +2,12 @@
 
 import asyncio
 import datetime
+import json
 import logging
 import pathlib
+import sys
+import threading
+import time
 import typing
 
 import pytest
@@ -38,6 +42,67 @@ def test_logging(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture) -> None:
             handler.close()
 
 
+def test_queue_handler(tmp_path: pathlib.Path) -> None:
+    """queue_handlerのテスト。"""
+    logger = logging.getLogger(f"{__name__}.queue_handler")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = pytilpack.logging.queue_handler(
+        pytilpack.logging.file_handler(tmp_path / "test.log", level=logging.INFO),
+        pytilpack.logging.file_handler(tmp_path / "debug.log"),
+    )
+    assert handler.level == logging.DEBUG
+    logger.addHandler(handler)
+    try:
+        logger.debug("debug")
+        logger.info("info %s", "arg")
+        handler.flush()
+        assert (tmp_path / "test.log").read_text(encoding="utf-8") == "[INFO ] info arg\n"
+        logger.warning("warning")
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    # close()でキューに残ったレコードも出力される
+    assert (tmp_path / "test.log").read_text(encoding="utf-8") == "[INFO ] info arg\n[WARNING] warning\n"
+    assert (tmp_path / "debug.log").read_text(encoding="utf-8") == "[DEBUG] debug\n[INFO ] info arg\n[WARNING] warning\n"
+    handler.close()  # 2回目は何もしない
+
+
+@pytest.mark.parametrize(
+    "overflow,expected",
+    [("drop_new", ["0", "1"]), ("drop_oldest", ["2", "3"])],
+)
+def test_queue_handler_overflow(
+    overflow: pytilpack.logging.QueueOverflowPolicy, expected: list[str], capsys: pytest.CaptureFixture
+) -> None:
+    """queue_handlerのキュー溢れ時のテスト。"""
+    started = threading.Event()
+    release = threading.Event()
+    messages: list[str] = []
+
+    class BlockingHandler(logging.Handler):
+        """最初のレコードで出力を止めるハンドラ。"""
+
+        def emit(self, record: logging.LogRecord) -> None:
+            if record.getMessage() == "block":
+                started.set()
+                release.wait(10)
+            else:
+                messages.append(record.getMessage())
+
+    handler = pytilpack.logging.queue_handler(BlockingHandler(), max_queue_size=2, overflow=overflow)
+    record_logger = logging.getLogger(f"{__name__}.queue_handler_overflow")
+    handler.handle(record_logger.makeRecord(record_logger.name, logging.INFO, __file__, 0, "block", (), None))
+    assert started.wait(10)
+    for i in range(4):
+        handler.handle(record_logger.makeRecord(record_logger.name, logging.INFO, __file__, 0, str(i), (), None))
+    assert handler.dropped == 2
+    release.set()
+    handler.close()
+    assert messages == expected
+    assert "ログキュー溢れのため破棄: 2件" in capsys.readouterr().err
+
+
 def test_timer(caplog: pytest.LogCaptureFixture) -> None:
     """timerコンテキストマネージャの成功・失敗テスト。"""
     # 成功時: INFOレベルで "done" と出力
@@ -57,6 +122,64 @@ def test_timer(caplog: pytest.LogCaptureFixture) -> None:
     assert caplog.record_tuples == [("pytilpack.logging", logging.WARNING, "[test] failed in 0 s")]
 
 
+def test_timer_registry(caplog: pytest.LogCaptureFixture) -> None:
+    """TimerRegistryのテスト。"""
+    registry = pytilpack.logging.TimerRegistry(max_samples=50)
+    for i in range(1, 101):
+        registry.record("a", i / 1000)
+    with caplog.at_level(logging.INFO):
+        with registry.timer("b"):
+            pass
+        with pytilpack.logging.timer("c", registry=registry, log=False):
+            pass
+        with pytest.raises(ValueError), pytilpack.logging.timer("c", registry=registry, log=False):
+            raise ValueError()
+    assert caplog.record_tuples == []
+
+    stats = registry.snapshot()
+    assert set(stats) == {"a", "b", "c"}
+    a = stats["a"]
+    assert (a.count, a.min, a.max) == (100, 0.001, 0.1)
+    assert a.total == pytest.approx(5.05)
+    assert a.mean == pytest.approx(0.0505)
+    # リザーバーサンプリングのため近似値
+    assert 0.001 <= a.p50 <= a.p90 <= a.p99 <= 0.1
+    assert stats["c"].count == 2
+
+    # 合計時間の長い順に出力してリセット
+    with caplog.at_level(logging.INFO):
+        assert registry.log_summary() == 3
+    assert caplog.records[0].getMessage().startswith("[a] count=100 total=5.050s mean=50.500ms min=1.000ms")
+    assert registry.snapshot() == {}
+
+
+def test_timer_registry_percentile() -> None:
+    """TimerRegistryのパーセンタイルのテスト。"""
+    registry = pytilpack.logging.TimerRegistry()
+    for i in range(100, 0, -1):
+        registry.record("a", float(i))
+    a = registry.snapshot(reset=True)["a"]
+    assert (a.p50, a.p90, a.p99) == (50.0, 90.0, 99.0)
+    assert registry.snapshot() == {}
+
+
+def test_timer_registry_emitter(caplog: pytest.LogCaptureFixture) -> None:
+    """TimerRegistryの定期出力のテスト。"""
+    registry = pytilpack.logging.TimerRegistry()
+    registry.record("a", 0.5)
+    with caplog.at_level(logging.INFO):
+        registry.start_emitter(interval=0.01)
+        try:
+            with pytest.raises(RuntimeError):
+                registry.start_emitter(interval=0.01)
+            deadline = time.monotonic() + 10
+            while not caplog.records and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            registry.stop_emitter()
+    assert caplog.records[0].getMessage().startswith("[a] count=1 total=0.500s")
+
+
 def test_exception_with_dedup(caplog: pytest.LogCaptureFixture) -> None:
     """exception_with_dedupのテスト。"""
     logger = logging.getLogger("test_logger")
@@ -279,6 +402,184 @@ def test_exception_with_dedup_both_windows(caplog: pytest.LogCaptureFixture) ->
         assert caplog.records[-1].levelname == "WARNING"
 
 
+def test_exception_history(caplog: pytest.LogCaptureFixture) -> None:
+    """ExceptionHistoryの上限・期限切れ・抑制回数の集計テスト。"""
+    logger = logging.getLogger("test_logger_history")
+    logger.setLevel(logging.DEBUG)
+    history = pytilpack.logging.ExceptionHistory(max_entries=2, max_age=datetime.timedelta(hours=1))
+    now = datetime.datetime(2023, 1, 1, 12, 0, 0)
+
+    with caplog.at_level(logging.INFO):
+        for msg in ("a", "b", "a", "c"):
+            pytilpack.logging.exception_with_dedup(logger, "error", msg=msg, history=history, now=now)
+        # 件数の上限により最も長く発生していない"b"が捨てられている
+        assert len(history) == 2
+        caplog.clear()
+        pytilpack.logging.exception_with_dedup(logger, "error", msg="b", history=history, now=now)
+        assert caplog.records[-1].levelname == "WARNING"
+        pytilpack.logging.exception_with_dedup(logger, "error", msg="b", history=history, now=now)
+        assert caplog.records[-1].levelname == "INFO"
+
+        # 既定の履歴とは独立している
+        pytilpack.logging.exception_with_dedup(logger, "error", msg="b", now=now)
+        assert caplog.records[-1].levelname == "WARNING"
+
+        # 抑制回数の集計
+        caplog.clear()
+        # "a"の抑制回数は"b"の追加で"a"が履歴から捨てられた際に一緒に捨てられている
+        assert pytilpack.logging.log_suppressed_exceptions(logger, history) == 1
+        assert [r.message for r in caplog.records] == ["b (前回の集計以降に1回抑制)"]
+        assert not history.take_suppressed_counts()
+
+    # 期限切れの履歴は捨てられる
+    history.check("x", now + datetime.timedelta(hours=2), None, None)
+    assert len(history) == 1
+
+
+def test_exception_history_suppressed_bounded() -> None:
+    """抑制回数の集計も履歴の上限で捨てられることのテスト。"""
+    history = pytilpack.logging.ExceptionHistory(max_entries=100)
+    now = datetime.datetime(2023, 1, 1, 12, 0, 0)
+    for i in range(1000):
+        for _ in range(2):
+            history.check(f"fp{i}", now, None, None, msg=f"msg{i}")
+    assert len(history) == 100
+    assert len(history.suppressed) <= 100
+    counts = history.take_suppressed_counts()
+    assert counts == {f"msg{i}": 1 for i in range(900, 1000)}
+
+
+def test_exception_history_threads() -> None:
+    """ExceptionHistoryを複数スレッドから使用するテスト。"""
+    history = pytilpack.logging.ExceptionHistory(max_entries=100)
+    now = datetime.datetime(2023, 1, 1, 12, 0, 0)
+    results: list[bool] = []
+
+    def worker() -> None:
+        for i in range(1000):
+            results.append(history.check(str(i % 10), now, datetime.timedelta(days=1), None, msg=str(i % 10)))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 10
+    assert sum(history.take_suppressed_counts().values()) == 3990
+
+
+def test_rate_limit_filter(caplog: pytest.LogCaptureFixture) -> None:
+    """RateLimitFilterのテスト。"""
+    logger = logging.getLogger("test_rate_limit_filter")
+    logger.setLevel(logging.DEBUG)
+    summary_logger = logging.getLogger("test_rate_limit_filter.summary")
+    rate_limit_filter = pytilpack.logging.RateLimitFilter(max_records=2, interval=3600, summary_logger=summary_logger)
+    logger.addFilter(rate_limit_filter)
+    try:
+        with caplog.at_level(logging.DEBUG):
+            for i in range(5):
+                logger.info("retry %d", i)
+                logger.info("other %d", i)
+            logger.warning("warning")  # WARNING以上は制限しない
+            logger.warning("warning")
+            logger.warning("warning")
+            assert [r.getMessage() for r in caplog.records] == [
+                "retry 0",
+                "other 0",
+                "retry 1",
+                "other 1",
+                "warning",
+                "warning",
+                "warning",
+            ]
+            caplog.clear()
+
+            assert rate_limit_filter.log_suppressed() == 6
+            assert sorted(r.getMessage() for r in caplog.records) == [
+                "[test_rate_limit_filter] other %d (前回の集計以降に3件抑制)",
+                "[test_rate_limit_filter] retry %d (前回の集計以降に3件抑制)",
+            ]
+            caplog.clear()
+
+            # 集計後は新しい期間として再び通す
+            logger.info("retry %d", 5)
+            assert [r.getMessage() for r in caplog.records] == ["retry 5"]
+    finally:
+        logger.removeFilter(rate_limit_filter)
+
+
+def test_rate_limit_filter_sampling(caplog: pytest.LogCaptureFixture) -> None:
+    """RateLimitFilterのサンプリングと抑制件数の定期出力のテスト。"""
+    logger = logging.getLogger("test_rate_limit_filter_sampling")
+    logger.setLevel(logging.DEBUG)
+    rate_limit_filter = pytilpack.logging.RateLimitFilter(max_records=1, interval=1.0, sample_every=3)
+    logger.addFilter(rate_limit_filter)
+    try:
+        with caplog.at_level(logging.DEBUG):
+            for i in range(8):
+                logger.info("message %d", i)
+            assert [r.getMessage() for r in caplog.records] == ["message 0", "message 3", "message 6"]
+            caplog.clear()
+
+            # 期間の終了時に別スレッドから抑制件数を出力する
+            timer = rate_limit_filter.timer
+            assert timer is not None
+            timer.join()
+            assert rate_limit_filter.timer is None
+            assert [r.getMessage() for r in caplog.records] == [
+                "[test_rate_limit_filter_sampling] message %d (前回の集計以降に7件抑制)"
+            ]
+    finally:
+        logger.removeFilter(rate_limit_filter)
+
+
+def test_json_formatter() -> None:
+    """JsonFormatterのテスト。"""
+    formatter = pytilpack.logging.JsonFormatter(context={"user": lambda: "alice", "none": lambda: None}, include_task_id=False)
+    record = logging.makeLogRecord(
+        {"name": "test", "levelno": logging.INFO, "levelname": "INFO", "msg": "hello %s", "args": ("world",), "extra1": 1}
+    )
+    token = pytilpack.logging.request_id_var.set("req-1")
+    try:
+        data = json.loads(formatter.format(record))
+    finally:
+        pytilpack.logging.request_id_var.reset(token)
+    assert datetime.datetime.fromisoformat(data.pop("time")).timestamp() == pytest.approx(record.created, abs=0.001)
+    assert data == {
+        "level": "INFO",
+        "logger": "test",
+        "message": "hello world",
+        "request_id": "req-1",
+        "user": "alice",
+        "extra1": 1,
+    }
+
+    # 例外情報
+    try:
+        raise ValueError("テスト")
+    except ValueError:
+        record = logging.makeLogRecord({"msg": "error", "exc_info": sys.exc_info()})
+    data = json.loads(formatter.format(record))
+    assert "ValueError: テスト" in data["exc_info"]
+    assert record.exc_text == data["exc_info"]
+
+
+@pytest.mark.parametrize("encoder", ["json", "orjson"])
+@pytest.mark.asyncio
+async def test_json_formatter_task_id(encoder: pytilpack.logging.JsonEncoder) -> None:
+    """JsonFormatterのtask_id・fields・encoderのテスト。"""
+    formatter = pytilpack.logging.JsonFormatter(fields={"msg": "message", "line": "lineno"}, encoder=encoder)
+    record = logging.makeLogRecord({"msg": "日本語", "lineno": 10, "dt": datetime.date(2024, 1, 2)})
+    line = formatter.format(record)
+    assert "\n" not in line and "日本語" in line
+    data = json.loads(line)
+    assert data == {"msg": "日本語", "line": 10, "task_id": data["task_id"], "dt": "2024-01-02"}
+
+    # イベントループ外のスレッドではtask_idを出力しない
+    data = json.loads(await asyncio.to_thread(formatter.format, record))
+    assert "task_id" not in data
+
+
 @pytest.mark.asyncio
 async def test_capture_context() -> None:
     """capture_contextのテスト。"""
@@ -372,6 +673,31 @@ async def test_capture_context_nested() -> None:
         assert "内側のメッセージ（WARNINGレベル）" not in outer_captured
 
 
+@pytest.mark.asyncio
+async def test_capture_context_dispatch() -> None:
+    """capture_contextのハンドラ共有とバッファ上限のテスト。"""
+    logger = logging.getLogger("test_capture_context_dispatch")
+    logger.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(message)s")
+    num_handlers = len(logger.handlers)
+
+    async def task(i: int) -> str:
+        async with pytilpack.logging.capture_context(logger, formatter, max_size=20) as get_value:
+            await asyncio.sleep(0.01)
+            for j in range(10):
+                logger.info(f"t{i}-{j}")
+            # 同時に実行中のキャプチャがあってもハンドラは1つだけ
+            assert len(logger.handlers) == num_handlers + 1
+            return get_value()
+
+    results = await asyncio.gather(*(task(i) for i in range(5)))
+    assert len(logger.handlers) == num_handlers
+
+    for i, result in enumerate(results):
+        # 古い行から破棄され、直近の行だけが残る
+        assert result == f"...(6行省略)\nt{i}-6\nt{i}-7\nt{i}-8\nt{i}-9\n"
+
+
 @pytest.mark.parametrize(
     "data,max_str_len,max_bytes_len,bytes_to_str,expected",
     [
@@ -434,6 +760,89 @@ def test_truncate_values(
     assert actual == expected
 
 
+def test_truncate_values_budget() -> None:
+    """truncate_valuesの深さ・要素数・全体サイズの上限と循環参照のテスト。"""
+    data = {"a": {"b": {"c": 1}}, "list": ["x", "y", "z"], "tuple": ("x", "y", "z")}
+    assert pytilpack.logging.truncate_values(data, max_depth=2) == {
+        "a": {"b": "..."},
+        "list": ["x", "y", "z"],
+        "tuple": ("x", "y", "z"),
+    }
+    assert pytilpack.logging.truncate_values(data, max_items=2) == {
+        "a": {"b": {"c": 1}},
+        "list": ["x", "y", "..."],
+        "...": "...",
+    }
+    # 全体サイズの上限に達した時点で走査を打ち切る
+    huge = [{"id": i, "name": "x" * 10} for i in range(200_000)]
+    result = pytilpack.logging.truncate_values(huge, max_total_size=100)
+    assert len(result) < 10
+    assert result[-1] == "..."
+
+    # 循環参照
+    cyclic: list[typing.Any] = [1]
+    cyclic.append(cyclic)
+    assert pytilpack.logging.truncate_values(cyclic) == [1, "..."]
+    assert pytilpack.logging.jsonify(cyclic) == '[1,"..."]'
+    # 同じオブジェクトの複数回の参照は循環参照ではない
+    shared = ["s"]
+    assert pytilpack.logging.truncate_values([shared, shared]) == [["s"], ["s"]]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_items": 10}])
+def test_truncate_num_list(kwargs: dict[str, typing.Any]) -> None:
+    """数値型のlistの省略を先頭max_num_list_len + 1件で判定することのテスト。"""
+    data = {"nums": [1, 2.5, 3, 4, "x"], "mixed": [1, 2, "x", 4]}
+    expected = {"nums": [1, 2.5, 3, "..."], "mixed": [1, 2, "x", 4]}
+    assert pytilpack.logging.truncate_values(data, **kwargs) == expected
+    expected_json = json.dumps(expected, separators=(",", ":"))
+    assert pytilpack.logging.jsonify(data, **kwargs) == expected_json
+    assert pytilpack.logging.jsonify(data, encoder="orjson", **kwargs) == expected_json
+
+
+@pytest.mark.parametrize("kwargs", [{"max_depth": 2}, {"max_items": 2}, {"max_depth": 1, "max_items": 1}])
+def test_jsonify_budget(kwargs: dict[str, typing.Any]) -> None:
+    """jsonifyの深さ・要素数の上限がtruncate_valuesと同じ結果になることのテスト。"""
+    data = {"a": {"b": {"c": [1, 2]}}, "list": ["x", b"y", ("z",)], "n": None}
+    expected = json.dumps(
+        pytilpack.logging.truncate_values(data, bytes_to_str=True, **kwargs), ensure_ascii=False, separators=(",", ":")
+    )
+    assert pytilpack.logging.jsonify(data, **kwargs) == expected
+    assert pytilpack.logging.jsonify(data, encoder="orjson", **kwargs) == expected
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_jsonify_truncate_copy(indent: int | None) -> None:
+    """上限を指定しない場合のjsonify（複製してJSON化）が1パスの場合と同じ結果になることのテスト。"""
+
+    class Obj:
+        def __init__(self) -> None:
+            self.text = "y" * 150
+            self.self: typing.Any = self
+
+    cyclic: dict[typing.Any, typing.Any] = {"n": 1}
+    cyclic["self"] = cyclic
+    data = {
+        "str": "x" * 150,
+        b"k" * 120: b"\xff" * 10,
+        1: [1.5, 2, 3, 4],
+        None: (True, "z" * 200, [None, {"a": []}]),
+        "obj": Obj(),
+        "cyclic": cyclic,
+        "dt": datetime.datetime(2023, 1, 1),
+    }
+    expected = pytilpack.logging._TruncatingEncoder(indent=indent).encode(data)  # pylint: disable=protected-access
+    assert pytilpack.logging.jsonify(data, indent=indent) == expected
+
+
+def test_jsonify_max_total_size() -> None:
+    """jsonifyの全体サイズの上限のテスト。"""
+    huge = {"items": [{"id": i, "name": "x" * 10} for i in range(200_000)]}
+    actual = pytilpack.logging.jsonify(huge, max_total_size=100)
+    assert len(actual) < 200
+    assert actual.endswith(',"..."]}')
+
+
 @pytest.mark.parametrize(
     "obj,indent,truncate,expected",
     [
@@ -455,6 +864,15 @@ def test_truncate_values(
         ({"date": datetime.date(2023, 1, 1)}, None, False, '{"date":"2023-01-01"}'),
         # pathlib.Path変換
         ({"path": pathlib.Path("/tmp/test")}, None, False, '{"path":"/tmp/test"}'),
+        # truncate=True かつインデント付き・数値リスト・キーの変換
+        (
+            {"list": [1, 2, 3, 4], "t": (1, 2)},
+            2,
+            True,
+            '{\n  "list": [\n    1,\n    2,\n    3,\n    "..."\n  ],\n  "t": [\n    1,\n    2\n  ]\n}',
+        ),
+        ({2: None, True: 1.5, None: {}, b"k": []}, None, True, '{"2":null,"true":1.5,"null":{},"k":[]}'),
+        ({"dt": datetime.datetime(2023, 1, 1, 12, 0, 0, 123000)}, None, True, '{"dt":"2023-01-01T12:00:00.123"}'),
     ],
 )
 def test_jsonify(
@@ -466,3 +884,16 @@ def test_jsonify(
     """jsonifyのテスト。"""
     actual = pytilpack.logging.jsonify(obj, indent, truncate)
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        {"key": "a" * 150, "bytes": b"x" * 150, "list": [1, 2, 3, 4], "nested": [{"k": ("v", None, True)}]},
+        {"dt": datetime.datetime(2023, 1, 1, 12, 0, 0, 123000), "path": pathlib.Path("/tmp/test"), 1: 1.5},
+    ],
+)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_jsonify_orjson(obj: typing.Any, indent: int | None) -> None:
+    """jsonifyのorjsonエンコーダーが標準のエンコーダーと同じ結果になることのテスト。"""
+    assert pytilpack.logging.jsonify(obj, indent, encoder="orjson") == pytilpack.logging.jsonify(obj, indent)
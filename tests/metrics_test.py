@@ -0,0 +1,105 @@
+"""pytilpack.metricsのテスト。"""
+
+import math
+import threading
+
+import pytest
+
+import pytilpack.metrics
+
+
+def test_counter() -> None:
+    """Counterのテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    counter = registry.counter("test_total", "テスト")
+    assert registry.counter("test_total") is counter
+    counter.inc()
+    counter.inc(2.5)
+    assert counter.get() == 3.5
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+    with pytest.raises(ValueError):
+        registry.gauge("test_total")
+
+    # 複数スレッドからの加算で値が失われない
+    def work() -> None:
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.get() == 40003.5
+
+
+def test_gauge() -> None:
+    """Gaugeのテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    gauge = registry.gauge("test_gauge")
+    gauge.inc(3)
+    gauge.dec()
+    assert gauge.get() == 2
+    gauge.set(10)
+    gauge.dec(4)
+    assert gauge.get() == 6
+    gauge.set_function(lambda: 42)
+    assert gauge.get() == 42
+
+
+def test_histogram() -> None:
+    """Histogramのテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    histogram = registry.histogram("test_seconds", buckets=[0.1, 1.0])
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+    assert histogram.upper_bounds == (0.1, 1.0, math.inf)
+    assert histogram.get() == ([2, 3, 4], 2.65, 4)
+    with pytest.raises(ValueError):
+        registry.histogram("test_invalid", buckets=[1.0, 0.1])
+
+
+def test_labels() -> None:
+    """ラベルのテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    counter = registry.counter("test_requests_total", labelnames=["method", "status"])
+    counter.labels("GET", "200").inc()
+    counter.labels(method="GET", status="200").inc()
+    counter.labels(status="500", method="POST").inc()
+    assert counter.labels("GET", "200").get() == 2
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.labels("GET")
+    with pytest.raises(ValueError):
+        counter.labels(method="GET")
+    with pytest.raises(ValueError):
+        registry.counter("test_requests_total", labelnames=["method"])
+    with pytest.raises(ValueError):
+        registry.counter("test invalid")
+    with pytest.raises(ValueError):
+        registry.histogram("test_le", labelnames=["le"])
+
+
+def test_generate_text() -> None:
+    """Prometheusのテキスト形式の出力のテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    registry.counter("b_total", "説明\n2行目", ["path"]).labels(path='/a"b\\').inc(3)
+    registry.gauge("a_gauge").set(-1.5)
+    registry.histogram("c_seconds", "処理時間", buckets=[0.5]).observe(0.25)
+    assert pytilpack.metrics.generate_text(registry) == (
+        "# TYPE a_gauge gauge\n"
+        "a_gauge -1.5\n"
+        "# HELP b_total 説明\\n2行目\n"
+        "# TYPE b_total counter\n"
+        'b_total{path="/a\\"b\\\\"} 3.0\n'
+        "# HELP c_seconds 処理時間\n"
+        "# TYPE c_seconds histogram\n"
+        'c_seconds_bucket{le="0.5"} 1.0\n'
+        'c_seconds_bucket{le="+Inf"} 1.0\n'
+        "c_seconds_sum 0.25\n"
+        "c_seconds_count 1.0\n"
+    )
+    registry.unregister("b_total")
+    assert "b_total" not in registry.generate_text()
@@ -3,12 +3,14 @@
 import asyncio
 import contextlib
 import pathlib
+import time
 import typing
 
 import httpx
 import pytest
 import quart
 
+import pytilpack.metrics
 import pytilpack.quart
 import pytilpack.quart.misc
 
@@ -271,6 +273,176 @@ async def test_set_max_concurrency_cancel_releases_semaphore() -> None:
         assert not state.semaphore.locked()
 
 
+@pytest.mark.asyncio
+async def test_concurrency_limiter() -> None:
+    """ConcurrencyLimiterのテスト。"""
+    limiter = pytilpack.quart.ConcurrencyLimiter(1)
+    order: list[int] = []
+
+    async def worker(i: int) -> None:
+        await limiter.acquire()
+        order.append(i)
+
+    assert await limiter.acquire()
+    assert limiter.locked()
+    tasks = [asyncio.create_task(worker(i)) for i in range(3)]
+    await asyncio.sleep(0)
+    assert (limiter.in_flight, limiter.queue_depth) == (1, 3)
+
+    # 上限を上げると待機中のものが到着順に実行される
+    limiter.limit = 3
+    await asyncio.sleep(0)
+    assert order == [0, 1]
+    assert (limiter.in_flight, limiter.queue_depth) == (3, 1)
+
+    # 割り当て直後にキャンセルされた場合は枠を返す
+    limiter.release()
+    tasks[2].cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await tasks[2]
+    assert (limiter.in_flight, limiter.queue_depth) == (2, 0)
+
+    # 上限を下げても実行中のものは中断しない
+    limiter.limit = 1
+    assert limiter.locked()
+    for _ in range(2):
+        limiter.release()
+    assert not limiter.locked()
+    with pytest.raises(ValueError):
+        limiter.release()
+
+
+def test_adaptive_limit() -> None:
+    """AIMDLimit/GradientLimitのテスト。"""
+    aimd = pytilpack.quart.AIMDLimit(latency_threshold=1.0, backoff_ratio=0.5)
+    assert aimd.update(10.0, 0.1, 10, False) == pytest.approx(10.1)
+    assert aimd.update(10.0, 0.1, 1, False) == 10.0  # 余裕がある間は増やさない
+    assert aimd.update(10.0, 2.0, 10, False) == 5.0
+    assert aimd.update(5.0, 2.0, 10, False) == 5.0  # 減らす前に開始したリクエストでは続けて減らさない
+    assert aimd.update(5.0, 0.0, 10, True) == 2.5
+
+    gradient = pytilpack.quart.GradientLimit()
+    limit = 10.0
+    for _ in range(10):
+        limit = gradient.update(limit, 0.1, int(limit), False)
+    assert limit > 10.0
+    # 処理時間が長期平均より大幅に長くなると減らす
+    for _ in range(30):
+        limit = gradient.update(limit, 1.0, int(limit), False)
+    assert limit < 10.0
+
+
+@pytest.mark.asyncio
+async def test_set_max_concurrency_adaptive() -> None:
+    """set_max_concurrency(adaptive=...)のテスト。"""
+    with pytest.raises(ValueError):
+        pytilpack.quart.set_max_concurrency(quart.Quart(__name__), 10, min_concurrency=11)
+
+    app = quart.Quart(__name__)
+    delay = 0.0
+
+    @app.route("/test")
+    async def test_endpoint():
+        await asyncio.sleep(delay)
+        return "OK"
+
+    pytilpack.quart.set_max_concurrency(
+        app, 20, adaptive=pytilpack.quart.AIMDLimit(latency_threshold=0.02, backoff_ratio=0.5), min_concurrency=2
+    )
+    state = pytilpack.quart.get_concurrency_state(app)
+    assert (state.current_limit, state.queue_depth, state.in_flight) == (11, 0, 0)
+
+    async with app.test_client() as client:
+        # 処理時間が許容値を超えると上限を減らす
+        delay = 0.03
+        assert (await client.get("/test")).status_code == 200
+        assert state.current_limit == 5
+
+        # 下限より小さくはならない
+        for _ in range(3):
+            assert (await client.get("/test")).status_code == 200
+        assert state.current_limit == 2
+
+        # 上限付近まで使われていれば増やす
+        delay = 0.0
+        for _ in range(10):
+            assert (await client.get("/test")).status_code == 200
+        assert state.estimated_limit > 2
+    assert state.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_priority() -> None:
+    """ConcurrencyLimiterの優先度とLIFOのテスト。"""
+    limiter = pytilpack.quart.ConcurrencyLimiter(1, lifo_threshold=2)
+    order: list[str] = []
+
+    async def worker(name: str, priority: int) -> None:
+        await limiter.acquire(priority)
+        order.append(name)
+        limiter.release()
+
+    await limiter.acquire()
+    tasks = [
+        asyncio.create_task(worker(name, priority))
+        for name, priority in [("a0", 0), ("a1", 0), ("a2", 0), ("a3", 0), ("b", 5), ("c", 10)]
+    ]
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 6
+    assert limiter.waiters_ahead(10) == 1
+    assert limiter.waiters_ahead(0) == 2  # 待機数がlifo_thresholdを超えるため、同じ優先度の待機者より先に実行される
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+    # 優先度の高い順。同じ優先度では待機数がlifo_thresholdを超えている間は新しい順、その後は到着順
+    assert order == ["c", "b", "a3", "a2", "a0", "a1"]
+    assert (limiter.in_flight, limiter.queue_depth) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_set_max_concurrency_load_shedding() -> None:
+    """set_max_concurrencyの優先度と待機時間の見込みによる503のテスト。"""
+    app = quart.Quart(__name__)
+
+    @app.route("/test")
+    async def test_endpoint():
+        return "OK"
+
+    @app.route("/healthz")
+    async def healthz():
+        return "OK"
+
+    pytilpack.quart.set_max_concurrency(app, 1, timeout=1.0, priority={"healthz": 10}, load_shedding=True)
+    state = pytilpack.quart.get_concurrency_state(app)
+    async with app.test_request_context("/healthz"):
+        assert state.get_priority() == 10
+    async with app.test_request_context("/test"):
+        assert state.get_priority() == 0
+
+    async with app.test_client() as client:
+        assert (await client.get("/test")).status_code == 200
+        assert state.avg_latency > 0
+
+        # 処理時間の見込みが長く、待ってもtimeoutに間に合わない場合は待たずに503
+        assert state.limiter is not None
+        await state.limiter.acquire()
+        try:
+            state.avg_latency = 10.0
+            assert state.expected_wait() == 10.0
+            start = time.perf_counter()
+            assert (await client.get("/test")).status_code == 503
+            assert time.perf_counter() - start < 0.5
+
+            # 間に合う見込みであれば待機する
+            state.avg_latency = 0.01
+            task = asyncio.create_task(client.get("/healthz"))
+            await asyncio.sleep(0.05)
+            assert state.queue_depth == 1
+        finally:
+            state.limiter.release()
+        assert (await task).status_code == 200
+
+
 @pytest.mark.asyncio
 async def test_prefer_markdown() -> None:
     """prefer_markdownのテスト。"""
@@ -299,3 +471,20 @@ async def test_prefer_markdown() -> None:
         headers={"Accept": "text/plain;q=0.7, */*;q=0.6"},
     ):
         assert pytilpack.quart.prefer_markdown() is True
+
+
+@pytest.mark.asyncio
+async def test_metrics_response() -> None:
+    """metrics_responseのテスト。"""
+    registry = pytilpack.metrics.MetricsRegistry()
+    registry.counter("test_total").inc()
+    app = quart.Quart(__name__)
+
+    @app.route("/metrics")
+    async def metrics():
+        return pytilpack.quart.metrics_response(registry)
+
+    response = await app.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type == pytilpack.metrics.CONTENT_TYPE
+    assert await response.get_data(as_text=True) == "# TYPE test_total counter\ntest_total 1.0\n"
@@ -180,6 +180,11 @@ async def test_async_mixin_context_vars() -> None:
         query = Test1.select().where(Test1.unique_id == "test_context")
         result = (await session.execute(query)).scalar_one()
         assert result.unique_id == "test_context"
+        assert Base.session_name() is None
+
+    async with Base.session_scope("test"):
+        assert Base.session_name() == "test"
+    assert Base.session_name() is None
 
 
 @pytest.mark.asyncio
@@ -184,6 +184,11 @@ def test_sync_mixin_context_vars() -> None:
         query = Test1.select().where(Test1.unique_id == "test_context")
         result = session.execute(query).scalar_one()
         assert result.unique_id == "test_context"
+        assert Base.session_name() is None
+
+    with Base.session_scope("test"):
+        assert Base.session_name() == "test"
+    assert Base.session_name() is None
 
 
 def test_sync_mixin_to_dict() -> None:
@@ -1,6 +1,7 @@
 """SSE モジュールのテスト。"""
 
 import asyncio
+import dataclasses
 import typing
 
 import pytest
@@ -146,3 +147,216 @@ async def test_generator_cancel() -> None:
 
     assert messages == ["data: msg1\n\n"]
     assert cleanup_called
+
+
+@pytest.mark.asyncio
+async def test_hub() -> None:
+    """SSEHubの一斉配信テスト。"""
+    hub = pytilpack.sse.SSEHub()
+    subscribers = [hub.subscribe() for _ in range(3)]
+    assert hub.publish(pytilpack.sse.SSE("msg1", event="update")) == 3
+    assert hub.publish("data: raw") == 3
+    subscribers[0].close()
+    assert hub.publish("data: after close") == 2
+    hub.close()
+    assert len(hub.subscribers) == 0
+
+    assert [chunk async for chunk in subscribers[0]] == [b"event: update\ndata: msg1\n\n", b"data: raw\n\n"]
+    for subscriber in subscribers[1:]:
+        assert [chunk async for chunk in subscriber] == [
+            b"event: update\ndata: msg1\n\n",
+            b"data: raw\n\n",
+            b"data: after close\n\n",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_hub_wait() -> None:
+    """SSEHubの購読者が配信を待機できることのテスト。"""
+    hub = pytilpack.sse.SSEHub(keepalive_interval=0.1)
+
+    async def consume() -> list[bytes]:
+        with hub.subscribe() as subscriber:
+            return [await anext(subscriber) for _ in range(2)]
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.15)
+    hub.publish(pytilpack.sse.SSE("msg1"))
+    assert await task == [b": ping\n\n", b"data: msg1\n\n"]
+    assert len(hub.subscribers) == 0
+
+
+@pytest.mark.parametrize(
+    "policy,expected",
+    [
+        ("drop_oldest", [b"event: b\ndata: 2\n\n", b"event: a\ndata: 3\n\n"]),
+        ("disconnect", []),
+        ("coalesce", [b"event: b\ndata: 2\n\n", b"event: a\ndata: 3\n\n"]),
+    ],
+)
+@pytest.mark.asyncio
+async def test_hub_slow_consumer(policy: pytilpack.sse.SlowConsumerPolicy, expected: list[bytes]) -> None:
+    """SSEHubのキュー溢れ時の対応方針のテスト。"""
+    hub = pytilpack.sse.SSEHub(max_queue_size=2, policy=policy)
+    subscriber = hub.subscribe()
+    hub.publish(pytilpack.sse.SSE("1", event="a"))
+    hub.publish(pytilpack.sse.SSE("2", event="b"))
+    hub.publish(pytilpack.sse.SSE("3", event="a"))
+    assert subscriber.dropped == 1
+    assert subscriber.closed == (policy == "disconnect")
+    subscriber.close()
+    assert [chunk async for chunk in subscriber] == expected
+
+
+@pytest.mark.asyncio
+async def test_hub_coalesce_key() -> None:
+    """SSEHubのcoalesceでキーを明示するテスト。"""
+    hub = pytilpack.sse.SSEHub(max_queue_size=2, policy="coalesce")
+    subscriber = hub.subscribe()
+    hub.publish("data: 1", key="x")
+    hub.publish("data: 2", key="y")
+    hub.publish("data: 3", key="y")
+    hub.publish("data: 4")  # キー無しは最も古いメッセージを捨てる
+    subscriber.close()
+    assert [chunk async for chunk in subscriber] == [b"data: 3\n\n", b"data: 4\n\n"]
+    assert subscriber.dropped == 2
+
+
+def test_hub_invalid() -> None:
+    """SSEHubの引数検証のテスト。"""
+    with pytest.raises(ValueError):
+        pytilpack.sse.SSEHub(max_queue_size=0)
+    with pytest.raises(ValueError):
+        pytilpack.sse.SSEHub(policy="invalid")  # type: ignore[arg-type]
+
+
+def test_replay_buffer() -> None:
+    """SSEReplayBufferのテスト。"""
+    buffer = pytilpack.sse.SSEReplayBuffer(max_events=3, max_bytes=9)
+    for i in range(4):
+        buffer.append(str(i), f"{i}".encode())
+    assert len(buffer) == 3
+    assert buffer.replay("0") is None  # 件数上限で捨てられた
+    assert buffer.replay("1") == [b"2", b"3"]
+    assert buffer.replay("3") == []
+    assert buffer.replay("unknown") is None
+
+    # バイト数上限
+    buffer.append("4", b"x" * 8)
+    assert len(buffer) == 2
+    assert buffer.num_bytes == 9
+    assert buffer.replay("3") == [b"x" * 8]
+
+    # 同じidは最新のものを基準にする
+    buffer.append("3", b"y")
+    assert buffer.replay("3") == []
+    buffer.append("5", b"z")
+    assert buffer.replay("3") == [b"z"]
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.replay("5") is None
+
+
+@pytest.mark.asyncio
+async def test_hub_replay() -> None:
+    """SSEHubのLast-Event-IDによる再送のテスト。"""
+    hub = pytilpack.sse.SSEHub(replay_buffer=pytilpack.sse.SSEReplayBuffer())
+    hub.publish(pytilpack.sse.SSE("1", id="1"))
+    hub.publish("data: no id")  # idの無いメッセージは保持しない
+    hub.publish(pytilpack.sse.SSE("2", id="2"))
+
+    subscriber = hub.subscribe("1")
+    missed = hub.subscribe("unknown")
+    hub.publish(pytilpack.sse.SSE("3", id="3"))
+    hub.close()
+
+    assert not subscriber.replay_missed
+    assert [chunk async for chunk in subscriber] == [b"id: 2\ndata: 2\n\n", b"id: 3\ndata: 3\n\n"]
+    assert missed.replay_missed
+    assert [chunk async for chunk in missed] == [b"id: 3\ndata: 3\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_generator_error() -> None:
+    """プロデューサーの例外が呼び出し元へ伝播することのテスト。"""
+
+    @pytilpack.sse.generator(interval=0.15)
+    async def generate() -> typing.AsyncGenerator[str, None]:
+        yield "data: msg1\n\n"
+        raise ValueError("test")
+
+    messages: list[str] = []
+    with pytest.raises(ValueError, match="test"):
+        async for msg in generate():
+            messages.append(msg)
+    assert messages == ["data: msg1\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_generator_producer_cancelled() -> None:
+    """プロデューサー内で発生したキャンセルが呼び出し元へ伝播することのテスト。"""
+    upstream: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+
+    @pytilpack.sse.generator(interval=0.05)
+    async def generate() -> typing.AsyncGenerator[str, None]:
+        yield "data: msg1\n\n"
+        yield await upstream
+
+    messages: list[str] = []
+
+    async def consume() -> None:
+        async for msg in generate():
+            messages.append(msg)
+            upstream.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        # キープアライブを送り続けて終わらない場合はタイムアウトで失敗させる
+        await asyncio.wait_for(consume(), timeout=1.0)
+    assert messages == ["data: msg1\n\n"]
+
+
+def test_sse_to_bytes() -> None:
+    """SSE.to_bytes()とシリアライズ結果のキャッシュのテスト。"""
+    msg = pytilpack.sse.SSE("あ", event="update")
+    assert msg.to_bytes() == "event: update\ndata: あ\n\n".encode()
+    assert msg.to_bytes() is msg.to_bytes()
+    # フィールドを変更するとキャッシュは破棄される
+    msg.data = "x"
+    assert msg.to_str() == "event: update\ndata: x\n\n"
+    assert msg.to_bytes() == b"event: update\ndata: x\n\n"
+    assert msg == pytilpack.sse.SSE("x", event="update")
+    # キャッシュはdataclassのフィールドに含まれない
+    assert [f.name for f in dataclasses.fields(msg)] == ["data", "event", "id", "retry", "comment"]
+    assert dataclasses.asdict(msg) == {"data": "x", "event": "update", "id": None, "retry": None, "comment": None}
+
+
+@pytest.mark.asyncio
+async def test_generator_bytes_batch() -> None:
+    """generatorのbytes出力と連結のテスト。"""
+
+    @pytilpack.sse.generator(interval=15, as_bytes=True, batch_size=3)
+    async def generate() -> typing.AsyncGenerator[str | pytilpack.sse.SSE, None]:
+        for i in range(5):
+            yield pytilpack.sse.SSE(str(i))
+        yield "data: raw"
+
+    chunks: list[bytes] = []
+    async for chunk in generate():
+        chunks.append(chunk)
+        await asyncio.sleep(0.01)  # 送信が遅い状態を模擬
+    assert chunks == [
+        b"data: 0\n\ndata: 1\n\ndata: 2\n\n",
+        b"data: 3\n\ndata: 4\n\ndata: raw\n\n",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hub_batch() -> None:
+    """SSEHubの連結のテスト。"""
+    hub = pytilpack.sse.SSEHub(batch_size=2)
+    subscriber = hub.subscribe()
+    for i in range(3):
+        hub.publish(pytilpack.sse.SSE(str(i)))
+    hub.close()
+    assert [chunk async for chunk in subscriber] == [b"data: 0\n\ndata: 1\n\n", b"data: 2\n\n"]